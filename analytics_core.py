@@ -0,0 +1,189 @@
+import threading
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+import db_core
+import tracker_core as tc
+
+HOUR_SECONDS = 3600
+DAY_SECONDS = 86400
+EPOCH_WEEKDAY = 3 # 1970-01-01 was a Thursday (Monday = 0)
+DEFAULT_PERCENTILES = (50, 75, 90, 95, 99)
+
+# --- Results Cache ---
+# Everything below is derived from the sessions table, so results stay valid until a
+# new session is recorded (the last row id changes) or old sessions are archived by
+# tc.compact_sessions() (the first row id changes). Archived sessions are only in the
+# daily rollups: daily_totals() and rolling_average() fill the days before the first
+# raw session from those, while the heatmap, weekday and session-length statistics
+# cover the raw sessions only (the last tc.SESSION_RETENTION_DAYS days once compacted).
+
+_cache_lock = threading.Lock()
+_cache_key = None
+_cached_arrays = None
+_cached_results = {}
+
+def _history_key():
+    """Returns a cheap fingerprint of the sessions table (its first and last row ids) and of the daily rollups."""
+    tc.ensure_db()
+    conn = db_core.connect()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT (SELECT MIN(id) FROM sessions), (SELECT MAX(id) FROM sessions),
+               (SELECT COUNT(*) FROM daily_sessions), (SELECT SUM(total_minutes) FROM daily_sessions)
+    ''')
+    key = cursor.fetchone()
+    conn.close()
+    return key
+
+def clear_cache():
+    """Drops cached arrays and results, forcing a reload on the next call."""
+    global _cache_key, _cached_arrays
+    with _cache_lock:
+        _cache_key = None
+        _cached_arrays = None
+        _cached_results.clear()
+
+def _cached(name, compute):
+    """Returns the cached result for name, recomputing it if the session history changed."""
+    global _cache_key, _cached_arrays
+    key = _history_key()
+    with _cache_lock:
+        if key != _cache_key or _cached_arrays is None:
+            _cached_arrays = load_session_arrays()
+            _cached_results.clear()
+            _cache_key = key
+        if name not in _cached_results:
+            _cached_results[name] = compute(_cached_arrays)
+        return _cached_results[name]
+
+# --- Bulk Loading ---
+
+def load_session_arrays():
+    """
+    Loads the whole sessions table into NumPy arrays.
+    Returns a dict with local_start/local_end (epoch seconds shifted into each
+    session's own UTC offset) and duration_minutes, plus archived_days (days since
+    1970-01-01) and archived_minutes for the rolled-up days before the first session.
+    """
+    store = tc.load_session_store()
+    # The store's columns are typed arrays, so NumPy can wrap them without copying.
+    start_ts = np.frombuffer(store.start_ts, dtype=np.int64)
+    end_ts = np.frombuffer(store.end_ts, dtype=np.int64)
+    tz_offset = np.frombuffer(store.tz_offset, dtype=np.int32).astype(np.int64)
+    local_start = start_ts + tz_offset
+    first_day = date(1970, 1, 1) + timedelta(days=int(local_start.min()) // DAY_SECONDS) if len(local_start) else None
+    archived = tc.get_daily_totals(end_date=first_day - timedelta(days=1) if first_day else None)
+    return {
+        "local_start": local_start,
+        "local_end": np.maximum(end_ts + tz_offset, local_start),
+        "duration_minutes": np.frombuffer(store.duration_minutes, dtype=np.float64),
+        "archived_days": np.array([(day - date(1970, 1, 1)).days for day in archived], dtype=np.int64),
+        "archived_minutes": np.array(list(archived.values()), dtype=np.float64),
+    }
+
+def _split_into_buckets(starts, ends, width):
+    """
+    Splits each [start, end) interval at multiples of width (e.g. hour or day
+    boundaries), so sessions spanning midnight are credited to both days.
+    Returns (bucket_index, seconds_in_bucket) arrays with one entry per piece.
+    """
+    first = starts // width
+    last = np.maximum((ends - 1) // width, first)
+    counts = last - first + 1
+    owner = np.repeat(np.arange(len(starts)), counts)
+    run_offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    buckets = first[owner] + run_offsets
+    lo = np.maximum(starts[owner], buckets * width)
+    hi = np.minimum(ends[owner], (buckets + 1) * width)
+    return buckets, hi - lo
+
+def _today_day_index():
+    return (date.today() - date(1970, 1, 1)).days
+
+# --- Statistics ---
+
+def hourly_heatmap():
+    """Returns a 7x24 array of focus minutes by weekday (Monday first) and hour of day."""
+    def compute(arrays):
+        buckets, seconds = _split_into_buckets(arrays["local_start"], arrays["local_end"], HOUR_SECONDS)
+        hours = buckets % 24
+        weekdays = (buckets // 24 + EPOCH_WEEKDAY) % 7
+        minutes = np.bincount(weekdays * 24 + hours, weights=seconds / 60, minlength=7 * 24)
+        return minutes.reshape(7, 24)
+    return _cached("hourly_heatmap", compute)
+
+def weekday_distribution():
+    """Returns focus minutes per weekday (Monday first)."""
+    return hourly_heatmap().sum(axis=1)
+
+def daily_totals():
+    """
+    Returns (first_date, minutes) where minutes[i] is the focus time on first_date + i days,
+    running through today. Sessions spanning midnight are split between both days; days
+    before the first raw session come from the daily rollups.
+    """
+    today_index = _today_day_index()
+    def compute(arrays):
+        days, seconds = _split_into_buckets(arrays["local_start"], arrays["local_end"], DAY_SECONDS)
+        days = np.concatenate((arrays["archived_days"], days))
+        weights = np.concatenate((arrays["archived_minutes"], seconds / 60))
+        if len(days) == 0:
+            return date.today(), np.zeros(1)
+        first_day = int(days.min())
+        span = max(int(days.max()), today_index) - first_day + 1
+        minutes = np.bincount(days - first_day, weights=weights, minlength=span)
+        return date(1970, 1, 1) + timedelta(days=first_day), minutes
+    return _cached(("daily_totals", today_index), compute)
+
+def rolling_average(window_days):
+    """
+    Returns (first_date, averages) where averages[i] is the mean daily focus time over
+    the window_days days ending on first_date + i days. Days before the first
+    session count as zero.
+    """
+    first_date, minutes = daily_totals()
+    def compute(arrays):
+        padded = np.concatenate((np.zeros(window_days), minutes))
+        sums = np.cumsum(padded)
+        return first_date, (sums[window_days:] - sums[:-window_days]) / window_days
+    return _cached(("rolling_average", window_days, first_date, len(minutes)), compute)
+
+def session_length_percentiles(percentiles=DEFAULT_PERCENTILES):
+    """Returns {percentile: session length in minutes}, or an empty dict without sessions."""
+    percentiles = tuple(percentiles)
+    def compute(arrays):
+        durations = arrays["duration_minutes"]
+        if len(durations) == 0:
+            return {}
+        return dict(zip(percentiles, np.percentile(durations, percentiles).tolist()))
+    return _cached(("percentiles", percentiles), compute)
+
+def summary():
+    """Returns the headline statistics as plain Python values."""
+    _, last_7 = rolling_average(7)
+    _, last_30 = rolling_average(30)
+    return {
+        "weekday_minutes": weekday_distribution().tolist(),
+        "busiest_hour": int(hourly_heatmap().sum(axis=0).argmax()),
+        "rolling_7_day_average": float(last_7[-1]),
+        "rolling_30_day_average": float(last_30[-1]),
+        "session_length_percentiles": session_length_percentiles(),
+    }
+
+# --- Example Usage (for testing) ---
+if __name__ == "__main__":
+    print(f"Reading sessions from: {tc.DB_FILE}")
+    started = datetime.now()
+    stats = summary()
+    elapsed_ms = (datetime.now() - started).total_seconds() * 1000
+
+    print("\n--- Focus Minutes by Weekday (Mon..Sun) ---")
+    print(", ".join(f"{m:.0f}" for m in stats["weekday_minutes"]))
+    print(f"Busiest hour of day: {stats['busiest_hour']:02d}:00")
+    print(f"7-day average: {stats['rolling_7_day_average']:.1f} mins/day")
+    print(f"30-day average: {stats['rolling_30_day_average']:.1f} mins/day")
+    for p, minutes in stats["session_length_percentiles"].items():
+        print(f"p{p} session length: {minutes:.1f} mins")
+    print(f"\nComputed in {elapsed_ms:.1f} ms")
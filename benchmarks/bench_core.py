@@ -0,0 +1,254 @@
+"""
+Benchmarks for the tracker and blocker hot paths on synthetic data.
+
+Builds throwaway databases with the requested history sizes, blocklist sizes and
+schedule density, times the core functions against them and writes the results as
+JSON, so runs from different versions can be compared with --compare.
+
+Usage:
+    python benchmarks/bench_core.py                                  # default sizes
+    python benchmarks/bench_core.py --sessions 1000 1000000 --sites 100 1000000
+    python benchmarks/bench_core.py --output after.json --compare before.json
+
+The real database and hosts file are never touched: db_core.DB_FILE and
+blocker_core.HOSTS_PATH are pointed at a temporary directory.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import blocker_core as bc
+import db_core
+import tracker_core as tc
+
+DEFAULT_SESSION_COUNTS = (1_000, 10_000, 100_000)
+DEFAULT_SITE_COUNTS = (100, 10_000, 100_000)
+BASE_HOSTS = "127.0.0.1\tlocalhost\n::1\tlocalhost ip6-localhost ip6-loopback\n"
+SCHEDULE_HORIZON_DAYS = 90 # Days into the future that pending schedules are spread over
+REGRESSION_THRESHOLD = 1.25 # --compare flags benchmarks that got this much slower
+
+# --- Synthetic Data ---
+
+def use_database(path):
+    """Points the data layer at path and creates the schema there."""
+    db_core.writer.flush()
+    db_core.DB_FILE = path
+    db_core.invalidate_cache()
+    tc.init_db()
+    bc.init_db()
+
+def generate_sessions(conn, count, history_days, rng):
+    """Inserts count sessions spread over the history_days days up to today, then builds the rollups."""
+    today = date.today()
+    first_day = today - timedelta(days=history_days - 1)
+    day_info = []
+    for i in range(history_days):
+        day = first_day + timedelta(days=i)
+        # Local midnight and the UTC offset at noon, so DST days get the right offset
+        noon = datetime(day.year, day.month, day.day, 12)
+        day_info.append((tc._day_start_epoch(day), tc.to_epoch(noon)[1]))
+
+    def rows():
+        for _ in range(count):
+            midnight, tz_offset = day_info[rng.randrange(history_days)]
+            duration = rng.randint(5 * 60, 120 * 60)
+            start_ts = midnight + rng.randrange(86400 - duration)
+            yield start_ts, start_ts + duration, tz_offset, round(duration / 60, 2)
+
+    cursor = conn.cursor()
+    cursor.executemany("INSERT INTO sessions (start_ts, end_ts, tz_offset, duration_minutes) VALUES (?, ?, ?, ?)", rows())
+    tc._add_sessions_to_rollups(cursor)
+    conn.commit()
+
+def generate_schedules(conn, per_day, history_days, rng):
+    """Inserts about per_day schedules per day over the history and the coming SCHEDULE_HORIZON_DAYS."""
+    now_ts, tz_offset = tc.to_epoch(datetime.now())
+    first_ts = now_ts - history_days * 86400
+    count = int(per_day * (history_days + SCHEDULE_HORIZON_DAYS))
+
+    def rows():
+        for _ in range(count):
+            scheduled_ts = first_ts + rng.randrange((history_days + SCHEDULE_HORIZON_DAYS) * 86400)
+            status = "pending" if scheduled_ts > now_ts else rng.choice(("completed", "missed", "cancelled"))
+            yield scheduled_ts, tz_offset, rng.choice((25, 45, 60, 90)), status, "", now_ts
+
+    conn.executemany('''
+        INSERT INTO scheduled_focus_sessions (scheduled_ts, tz_offset, duration_minutes, status, notes, created_ts)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', rows())
+    conn.commit()
+
+def generate_blocklist(conn, count):
+    conn.executemany("INSERT INTO blocklist (site_url) VALUES (?)",
+                     ((f"site{i:07d}.example",) for i in range(count)))
+    conn.commit()
+
+def build_database(path, sessions, sites, schedules_per_day, history_days, seed):
+    use_database(path)
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    generate_sessions(conn, sessions, history_days, rng)
+    generate_schedules(conn, schedules_per_day, history_days, rng)
+    generate_blocklist(conn, sites)
+    conn.close()
+    db_core.invalidate_cache()
+    bc.render_hosts_section() # The sites were inserted directly, so the cached section is stale
+
+# --- Timing ---
+
+def measure(func, repeat, setup=None):
+    """Returns the wall-clock seconds of repeat calls of func(), running setup() untimed before each."""
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return times
+
+def prepare_calendar_data():
+    """The data view_activity_calendar() and refresh_calendar_schedule_highlights() load before drawing."""
+    daily_durations = tc.get_daily_totals()
+    past_focus_dates = list(daily_durations)
+    scheduled_dates = {sched.scheduled_datetime.date() for sched in tc.get_upcoming_pending_schedules()}
+    tc.get_streak_info()
+    tc.get_total_focus_minutes()
+    return past_focus_dates, scheduled_dates
+
+def reset_hosts():
+    with open(bc.HOSTS_PATH, "w") as file:
+        file.write(BASE_HOSTS)
+
+def run_scenario(work_dir, sessions, sites, args):
+    """Builds one synthetic database and returns a result dict per benchmark."""
+    path = os.path.join(work_dir, f"bench_{sessions}_{sites}.db")
+    started = time.perf_counter()
+    build_database(path, sessions, sites, args.schedules_per_day, args.history_days, args.seed)
+    print(f"Built database with {sessions} sessions and {sites} sites in {time.perf_counter() - started:.1f} s")
+
+    today = date.today()
+    cold = lambda: db_core.invalidate_cache() # Cached reads are timed without the read cache
+    benchmarks = {
+        "get_session_history": (tc.get_session_history, None),
+        "update_streak": (tc.update_streak, None),
+        "get_scheduled_sessions_all": (tc.get_scheduled_sessions, None),
+        "get_scheduled_sessions_month": (lambda: tc.get_scheduled_sessions(today, today + timedelta(days=30), "pending"), None),
+        "get_blocklist_cold": (bc.get_blocklist, cold),
+        "get_blocklist_cached": (bc.get_blocklist, None),
+        "block_sites": (bc.block_sites, reset_hosts),
+        "unblock_all": (bc.unblock_all, bc.block_sites),
+        "calendar_data_cold": (prepare_calendar_data, cold),
+    }
+    results = []
+    for name, (func, setup) in benchmarks.items():
+        if args.only and name not in args.only:
+            continue
+        times = measure(func, args.repeat, setup)
+        results.append({
+            "benchmark": name,
+            "sessions": sessions,
+            "sites": sites,
+            "schedules_per_day": args.schedules_per_day,
+            "times_s": times,
+            "min_s": min(times),
+            "median_s": statistics.median(times),
+        })
+        print(f"  {name:<30} median {statistics.median(times) * 1000:10.2f} ms   min {min(times) * 1000:10.2f} ms")
+
+    db_core.writer.flush()
+    db_core.cache.invalidate()
+    db_core.remove_database()
+    return results
+
+# --- Results ---
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def result_key(result):
+    return result["benchmark"], result["sessions"], result["sites"], result["schedules_per_day"]
+
+def compare(results, baseline_path):
+    """
+    Prints the ratio of the fastest runs against a previous run (the minimum is the least
+    noisy statistic for short timings). Returns the number of regressions.
+    """
+    with open(baseline_path, "r") as file:
+        baseline = {result_key(result): result for result in json.load(file)["results"]}
+
+    regressions = 0
+    print(f"\n--- Compared with {baseline_path} (ratio of fastest runs, >1 is slower) ---")
+    for result in results:
+        previous = baseline.get(result_key(result))
+        if previous is None:
+            continue
+        ratio = result["min_s"] / previous["min_s"] if previous["min_s"] else float("inf")
+        flag = "  REGRESSION" if ratio > REGRESSION_THRESHOLD else ""
+        regressions += bool(flag)
+        print(f"  {result['benchmark']:<30} sessions={result['sessions']:<8} sites={result['sites']:<8} {ratio:6.2f}x{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=DEFAULT_SESSION_COUNTS,
+                        help="History sizes to benchmark (number of sessions)")
+    parser.add_argument("--sites", type=int, nargs="+", default=DEFAULT_SITE_COUNTS,
+                        help="Blocklist sizes to benchmark (number of domains)")
+    parser.add_argument("--schedules-per-day", type=float, default=1.0, help="Schedule density")
+    parser.add_argument("--history-days", type=int, default=730, help="Days the session history is spread over")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--only", nargs="+", help="Only run these benchmarks")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the JSON results")
+    parser.add_argument("--compare", help="Previous JSON results to compare against")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="focusblocker_bench_") as work_dir:
+        bc.HOSTS_PATH = os.path.join(work_dir, "hosts")
+        reset_hosts()
+        # History sizes run with the smallest blocklist and blocklist sizes with the
+        # smallest history, so each dimension is measured on its own.
+        scenarios = [(sessions, min(args.sites)) for sessions in args.sessions]
+        scenarios += [(min(args.sessions), sites) for sites in args.sites if sites != min(args.sites)]
+        for sessions, sites in scenarios:
+            results += run_scenario(work_dir, sessions, sites, args)
+        db_core.writer.close()
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2, default=list)
+    print(f"\nWrote {len(results)} results to {args.output}")
+
+    if args.compare:
+        sys.exit(1 if compare(results, args.compare) else 0)
+
+if __name__ == "__main__":
+    main()
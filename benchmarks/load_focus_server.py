@@ -0,0 +1,228 @@
+"""
+Load and latency harness for the focus server.
+
+Starts the focus server on an ephemeral port and drives it with concurrent
+keep-alive clients, clients that open a new connection per request, and
+slowloris-style clients (slow header senders and readers that never read the
+response) that stay connected throughout. Reports requests per second, p50/p99
+latency and how long stop_focus_server() takes with the slow clients still attached,
+and exits non-zero when a threshold is exceeded. The attempts the server records
+are written to a temporary database, never the real one.
+
+Usage:
+    python benchmarks/load_focus_server.py
+    python benchmarks/load_focus_server.py --keepalive-clients 50 --requests 200 --max-p99-ms 100
+    python benchmarks/load_focus_server.py --output load.json
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import blocker_core as bc
+import db_core
+import focus_server
+
+BLOCKED_HOSTS = ["facebook.com", "www.youtube.com", "reddit.com", "news.ycombinator.com", "x.com"]
+
+# --- Clients ---
+
+def keepalive_client(port, requests, latencies, errors):
+    """Sends all requests over one persistent connection, like a browser tab reopening."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    for i in range(requests):
+        host = BLOCKED_HOSTS[i % len(BLOCKED_HOSTS)]
+        started = time.perf_counter()
+        try:
+            conn.request("GET", f"/page/{i}", headers={"Host": host})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                raise http.client.HTTPException(f"status {response.status}")
+            latencies.append(time.perf_counter() - started)
+        except (OSError, http.client.HTTPException):
+            errors.append(1)
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    conn.close()
+
+def close_client(port, requests, latencies, errors):
+    """Opens a new connection for every request (Connection: close)."""
+    for i in range(requests):
+        host = BLOCKED_HOSTS[i % len(BLOCKED_HOSTS)]
+        started = time.perf_counter()
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        try:
+            conn.request("GET", "/", headers={"Host": host, "Connection": "close"})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                raise http.client.HTTPException(f"status {response.status}")
+            latencies.append(time.perf_counter() - started)
+        except (OSError, http.client.HTTPException):
+            errors.append(1)
+        finally:
+            conn.close()
+
+def slow_sender(port, stop, interval):
+    """Trickles a request's headers in one byte at a time (slowloris)."""
+    request = b"GET / HTTP/1.1\r\nHost: slow.example\r\nX-Padding: " + b"a" * 4096
+    while not stop.is_set():
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=10) as sock:
+                for byte in request:
+                    if stop.wait(interval):
+                        return
+                    sock.sendall(bytes((byte,)))
+        except OSError:
+            pass # Dropped by the server's timeout; reconnect like an attacker would
+
+def slow_reader(port, stop):
+    """Pipelines requests without ever reading the responses."""
+    request = b"GET / HTTP/1.1\r\nHost: reader.example\r\n\r\n" * 64
+    while not stop.is_set():
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=10) as sock:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+                sock.sendall(request)
+                stop.wait()
+        except OSError:
+            if stop.wait(0.1):
+                return
+
+def client_worker(kind, port, clients, requests, ready, go, results):
+    """Runs clients of one kind on threads in a worker process and reports (latencies, error count)."""
+    target = keepalive_client if kind == "keepalive" else close_client
+    latencies, errors = [], []
+    threads = [threading.Thread(target=target, args=(port, requests, latencies, errors)) for _ in range(clients)]
+    ready.put(True)
+    go.wait() # Start together once every worker process is up
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put((latencies, len(errors)))
+
+# --- Harness ---
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return float("nan")
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def run_load(args):
+    bc.start_focus_server(port=0)
+    port = focus_server.server_port()
+    if port is None:
+        raise RuntimeError("The focus server failed to start.")
+
+    stop_slow = threading.Event()
+    slow_threads = [threading.Thread(target=slow_sender, args=(port, stop_slow, args.slow_interval), daemon=True)
+                    for _ in range(args.slow_senders)]
+    slow_threads += [threading.Thread(target=slow_reader, args=(port, stop_slow), daemon=True)
+                     for _ in range(args.slow_readers)]
+    for thread in slow_threads:
+        thread.start()
+    time.sleep(0.2) # Let the slow clients occupy their connections first
+
+    # Clients run in worker processes so they don't compete with the server for the GIL
+    context = multiprocessing.get_context("spawn")
+    ready, go, results = context.Queue(), context.Event(), context.Queue()
+    workers = []
+    for kind, clients in (("keepalive", args.keepalive_clients), ("close", args.close_clients)):
+        for i in range(args.processes):
+            share = clients // args.processes + (i < clients % args.processes)
+            if share:
+                workers.append(context.Process(target=client_worker, args=(kind, port, share, args.requests, ready, go, results)))
+    for worker in workers:
+        worker.start()
+    for _ in workers:
+        ready.get()
+    started = time.perf_counter()
+    go.set()
+    latencies, errors = [], 0
+    for _ in workers:
+        worker_latencies, worker_errors = results.get()
+        latencies += worker_latencies
+        errors += worker_errors
+    elapsed = time.perf_counter() - started
+    for worker in workers:
+        worker.join()
+
+    # The slow clients are still connected while the server shuts down
+    shutdown_started = time.perf_counter()
+    bc.stop_focus_server()
+    shutdown_s = time.perf_counter() - shutdown_started
+    stop_slow.set()
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "requests_per_s": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": latencies[-1] * 1000 if latencies else float("nan"),
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else float("nan"),
+        "shutdown_ms": shutdown_s * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keepalive-clients", type=int, default=20)
+    parser.add_argument("--close-clients", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=100, help="Requests per client")
+    parser.add_argument("--processes", type=int, default=2, help="Worker processes per client kind")
+    parser.add_argument("--slow-senders", type=int, default=20)
+    parser.add_argument("--slow-readers", type=int, default=10)
+    parser.add_argument("--slow-interval", type=float, default=0.5, help="Seconds between bytes of a slow sender")
+    parser.add_argument("--max-p50-ms", type=float, default=25, help="Fail when p50 latency is higher")
+    parser.add_argument("--max-p99-ms", type=float, default=250, help="Fail when p99 latency is higher")
+    parser.add_argument("--max-shutdown-ms", type=float, default=1000, help="Fail when stop_focus_server() takes longer")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    # The attempt counts the server records go to a throwaway database
+    with tempfile.TemporaryDirectory(prefix="focusblocker_load_") as work_dir:
+        db_core.DB_FILE = os.path.join(work_dir, "load.db")
+        results = run_load(args)
+        db_core.writer.close()
+    print(f"Requests:   {results['requests']} ({results['errors']} errors) in {results['elapsed_s']:.2f} s")
+    print(f"Throughput: {results['requests_per_s']:.0f} requests/s")
+    print(f"Latency:    p50 {results['p50_ms']:.2f} ms, p99 {results['p99_ms']:.2f} ms, max {results['max_ms']:.2f} ms")
+    print(f"Shutdown:   {results['shutdown_ms']:.1f} ms")
+
+    failures = []
+    if results["errors"]:
+        failures.append(f"{results['errors']} requests failed")
+    if not results["p50_ms"] <= args.max_p50_ms:
+        failures.append(f"p50 latency {results['p50_ms']:.2f} ms exceeds {args.max_p50_ms:.0f} ms")
+    if not results["p99_ms"] <= args.max_p99_ms:
+        failures.append(f"p99 latency {results['p99_ms']:.2f} ms exceeds {args.max_p99_ms:.0f} ms")
+    if results["shutdown_ms"] > args.max_shutdown_ms:
+        failures.append(f"shutdown took {results['shutdown_ms']:.1f} ms (limit {args.max_shutdown_ms:.0f} ms)")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"args": vars(args), "results": results, "failures": failures}, file, indent=2)
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("OK")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
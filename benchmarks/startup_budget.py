@@ -0,0 +1,90 @@
+"""
+Startup-time regression check.
+
+Imports an entry-point module under `python -X importtime` and fails if the
+cumulative import time goes over a fixed budget, or if modules that are meant to be
+loaded lazily (tkcalendar/babel, NumPy, ...) show up during startup.
+
+Usage:
+    python benchmarks/startup_budget.py                 # checks `import main`
+    python benchmarks/startup_budget.py --module focusblocker
+    python benchmarks/startup_budget.py --module main --budget-ms 400
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Fixed budgets (milliseconds of cumulative import time) per entry point
+STARTUP_BUDGETS_MS = {
+    "main": 400,
+    "focusblocker": 100,
+}
+
+# Modules that must not be imported while starting up
+LAZY_MODULES = ("tkcalendar", "babel", "numpy", "analytics_core")
+# The headless CLI additionally must not load the GUI stack or the focus server
+EXCLUDED_MODULES = {
+    "focusblocker": LAZY_MODULES + ("tkinter", "customtkinter", "main", "http", "focus_server", "block_page"),
+}
+
+def measure_imports(module, runs=3):
+    """
+    Imports module in a fresh interpreter `runs` times.
+    Returns (best total import time in ms, {imported module: cumulative us}) of the fastest run.
+    """
+    best_total_us, best_modules = None, None
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                cwd=REPO_DIR, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+        modules = {}
+        total_us = 0
+        for line in result.stderr.splitlines():
+            # Format: "import time: <self us> | <cumulative us> | <indented module name>"
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            _, cumulative, name = line[len("import time:"):].split("|", 2)
+            modules[name.strip()] = int(cumulative)
+            if not name.startswith("  "): # Top-level imports only, so nothing is counted twice
+                total_us += int(cumulative)
+
+        if best_total_us is None or total_us < best_total_us:
+            best_total_us, best_modules = total_us, modules
+    return best_total_us / 1000, best_modules
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main", help="Entry-point module to import (default: main)")
+    parser.add_argument("--budget-ms", type=float, help="Override the fixed budget for the module")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to list")
+    args = parser.parse_args()
+
+    budget_ms = args.budget_ms if args.budget_ms is not None else STARTUP_BUDGETS_MS.get(args.module, 400)
+    total_ms, modules = measure_imports(args.module)
+
+    print(f"Import time for '{args.module}': {total_ms:.1f} ms (budget {budget_ms:.0f} ms)")
+    print("Slowest imports (cumulative):")
+    for name, cumulative_us in sorted(modules.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    failures = []
+    if total_ms > budget_ms:
+        failures.append(f"startup import time {total_ms:.1f} ms exceeds the {budget_ms:.0f} ms budget")
+    excluded = EXCLUDED_MODULES.get(args.module, LAZY_MODULES)
+    eager = sorted({name.split(".")[0] for name in modules} & set(excluded))
+    if eager:
+        failures.append(f"excluded modules were imported at startup: {', '.join(eager)}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("OK")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+End-to-end check and throughput measurement of the session sync against a local collector.
+
+Fills a temporary database with synthetic sessions and tries to sync them while
+the collector is down. That pass must fail without losing anything, and it leaves
+at most MAX_OUTBOX_BATCHES staged. The harness then starts collector.py's server
+on a free port with a token. A pass with the wrong token must upload nothing and
+keep every batch in the outbox. Then it syncs with the right token, under a fault
+rate at which some requests answer 503, until the outbox is empty.
+
+It reports sessions/s, the number of requests and the compressed upload size. It exits
+non-zero unless the collector ends up holding every session exactly once. A further
+pass after new sessions are recorded must upload only those. A batch the collector
+answers with 400 must be set aside and arrive after --requeue-rejected. Nothing
+touches the real database.
+
+Usage:
+    python benchmarks/sync_roundtrip.py
+    python benchmarks/sync_roundtrip.py --sessions 200000 --fail-rate 0.2
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import collector
+import db_core
+import sync_core
+import tracker_core as tc
+
+class FlakyHandler(collector.CollectorHandler):
+    """Answers a share of the uploads with 503, like an overloaded collector."""
+    fail_rate = 0.0
+    reject_next = False # Answer the next upload with 400, like a collector that can't parse it
+    requests = 0
+    failures = 0
+    compressed_bytes = 0
+
+    def do_POST(self):
+        cls = FlakyHandler
+        cls.requests += 1
+        if cls.reject_next:
+            cls.reject_next = False
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            self._send_json(400, {"error": "Malformed batch."})
+            return
+        if random.random() < cls.fail_rate:
+            cls.failures += 1
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            self._send_json(503, {"error": "Try again later."})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        cls.compressed_bytes += length
+        super().do_POST()
+
+def generate_sessions(count, seed):
+    rng = random.Random(seed)
+    now = datetime.now()
+    rows = []
+    for _ in range(count):
+        start = now - timedelta(seconds=rng.randrange(365 * 86400))
+        start_ts, tz_offset = tc.to_epoch(start)
+        duration = rng.randint(5 * 60, 120 * 60)
+        rows.append((start_ts, start_ts + duration, tz_offset, round(duration / 60, 2)))
+    return rows
+
+def insert_sessions(rows):
+    tc.ensure_db()
+    conn = sqlite3.connect(db_core.DB_FILE)
+    conn.executemany("INSERT INTO sessions (start_ts, end_ts, tz_offset, duration_minutes) VALUES (?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+def collected_count(path):
+    conn = sqlite3.connect(path)
+    count, distinct = conn.execute("SELECT COUNT(*), COUNT(DISTINCT session_id) FROM sessions").fetchone()
+    conn.close()
+    return count, distinct
+
+def quiet_sync(url, token):
+    with open(os.devnull, "w") as quiet:
+        stdout, sys.stdout = sys.stdout, quiet # Each failed upload prints an error
+        try:
+            return sync_core.sync_once(url, token)
+        finally:
+            sys.stdout = stdout
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--fail-rate", type=float, default=0.1, help="Share of uploads the collector answers with 503")
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    failures = []
+    with tempfile.TemporaryDirectory(prefix="focusblocker_sync_") as work_dir:
+        db_core.DB_FILE = os.path.join(work_dir, "focus_data.db")
+        insert_sessions(generate_sessions(args.sessions, args.seed))
+        sync_core.RETRY_BASE_SECONDS = 0 # Retry on the next pass instead of minutes later
+
+        # 1. Collector unreachable: the pass fails, the outbox stays bounded
+        uploaded, waiting = quiet_sync("http://127.0.0.1:9/ingest", None) # Discard port, nothing listens
+        print(f"Collector down: uploaded {uploaded}, {waiting} batches staged (limit {sync_core.MAX_OUTBOX_BATCHES})")
+        if uploaded or waiting > sync_core.MAX_OUTBOX_BATCHES:
+            failures.append("the outbox grew past its limit or a failed pass reported uploads")
+
+        # 2. Wrong token: the batches are refused but stay in the outbox
+        store = collector.CollectorStore(os.path.join(work_dir, "collector.db"))
+        server = collector.CollectorServer(("127.0.0.1", 0), store, token="secret")
+        server.RequestHandlerClass = FlakyHandler
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/ingest"
+        staged = sync_core.pending_batches()
+        uploaded, waiting = quiet_sync(url, "wrong")
+        print(f"Wrong token: uploaded {uploaded}, {waiting} batches still in the outbox")
+        if uploaded or waiting < staged or store.summary()["machines"]:
+            failures.append("a pass with the wrong token lost or uploaded batches")
+
+        # 3. Right token but a flaky collector: sync until everything is through
+        FlakyHandler.fail_rate = args.fail_rate
+        started = time.perf_counter()
+        total, passes = 0, 0
+        while True:
+            uploaded, waiting = quiet_sync(url, "secret")
+            total += uploaded
+            passes += 1
+            if not waiting or passes > 10_000:
+                break
+        elapsed = time.perf_counter() - started
+
+        count, distinct = collected_count(os.path.join(work_dir, "collector.db"))
+        print(f"Uploaded:   {total} sessions in {elapsed:.2f} s ({total / elapsed:,.0f} sessions/s), {passes} passes")
+        print(f"Requests:   {FlakyHandler.requests} ({FlakyHandler.failures} answered 503), "
+              f"{FlakyHandler.compressed_bytes / 1024:.0f} KiB compressed")
+        print(f"Collector:  {count} sessions ({distinct} distinct ids)")
+        if count != args.sessions or distinct != args.sessions:
+            failures.append(f"the collector holds {count} sessions ({distinct} distinct), expected {args.sessions}")
+
+        # 4. Only new sessions are sent afterwards
+        insert_sessions(generate_sessions(10, args.seed + 1))
+        requests_before = FlakyHandler.requests
+        FlakyHandler.fail_rate = 0
+        uploaded, waiting = sync_core.sync_once(url, "secret")
+        print(f"Follow-up:  uploaded {uploaded} new sessions in {FlakyHandler.requests - requests_before} request(s)")
+        if uploaded != 10 or waiting or collected_count(os.path.join(work_dir, "collector.db"))[0] != args.sessions + 10:
+            failures.append("the follow-up pass didn't upload exactly the new sessions")
+
+        # 5. A batch answered with 400 is set aside, and sent again once requeued
+        insert_sessions(generate_sessions(10, args.seed + 2))
+        FlakyHandler.reject_next = True
+        rejected_pass = quiet_sync(url, "secret")
+        requeued = sync_core.requeue_rejected()
+        uploaded, waiting = sync_core.sync_once(url, "secret")
+        print(f"Rejected:   {rejected_pass[0]} uploaded while rejected, {requeued} batch requeued, "
+              f"then {uploaded} uploaded")
+        if rejected_pass != (0, 0) or requeued != 1 or uploaded != 10 or waiting:
+            failures.append("a rejected batch wasn't set aside and sent again after requeueing")
+
+        server.shutdown()
+        server.server_close()
+        store.close()
+        db_core.writer.close()
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("OK")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
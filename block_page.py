@@ -0,0 +1,122 @@
+import hashlib
+import html
+import re
+import time
+import zlib
+from datetime import datetime
+from functools import lru_cache
+
+# --- Block Page Rendering ---
+# The focus server answers every blocked navigation with this page. The template is
+# split into its literal parts once, at import, and rendered pages are cached per
+# (host, session end, minutes left), so a tab reloading a blocked site costs a
+# dictionary lookup. The stylesheet and countdown script are static assets the
+# browser caches for a year.
+
+ASSET_PREFIX = "/__focusblocker/"
+ASSET_MAX_AGE = 365 * 24 * 3600
+RENDER_CACHE_SIZE = 256
+
+QUOTES = (
+    "Discipline is choosing between what you want now and what you want most.",
+    "The secret of getting ahead is getting started.",
+    "Focus on being productive instead of busy.",
+    "Where focus goes, energy flows.",
+    "It's not that I'm so smart, it's just that I stay with problems longer.",
+    "Concentrate all your thoughts upon the work at hand.",
+)
+
+TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>Stay Focused</title>
+<link rel="stylesheet" href="{{css_url}}">
+</head>
+<body>
+<main>
+<h1>{{host}} is blocked</h1>
+<p>You're in Focus Mode. Get back to work!</p>
+<p class="timer" data-end="{{end_ts}}">{{time_left}}</p>
+<p class="quote"><em>“{{quote}}”</em></p>
+</main>
+<script src="{{js_url}}" defer></script>
+</body>
+</html>
+"""
+
+STYLESHEET = """body { margin: 0; font-family: sans-serif; text-align: center; color: #222; background: #f6f6f4; }
+main { padding-top: 50px; }
+h1 { word-break: break-word; }
+.timer { font-size: 1.4em; color: #2e7d32; }
+.quote { color: #555; }
+"""
+
+COUNTDOWN_SCRIPT = """(function () {
+  var timer = document.querySelector(".timer");
+  var end = Number(timer && timer.dataset.end);
+  if (!end) return;
+  function update() {
+    var left = Math.max(0, end - Math.floor(Date.now() / 1000));
+    var minutes = Math.floor(left / 60), seconds = left % 60;
+    timer.textContent = left ? minutes + ":" + String(seconds).padStart(2, "0") + " left in this focus session"
+                             : "Focus session over. Reload the page.";
+    if (left) setTimeout(update, 1000);
+  }
+  update();
+})();
+"""
+
+def _asset(content_type, text):
+    body = text.encode("utf-8")
+    return content_type, body, f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+
+# path -> (content type, body, strong ETag). The ETag is part of the URL, so a
+# changed asset is fetched again despite the long cache lifetime.
+_ASSETS = {
+    "block.css": _asset("text/css; charset=utf-8", STYLESHEET),
+    "countdown.js": _asset("text/javascript; charset=utf-8", COUNTDOWN_SCRIPT),
+}
+STATIC_ASSETS = {f"{ASSET_PREFIX}{name}": asset for name, asset in _ASSETS.items()}
+_ASSET_URLS = {name: f"{ASSET_PREFIX}{name}?v={etag[1:-1]}" for name, (_, _, etag) in _ASSETS.items()}
+
+def compile_template(template):
+    """Splits a template with {{name}} placeholders into (literal parts, names)."""
+    parts = re.split(r"\{\{(\w+)\}\}", template)
+    return tuple(parts[0::2]), tuple(parts[1::2])
+
+_LITERALS, _FIELDS = compile_template(TEMPLATE)
+
+def render_template(values, literals=_LITERALS, fields=_FIELDS):
+    """Fills a compiled template; values are HTML-escaped."""
+    out = [literals[0]]
+    for field, literal in zip(fields, literals[1:]):
+        out.append(html.escape(str(values[field])))
+        out.append(literal)
+    return "".join(out)
+
+def _time_left(end_ts, minutes_left):
+    if end_ts is None:
+        return "Focus Mode is on."
+    ends_at = datetime.fromtimestamp(end_ts).strftime("%H:%M")
+    return f"{minutes_left} min left (until {ends_at})"
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _render(host, end_ts, minutes_left):
+    return render_template({
+        "host": host or "This site",
+        "end_ts": end_ts or "",
+        "time_left": _time_left(end_ts, minutes_left),
+        "quote": QUOTES[zlib.crc32(host.encode("utf-8")) % len(QUOTES)],
+        "css_url": _ASSET_URLS["block.css"],
+        "js_url": _ASSET_URLS["countdown.js"],
+    }).encode("utf-8")
+
+def render_block_page(host, end_ts=None, now=None):
+    """Returns the block page (UTF-8 bytes) for host, counting down to end_ts (epoch seconds)."""
+    minutes_left = None
+    if end_ts is not None:
+        now = time.time() if now is None else now
+        minutes_left = max(0, -int((now - end_ts) // 60)) # Rounded up
+    return _render(host, end_ts, minutes_left)
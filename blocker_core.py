@@ -1,152 +1,522 @@
+import heapq
 import os
+import sys
 import sqlite3
 import threading
-from http.server import BaseHTTPRequestHandler, HTTPServer
-from platformdirs import user_data_dir # Import to get the correct data directory
+import time
+from bisect import bisect_left
+
+import db_core
+import metrics_core
+from db_core import DB_FILE # Same DB file as tracker_core
 
 # --- Configuration ---
 REDIRECT_IP = "127.0.0.1"
 HOSTS_PATH = r"C:\Windows\System32\drivers\etc\hosts" if os.name == "nt" else "/etc/hosts"
 
-# Database path (consistent with time_controller.py)
-APP_NAME = "FocusModeApp" # Make sure this matches your time_controller.py
-APP_AUTHOR = "JoshiAarya" # Make sure this matches your time_controller.py
-DATA_DIR = user_data_dir(appname=APP_NAME, appauthor=APP_AUTHOR)
-os.makedirs(DATA_DIR, exist_ok=True) # Ensure the directory exists
-DB_FILE = os.path.join(DATA_DIR, "focus_data.db") # Same DB file as time_controller
+# Everything FocusBlocker adds to the hosts file sits between these lines, so
+# unblocking removes exactly that section and leaves the user's entries alone.
+SECTION_BEGIN = "# >>> FocusBlocker (managed section, do not edit) >>>"
+SECTION_END = "# <<< FocusBlocker <<<"
+
+# Each blocklist profile (e.g. "Deep work", "Light focus") has its own sites. The
+# default profile holds the blocklist from before profiles existed and can't be deleted.
+DEFAULT_PROFILE_ID = 1
+DEFAULT_PROFILE_NAME = "Default"
+
+PROFILES_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS profiles (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE NOT NULL
+    )
+'''
+
+BLOCKLIST_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS blocklist (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        profile_id INTEGER NOT NULL DEFAULT 1, -- profiles.id
+        site_url TEXT NOT NULL,
+        UNIQUE (profile_id, site_url)
+    )
+'''
+
+# Requests the focus server answered, per blocked domain and focus session. Sessions
+# are identified by their start_ts (the same in active_sessions and sessions); 0
+# collects attempts made while the server ran outside a session.
+DISTRACTION_ATTEMPTS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS distraction_attempts (
+        session_start_ts INTEGER NOT NULL,
+        domain TEXT NOT NULL,
+        attempts INTEGER NOT NULL,
+        last_ts INTEGER NOT NULL,            -- UTC epoch seconds of the latest attempt
+        PRIMARY KEY (session_start_ts, domain)
+    )
+'''
+
+active_profile_id = None # Profile whose section block_sites() last wrote, None while unblocked
 
 # --- Database Functions ---
 
+_initialized_db = None # DB_FILE that init_db() last ran against in this process
+
+def _migrate_blocklist_profiles(cursor):
+    """Moves a blocklist from before profiles (one global list) into the default profile."""
+    cursor.execute("ALTER TABLE blocklist RENAME TO blocklist_global")
+    cursor.execute(BLOCKLIST_TABLE_SQL)
+    cursor.execute("INSERT INTO blocklist (id, profile_id, site_url) SELECT id, ?, site_url FROM blocklist_global",
+                   (DEFAULT_PROFILE_ID,))
+    cursor.execute("DROP TABLE blocklist_global")
+
 def init_db():
-    """Initializes the SQLite database and creates the blocklist table if it doesn't exist."""
-    conn = sqlite3.connect(DB_FILE)
+    """Initializes the SQLite database and creates the blocklist tables if they don't exist."""
+    global _initialized_db
+    conn = db_core.connect()
+    db_core.enable_wal(conn)
     cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS blocklist (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            site_url TEXT UNIQUE NOT NULL
-        )
-    ''')
+    cursor.execute("BEGIN IMMEDIATE") # Keep table creation and the migration atomic
+    cursor.execute(PROFILES_TABLE_SQL)
+    cursor.execute("INSERT OR IGNORE INTO profiles (id, name) VALUES (?, ?)", (DEFAULT_PROFILE_ID, DEFAULT_PROFILE_NAME))
+    cursor.execute("PRAGMA table_info(blocklist)")
+    columns = {row[1] for row in cursor.fetchall()}
+    if columns and "profile_id" not in columns:
+        _migrate_blocklist_profiles(cursor)
+    else:
+        cursor.execute(BLOCKLIST_TABLE_SQL)
+    cursor.execute(DISTRACTION_ATTEMPTS_TABLE_SQL)
     conn.commit()
     conn.close()
+    _initialized_db = db_core.DB_FILE
 
-def add_to_blocklist(site_url):
-    """Adds a site to the blocklist in the database."""
-    init_db()
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
+def ensure_db():
+    """Runs init_db() once per process (and again if the database path changes)."""
+    if _initialized_db != db_core.DB_FILE:
+        init_db()
+
+def _blocklist_changed(profile_id, **change):
+    """Drops the cached lists, re-renders the profile's hosts section and notifies subscribers."""
+    db_core.invalidate_cache("blocklist")
+    render_hosts_section(profile_id)
+    db_core.publish(db_core.BLOCKLIST_CHANGED, profile_id=profile_id, **change)
+
+def add_to_blocklist(site_url, profile_id=DEFAULT_PROFILE_ID):
+    """Adds a site to a profile's blocklist in the database."""
+    ensure_db()
     try:
-        cursor.execute("INSERT INTO blocklist (site_url) VALUES (?)", (site_url,))
-        conn.commit()
-        return True
+        db_core.run_write(lambda cursor: cursor.execute(
+            "INSERT INTO blocklist (profile_id, site_url) VALUES (?, ?)", (profile_id, site_url)))
     except sqlite3.IntegrityError:
         # Site already exists
         return False
-    finally:
-        conn.close()
+    _blocklist_changed(profile_id, added=site_url)
+    return True
 
-def remove_from_blocklist(site_url):
-    """Removes a site from the blocklist in the database."""
-    init_db()
-    conn = sqlite3.connect(DB_FILE)
+def add_sites_to_blocklist(site_urls, profile_id=DEFAULT_PROFILE_ID):
+    """Adds many sites in a single transaction. Returns the sites that weren't blocked yet."""
+    ensure_db()
+    def write(cursor):
+        added = []
+        for site_url in site_urls:
+            cursor.execute("INSERT OR IGNORE INTO blocklist (profile_id, site_url) VALUES (?, ?)",
+                           (profile_id, site_url))
+            if cursor.rowcount:
+                added.append(site_url)
+        return added
+
+    added = db_core.run_write(write)
+    if added:
+        db_core.invalidate_cache("blocklist")
+        render_hosts_section(profile_id)
+        for site_url in added:
+            db_core.publish(db_core.BLOCKLIST_CHANGED, profile_id=profile_id, added=site_url)
+    return added
+
+def remove_from_blocklist(site_url, profile_id=DEFAULT_PROFILE_ID):
+    """Removes a site from a profile's blocklist in the database."""
+    ensure_db()
+    db_core.run_write(lambda cursor: cursor.execute(
+        "DELETE FROM blocklist WHERE profile_id = ? AND site_url = ?", (profile_id, site_url)))
+    _blocklist_changed(profile_id, removed=site_url)
+
+def _load_blocklist(profile_id):
+    conn = db_core.connect()
     cursor = conn.cursor()
-    cursor.execute("DELETE FROM blocklist WHERE site_url = ?", (site_url,))
-    conn.commit()
+    cursor.execute("SELECT site_url FROM blocklist WHERE profile_id = ?", (profile_id,))
+    sites = frozenset(row[0] for row in cursor.fetchall()) # Return as a set for efficient lookup
     conn.close()
+    return sites
+
+def get_blocklist(profile_id=DEFAULT_PROFILE_ID):
+    """Retrieves a profile's blocked sites (as a frozenset), served from the read cache when unchanged."""
+    ensure_db()
+    return db_core.cached_read("blocklist", profile_id, lambda: _load_blocklist(profile_id))
+
+def get_sorted_blocklist(profile_id=DEFAULT_PROFILE_ID):
+    """Returns the blocked sites as a sorted tuple, which doubles as a prefix index for find_sites()."""
+    ensure_db()
+    return db_core.cached_read("blocklist", ("sorted", profile_id),
+                               lambda: tuple(sorted(get_blocklist(profile_id))))
+
+def find_sites(sorted_sites, prefix):
+    """Returns the slice of sorted_sites (a sorted sequence) whose entries start with prefix."""
+    if not prefix:
+        return sorted_sites
+    lo = bisect_left(sorted_sites, prefix)
+    hi = bisect_left(sorted_sites, prefix + "\U0010ffff", lo)
+    return sorted_sites[lo:hi]
 
-def get_blocklist():
-    """Retrieves all blocked sites from the database."""
-    init_db()
-    conn = sqlite3.connect(DB_FILE)
+def _load_all_blocked_sites():
+    conn = db_core.connect()
     cursor = conn.cursor()
-    cursor.execute("SELECT site_url FROM blocklist")
-    sites = {row[0] for row in cursor.fetchall()} # Return as a set for efficient lookup
+    cursor.execute("SELECT DISTINCT site_url FROM blocklist")
+    sites = frozenset(row[0] for row in cursor.fetchall())
     conn.close()
     return sites
 
-# --- Hosts File Manipulation ---
+# --- Profiles ---
+
+def _load_profiles():
+    conn = db_core.connect()
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, name FROM profiles ORDER BY id")
+    profiles = tuple(cursor.fetchall())
+    conn.close()
+    return profiles
+
+def get_profiles():
+    """Returns ((id, name), ...) of all blocklist profiles, the default one first."""
+    ensure_db()
+    return db_core.cached_read("profiles", None, _load_profiles)
+
+def get_profile_id(name):
+    """Returns the id of the profile called name, or None if there is none."""
+    for profile_id, profile_name in get_profiles():
+        if profile_name == name:
+            return profile_id
+    return None
+
+def create_profile(name):
+    """Adds an empty blocklist profile. Returns its id, or None if the name is taken."""
+    ensure_db()
+    try:
+        profile_id = db_core.run_write(lambda cursor: cursor.execute(
+            "INSERT INTO profiles (name) VALUES (?)", (name,)).lastrowid)
+    except sqlite3.IntegrityError:
+        return None
+    db_core.invalidate_cache("profiles")
+    render_hosts_section(profile_id)
+    return profile_id
+
+def delete_profile(profile_id):
+    """Deletes a profile and its blocklist. Sessions and schedules keep the id for history."""
+    if profile_id == DEFAULT_PROFILE_ID:
+        raise ValueError("The default profile can't be deleted.")
+    ensure_db()
+    def write(cursor):
+        cursor.execute("DELETE FROM blocklist WHERE profile_id = ?", (profile_id,))
+        cursor.execute("DELETE FROM profiles WHERE id = ?", (profile_id,))
+    db_core.run_write(write)
+    db_core.invalidate_cache("profiles")
+    db_core.invalidate_cache("blocklist")
+    try:
+        os.remove(_section_path(profile_id))
+    except FileNotFoundError:
+        pass
+
+# --- Distraction Attempts ---
 
-def block_sites():
-    """Blocks sites by modifying the hosts file based on the database blocklist."""
-    blocked_sites = get_blocklist()
-    
-    with open(HOSTS_PATH, "r") as file:
-        lines = file.readlines()
+def record_distraction_attempts(attempts, session_start_ts=None):
+    """
+    Queues attempts ({domain: (count, latest epoch seconds)}) to be added to the counts
+    of the session starting at session_start_ts, all in one transaction. Returns the
+    write's Future.
+    """
+    ensure_db()
+    rows = [(session_start_ts or 0, domain, count, last_ts) for domain, (count, last_ts) in attempts.items()]
+    return db_core.submit_write(lambda cursor: cursor.executemany('''
+        INSERT INTO distraction_attempts (session_start_ts, domain, attempts, last_ts) VALUES (?, ?, ?, ?)
+        ON CONFLICT (session_start_ts, domain)
+        DO UPDATE SET attempts = attempts + excluded.attempts, last_ts = MAX(last_ts, excluded.last_ts)
+    ''', rows))
 
-    # Remove previously added redirects to avoid duplicates
-    lines = [line for line in lines if REDIRECT_IP not in line]
+def get_top_distractions(limit=10, since_ts=None, session_start_ts=None):
+    """
+    Returns [(domain, attempts)] of the most visited blocked domains, optionally only
+    counting sessions that started at or after since_ts, or the one session_start_ts.
+    """
+    ensure_db()
+    conditions, params = [], []
+    if since_ts is not None:
+        conditions.append("session_start_ts >= ?")
+        params.append(since_ts)
+    if session_start_ts is not None:
+        conditions.append("session_start_ts = ?")
+        params.append(session_start_ts)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    conn = db_core.connect()
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT domain, SUM(attempts) AS total FROM distraction_attempts {where}
+        GROUP BY domain ORDER BY total DESC, domain LIMIT ?
+    ''', (*params, limit))
+    top = cursor.fetchall()
+    conn.close()
+    return top
+
+# --- Hosts File Manipulation ---
+# Each profile's section is rendered to a file next to the database whenever its
+# blocklist changes, so block_sites() only reads that file and swaps it into the
+# hosts file, without querying or rendering anything.
+
+def _section_path(profile_id):
+    return os.path.join(os.path.dirname(db_core.DB_FILE), "hosts_sections", f"profile_{profile_id}.hosts")
 
-    new_block_entries = []
-    for site in blocked_sites:
-        new_block_entries.append(f"{REDIRECT_IP} {site}\n")
+def _render_section(sites):
+    lines = [SECTION_BEGIN + "\n"]
+    for site in sorted(sites):
+        lines.append(f"{REDIRECT_IP} {site}\n")
         # Optionally block www. subdomain as well
         if not site.startswith("www."):
-            new_block_entries.append(f"{REDIRECT_IP} www.{site}\n")
+            lines.append(f"{REDIRECT_IP} www.{site}\n")
+    lines.append(SECTION_END + "\n")
+    return "".join(lines)
+
+def _replace_file(path, text, keep_metadata=False):
+    """
+    Writes text to path through a temporary file and an atomic rename. With keep_metadata
+    the new file gets the mode and owner of the one it replaces.
+    """
+    temp_path = path + ".focusblocker.tmp"
+    with open(temp_path, "w") as file:
+        file.write(text)
+    try:
+        if keep_metadata:
+            _copy_metadata(path, temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+def _copy_metadata(source, target):
+    # The temporary file is created under the umask (e.g. 0600 with umask 077); a hosts
+    # file that only its owner can read stops blocking for the user's browsers
+    info = os.stat(source)
+    os.chmod(target, info.st_mode & 0o7777)
+    if hasattr(os, "chown"):
+        try:
+            os.chown(target, info.st_uid, info.st_gid)
+        except PermissionError:
+            # Not a PermissionError, so _write_hosts() falls back to writing in place
+            raise OSError(f"Can't keep the owner of {source}") from None
+
+def render_hosts_section(profile_id=DEFAULT_PROFILE_ID):
+    """Renders the profile's hosts section to its cache file and returns it."""
+    section = _render_section(get_blocklist(profile_id))
+    path = _section_path(profile_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    _replace_file(path, section)
+    return section
+
+def _load_hosts_section(profile_id):
+    try:
+        with open(_section_path(profile_id), "r") as file:
+            return file.read()
+    except FileNotFoundError:
+        return render_hosts_section(profile_id) # First use of the profile since an upgrade
+
+def _read_hosts():
+    with metrics_core.timed("hosts_io_seconds", op="read"):
+        with open(HOSTS_PATH, "r") as file:
+            text = file.read()
+            if metrics_core.ENABLED:
+                metrics_core.increment("hosts_io_bytes_total", os.fstat(file.fileno()).st_size, op="read") # Bytes, not characters
+    return text
+
+def _write_hosts(text):
+    with metrics_core.timed("hosts_io_seconds", op="write"):
+        try:
+            # Browsers and resolvers never see a half-written file
+            _replace_file(HOSTS_PATH, text, keep_metadata=True)
+        except PermissionError:
+            raise # Not running as administrator/root
+        except OSError:
+            # Hosts files that can't be renamed over (e.g. bind-mounted in a container)
+            # or whose owner can't be kept are rewritten in place instead
+            with open(HOSTS_PATH, "w") as file:
+                file.write(text)
+    if metrics_core.ENABLED:
+        metrics_core.increment("hosts_io_bytes_total", os.path.getsize(HOSTS_PATH), op="write") # Bytes, not characters
+
+def _strip_managed_section(text):
+    """Returns the hosts file text without FocusBlocker's section, found by plain string search."""
+    begin = text.find(SECTION_BEGIN)
+    while begin != -1:
+        end = text.find(SECTION_END, begin)
+        end = len(text) if end == -1 else text.find("\n", end) + 1 or len(text)
+        text = text[:begin] + text[end:]
+        begin = text.find(SECTION_BEGIN)
+    return text
+
+def _legacy_redirects(text):
+    """
+    Returns the lines redirecting blocked sites that versions without the managed
+    section wrote. Only the few lines outside the section are looked at, and the
+    database only if one of them could be such a redirect.
+    """
+    candidates = []
+    for line in text.splitlines(keepends=True):
+        parts = line.split()
+        if len(parts) == 2 and parts[0] == REDIRECT_IP and parts[1] != "localhost":
+            candidates.append((line, parts[1]))
+    if not candidates:
+        return []
+    blocked_sites = _load_all_blocked_sites()
+    return [line for line, host in candidates
+            if host in blocked_sites or host.removeprefix("www.") in blocked_sites]
+
+def _write_section(section):
+    text = _strip_managed_section(_read_hosts())
+    if text and not text.endswith("\n"):
+        text += "\n"
+    _write_hosts(text + section)
+
+def block_sites(profile_id=DEFAULT_PROFILE_ID):
+    """
+    Blocks the profile's sites by swapping its pre-rendered section into the hosts file
+    (replacing the section of any profile that is blocked already). Ends all allowances.
+    """
+    global active_profile_id
+    with _hosts_lock:
+        _write_section(_load_hosts_section(profile_id))
+        active_profile_id = profile_id
+        _allowances.clear()
 
-    with open(HOSTS_PATH, "w") as file:
-        file.writelines(lines) # Write original lines back
-        file.writelines(new_block_entries) # Append new block entries
+def is_blocking():
+    """Returns True if the hosts file still redirects blocked sites, e.g. after a crash."""
+    text = _read_hosts()
+    return SECTION_BEGIN in text or bool(_legacy_redirects(text))
 
 def unblock_all():
-    """Removes all custom redirects from the hosts file."""
-    with open(HOSTS_PATH, "r") as file:
-        lines = file.readlines()
+    """Removes FocusBlocker's section from the hosts file, leaving every other entry as it was."""
+    global active_profile_id
+    with _hosts_lock:
+        original = _read_hosts()
+        text = _strip_managed_section(original)
+        legacy = set(_legacy_redirects(text))
+        if legacy:
+            text = "".join(line for line in text.splitlines(keepends=True) if line not in legacy)
+        if text != original:
+            _write_hosts(text)
+        active_profile_id = None
+        _allowances.clear()
 
-    # Keep only lines that do NOT contain our redirect IP
-    lines = [line for line in lines if REDIRECT_IP not in line]
+# --- Temporary Allowances ---
+# allow_site() lifts the block of one site for a while by rewriting the managed section
+# without its entries. A single thread sleeps until the earliest expiry in a heap and
+# re-blocks; allowances ending within ALLOWANCE_COALESCE_SECONDS of it are re-blocked by
+# the same hosts file write (a little early rather than in several writes).
 
-    with open(HOSTS_PATH, "w") as file:
-        file.writelines(lines)
+ALLOWANCE_COALESCE_SECONDS = 5
+MAX_ALLOWANCE_MINUTES = 60
 
-# --- Local HTTP Server for Blocked Sites ---
+_hosts_lock = threading.RLock() # Serializes hosts file rewrites with the expiry thread
+_allowances = {}  # site -> monotonic expiry time
+_expiry_heap = [] # (monotonic expiry time, site); entries replaced in _allowances are skipped
+_expiry_wakeup = threading.Condition(_hosts_lock)
+_expiry_thread = None
 
-server_thread = None
-httpd = None
-
-class FocusHandler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        self.send_response(200)
-        self.send_header('Content-type','text/html')
-        self.end_headers()
-        self.wfile.write(bytes("""
-            <html>
-            <head><title>Stay Focused</title></head>
-            <body style="text-align:center; font-family:sans-serif; padding-top:50px;">
-                <h1>This site is blocked!</h1>
-                <p>You're in Focus Mode. Get back to work!</p>
-                <p><em>“Discipline is choosing between what you want now and what you want most.”</em></p>
-            </body>
-            </html>
-        """, "utf-8"))
-
-def run_focus_server():
-    global httpd
-    try:
-        # Use 'localhost' explicitly, or '' to bind to all available interfaces
-        server_address = ('', 80)
-        httpd = HTTPServer(server_address, FocusHandler)
-        print("⚡ Focus server running on http://127.0.0.1:80")
-        httpd.serve_forever()
-    except PermissionError:
-        print("❌ Admin rights required to run server on port 80.")
-    except Exception as e:
-        print(f"An error occurred in focus server: {e}")
+def _allowed_site(site):
+    return site.strip().lower().removeprefix("www.")
 
-def start_focus_server():
-    global server_thread
-    if server_thread and server_thread.is_alive():
-        print("Focus server already running.")
-        return
-    server_thread = threading.Thread(target=run_focus_server, daemon=True)
-    server_thread.start()
+def _section_with_allowances(profile_id):
+    section = _load_hosts_section(profile_id)
+    for site in _allowances:
+        for host in (site, f"www.{site}"):
+            section = section.replace(f"\n{REDIRECT_IP} {host}\n", "\n")
+    return section
+
+def allow_site(site, minutes):
+    """
+    Unblocks site (and its www. form) for minutes while Focus Mode stays on. The site must
+    be on the active profile's blocklist. Allowing a site again replaces its expiry.
+    Returns the expiry as epoch seconds.
+    """
+    global _expiry_thread
+    if not 0 < minutes <= MAX_ALLOWANCE_MINUTES:
+        raise ValueError(f"Allowances last more than 0 and at most {MAX_ALLOWANCE_MINUTES} minutes.")
+    site = _allowed_site(site)
+    with _hosts_lock:
+        if active_profile_id is None:
+            raise RuntimeError("Focus Mode is not on.")
+        if site not in {_allowed_site(blocked) for blocked in get_blocklist(active_profile_id)}:
+            raise ValueError(f"{site} isn't on the blocklist of the running session.")
+        expires = time.monotonic() + minutes * 60
+        _allowances[site] = expires
+        heapq.heappush(_expiry_heap, (expires, site))
+        _write_section(_section_with_allowances(active_profile_id))
+        if _expiry_thread is None:
+            _expiry_thread = threading.Thread(target=_expire_allowances, name="allowance-expiry", daemon=True)
+            _expiry_thread.start()
+        _expiry_wakeup.notify()
+    return time.time() + minutes * 60
+
+def revoke_allowance(site):
+    """Blocks an allowed site again right away. Returns False if it wasn't allowed."""
+    site = _allowed_site(site)
+    with _hosts_lock:
+        if _allowances.pop(site, None) is None:
+            return False
+        if active_profile_id is not None:
+            _write_section(_section_with_allowances(active_profile_id))
+        return True
+
+def get_allowances():
+    """Returns {site: seconds left} of the current allowances."""
+    now = time.monotonic()
+    with _hosts_lock:
+        return {site: max(0, round(expires - now)) for site, expires in _allowances.items()}
+
+def _expire_allowances():
+    with _hosts_lock:
+        while True:
+            # Skip entries whose allowance was revoked, replaced or cleared
+            while _expiry_heap and _allowances.get(_expiry_heap[0][1]) != _expiry_heap[0][0]:
+                heapq.heappop(_expiry_heap)
+            if not _expiry_heap:
+                _expiry_wakeup.wait()
+                continue
+            now = time.monotonic()
+            if _expiry_heap[0][0] > now:
+                _expiry_wakeup.wait(_expiry_heap[0][0] - now)
+                continue
+
+            horizon = now + ALLOWANCE_COALESCE_SECONDS
+            while _expiry_heap and _expiry_heap[0][0] <= horizon:
+                expires, site = heapq.heappop(_expiry_heap)
+                if _allowances.get(site) == expires:
+                    del _allowances[site]
+            if active_profile_id is not None:
+                try:
+                    _write_section(_section_with_allowances(active_profile_id))
+                except OSError as e:
+                    print(f"Error re-blocking allowed sites: {e}")
+
+# --- Local HTTP Server for Blocked Sites ---
+# The server lives in focus_server.py and is only imported once it is started, so
+# http.server stays out of the startup time of the GUI and the CLI.
+
+def start_focus_server(port=None, session_start_ts=None, session_end_ts=None):
+    import focus_server
+    focus_server.start_focus_server(port, session_start_ts, session_end_ts)
 
 def stop_focus_server():
-    global httpd
-    if httpd:
-        httpd.shutdown()
-        print("🛑 Focus server stopped.")
-    else:
+    focus_server = sys.modules.get("focus_server")
+    if focus_server is None:
         print("Focus server not running.")
+        return
+    focus_server.stop_focus_server()
 
 # --- Example Usage (for testing) ---
 if __name__ == "__main__":
@@ -184,7 +554,6 @@ if __name__ == "__main__":
     print("\n--- Starting Focus Server ---")
     start_focus_server()
     # Let the server run for a bit if you're testing manually
-    import time
     # time.sleep(5) # Uncomment for manual testing to see server start
 
     print("\n--- Removing a site from blocklist ---")
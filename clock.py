@@ -0,0 +1,81 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+# --- Clock ---
+# tracker_core and timer_logic read the time and sleep through the current clock
+# instead of calling datetime.now()/time.sleep() directly. The app always uses the
+# system clock; tests and simulations install a SimulatedClock with set_clock() and
+# run through days of timers, streaks and schedules without waiting for them.
+
+class SystemClock:
+    """The real wall clock."""
+
+    def now(self):
+        """Returns the current local time as a naive datetime."""
+        return datetime.now()
+
+    def time(self):
+        """Returns the current time as epoch seconds."""
+        return time.time()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+class SimulatedClock:
+    """
+    A clock that only moves when advanced. sleep() advances it instead of waiting, so a
+    FocusTimer driven by it runs a 60-minute session as fast as its callbacks allow.
+    """
+
+    def __init__(self, start=None):
+        # start is a naive local datetime (or epoch seconds); the real time by default
+        if start is None:
+            start = time.time()
+        elif isinstance(start, datetime):
+            start = start.timestamp()
+        self._ts = float(start)
+        self._lock = threading.Lock()
+
+    def now(self):
+        return datetime.fromtimestamp(self.time())
+
+    def time(self):
+        with self._lock:
+            return self._ts
+
+    def sleep(self, seconds):
+        self.advance(seconds)
+
+    def advance(self, seconds=0, **delta):
+        """Moves the clock forward by seconds (or a timedelta, or timedelta keywords such as days=1)."""
+        if isinstance(seconds, timedelta):
+            seconds = seconds.total_seconds()
+        seconds += timedelta(**delta).total_seconds()
+        if seconds < 0:
+            raise ValueError("A clock can't be moved backwards.")
+        with self._lock:
+            self._ts += seconds
+
+    def set_time(self, moment):
+        """Moves the clock to a naive local datetime (or epoch seconds)."""
+        with self._lock:
+            self._ts = float(moment.timestamp() if isinstance(moment, datetime) else moment)
+
+_clock = SystemClock()
+
+def get_clock():
+    return _clock
+
+def set_clock(new_clock):
+    """Installs new_clock (None restores the system clock) and returns the previous one."""
+    global _clock
+    previous, _clock = _clock, new_clock if new_clock is not None else SystemClock()
+    return previous
+
+def now():
+    """Returns the current local time of the current clock as a naive datetime."""
+    return _clock.now()
+
+def sleep(seconds):
+    _clock.sleep(seconds)
@@ -0,0 +1,175 @@
+"""
+Reference collector for FocusBlocker's session sync (see sync_core).
+
+Accepts the gzip-compressed batches machines POST to /ingest and stores the sessions
+in its own SQLite database, keyed by (machine id, session id) so retried batches are
+ignored. GET /summary returns per-machine totals as JSON.
+
+Usage:
+    python collector.py --port 8765 --db collector.db [--token SECRET]
+
+Point the machines at it with FOCUSBLOCKER_SYNC_URL=http://HOST:8765/ingest (and
+FOCUSBLOCKER_SYNC_TOKEN=SECRET if --token is set).
+"""
+import argparse
+import gzip
+import hmac
+import io
+import json
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MAX_BODY_BYTES = 16 * 1024 * 1024        # Compressed
+MAX_DECOMPRESSED_BYTES = 64 * 1024 * 1024
+REQUEST_TIMEOUT = 30
+
+COLLECTOR_TABLES_SQL = '''
+    CREATE TABLE IF NOT EXISTS machines (
+        machine_id TEXT PRIMARY KEY,
+        hostname TEXT,
+        last_seen_ts INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS sessions (
+        machine_id TEXT NOT NULL,
+        session_id INTEGER NOT NULL,         -- The id on the sending machine
+        start_ts INTEGER NOT NULL,
+        end_ts INTEGER NOT NULL,
+        tz_offset INTEGER NOT NULL,
+        duration_minutes REAL NOT NULL,
+        profile_id INTEGER,
+        PRIMARY KEY (machine_id, session_id)
+    ) WITHOUT ROWID;
+'''
+SESSION_COLUMNS = ("id", "start_ts", "end_ts", "tz_offset", "duration_minutes", "profile_id")
+
+class CollectorStore:
+    """The collector's database; one connection shared by the request threads under a lock."""
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript(COLLECTOR_TABLES_SQL)
+        self._lock = threading.Lock()
+
+    def ingest(self, batch):
+        """Stores one batch in a single transaction. Returns the number of sessions not seen before."""
+        machine_id = str(batch["machine_id"])
+        indexes = [batch["columns"].index(column) for column in SESSION_COLUMNS]
+        rows = [[machine_id] + [session[i] for i in indexes] for session in batch["sessions"]]
+        with self._lock, self._conn:
+            self._conn.execute('''
+                INSERT INTO machines (machine_id, hostname, last_seen_ts) VALUES (?, ?, ?)
+                ON CONFLICT(machine_id) DO UPDATE SET hostname = excluded.hostname, last_seen_ts = excluded.last_seen_ts
+            ''', (machine_id, batch.get("hostname"), int(time.time())))
+            before = self._conn.total_changes
+            self._conn.executemany('''
+                INSERT OR IGNORE INTO sessions
+                    (machine_id, session_id, start_ts, end_ts, tz_offset, duration_minutes, profile_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            return self._conn.total_changes - before
+
+    def summary(self):
+        with self._lock:
+            rows = self._conn.execute('''
+                SELECT m.machine_id, m.hostname, m.last_seen_ts, COUNT(s.session_id), COALESCE(SUM(s.duration_minutes), 0)
+                FROM machines m LEFT JOIN sessions s ON s.machine_id = m.machine_id
+                GROUP BY m.machine_id ORDER BY m.machine_id
+            ''').fetchall()
+        return {"machines": [{"machine_id": machine_id, "hostname": hostname, "last_seen_ts": last_seen_ts,
+                              "sessions": sessions, "total_minutes": total_minutes}
+                             for machine_id, hostname, last_seen_ts, sessions, total_minutes in rows]}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class CollectorHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    timeout = REQUEST_TIMEOUT
+
+    def do_POST(self):
+        if self.path != "/ingest":
+            self._send_json(404, {"error": "Unknown endpoint."})
+            return
+        if not self._authorized():
+            self._send_json(401, {"error": "Missing or wrong token."})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if not 0 < length <= MAX_BODY_BYTES:
+            self._send_json(413, {"error": "Empty or too large batch."})
+            return
+        body = self.rfile.read(length)
+        try:
+            if self.headers.get("Content-Encoding", "").lower() == "gzip":
+                body = gzip.GzipFile(fileobj=io.BytesIO(body)).read(MAX_DECOMPRESSED_BYTES + 1)
+                if len(body) > MAX_DECOMPRESSED_BYTES:
+                    raise ValueError("Batch too large once decompressed.")
+            accepted = self.server.store.ingest(json.loads(body))
+        except (OSError, EOFError, zlib.error, ValueError, KeyError, TypeError, IndexError,
+                sqlite3.IntegrityError) as e:
+            self._send_json(400, {"error": f"Malformed batch: {e}"})
+            return
+        self._send_json(200, {"accepted": accepted})
+
+    def do_GET(self):
+        if self.path != "/summary":
+            self._send_json(404, {"error": "Unknown endpoint."})
+            return
+        if not self._authorized():
+            self._send_json(401, {"error": "Missing or wrong token."})
+            return
+        self._send_json(200, self.server.store.summary())
+
+    def _authorized(self):
+        token = self.server.token
+        if not token:
+            return True
+        return hmac.compare_digest(self.headers.get("Authorization", ""), f"Bearer {token}")
+
+    def _send_json(self, status, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class CollectorServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, store, token=None):
+        super().__init__(address, CollectorHandler)
+        self.store = store
+        self.token = token
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--db", default="collector.db", help="Where the collected sessions are stored")
+    parser.add_argument("--token", help="Require 'Authorization: Bearer TOKEN' on every request")
+    args = parser.parse_args()
+
+    store = CollectorStore(args.db)
+    server = CollectorServer((args.host, args.port), store, args.token)
+    print(f"Collecting sessions on http://{args.host}:{server.server_address[1]}/ingest into {args.db}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        store.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,313 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+import atexit
+from concurrent.futures import Future
+from platformdirs import user_data_dir
+
+# --- Configuration ---
+# blocker_core and tracker_core share one database file in the platform-specific data directory.
+APP_NAME = "FocusModeApp"
+APP_AUTHOR = "JoshiAarya"
+DATA_DIR = user_data_dir(appname=APP_NAME, appauthor=APP_AUTHOR)
+DB_FILE = os.path.join(DATA_DIR, "focus_data.db")
+
+BUSY_TIMEOUT_MS = 5000 # How long a connection waits on a locked database before failing
+FLUSH_INTERVAL = 0.01 # Seconds the writer waits to group more writes into the same transaction
+MAX_BATCH_SIZE = 500
+
+# --- Connections ---
+
+def ensure_data_dir():
+    """Creates the directory holding DB_FILE on first use (kept out of import time)."""
+    os.makedirs(os.path.dirname(DB_FILE), exist_ok=True)
+
+def connect():
+    """Opens a connection to the shared database with the app's pragmas applied."""
+    ensure_data_dir()
+    conn = sqlite3.connect(DB_FILE, timeout=BUSY_TIMEOUT_MS / 1000)
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    # In WAL mode NORMAL only syncs at checkpoints: a committed transaction survives an
+    # app crash, and the database stays consistent even after a power loss.
+    conn.execute("PRAGMA synchronous = NORMAL")
+    return conn
+
+def enable_wal(conn):
+    """
+    Switches the database to write-ahead logging so readers and the writer don't block
+    each other. The mode is stored in the file, so this only does work once.
+    Must be called outside a transaction.
+    """
+    mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    if mode.lower() != "wal":
+        conn.execute("PRAGMA journal_mode = WAL")
+
+def remove_database():
+    """Deletes the database file together with its WAL and shared-memory files."""
+    for path in (DB_FILE, DB_FILE + "-wal", DB_FILE + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+
+# --- Single-Writer Queue ---
+
+class DBWriter:
+    """
+    Owns all writes to the database on one background thread.
+
+    Callers queue a work function, which is called as work(cursor, *args) on the
+    writer thread. Work queued within FLUSH_INTERVAL of each other is committed in
+    a single transaction; each item runs in its own savepoint, so one failing item
+    doesn't undo the others. Futures are only resolved after the commit.
+    """
+    def __init__(self, flush_interval=FLUSH_INTERVAL, max_batch_size=MAX_BATCH_SIZE):
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, work, *args):
+        """Queues work(cursor, *args) and returns a Future for its result."""
+        future = Future()
+        self._ensure_started()
+        self._queue.put((work, args, future))
+        return future
+
+    def run(self, work, *args):
+        """Queues work(cursor, *args) and waits until it has been committed."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("Work running on the writer thread can't wait for other writes.")
+        return self.submit(work, *args).result()
+
+    def flush(self):
+        """Waits until everything queued so far has been committed."""
+        if self._thread is not None:
+            self.run(lambda cursor: None)
+
+    def close(self):
+        """Commits outstanding work and stops the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def _next_batch(self):
+        """Blocks for the first item, then collects more until the flush interval passes."""
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None) # Finish this batch first, then stop
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._commit_batch(batch)
+
+    def _commit_batch(self, batch):
+        outcomes = []
+        conn = None
+        try:
+            # A fresh connection per batch follows DB_FILE if it changes and holds no
+            # read snapshot between flushes.
+            conn = connect()
+            conn.isolation_level = None # Transactions are managed explicitly below
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            for work, args, future in batch:
+                cursor.execute("SAVEPOINT queued_write")
+                try:
+                    outcomes.append((future, work(cursor, *args), None))
+                    cursor.execute("RELEASE queued_write")
+                except Exception as e:
+                    cursor.execute("ROLLBACK TO queued_write")
+                    cursor.execute("RELEASE queued_write")
+                    outcomes.append((future, None, e))
+            cursor.execute("COMMIT")
+        except Exception as e:
+            if conn is not None and conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            if conn is not None:
+                conn.close()
+
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+# --- Read-Through Cache ---
+
+class ReadCache:
+    """
+    Process-wide cache for query results that change rarely (blocklist, streaks).
+
+    Entries are grouped by namespace. Writers in this process drop their namespace
+    through invalidate() once a write has committed. Before every lookup the cache
+    also checks PRAGMA data_version on its own connection, which changes whenever
+    any other connection (the writer thread or another process) commits, and
+    drops everything if it did.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._generation = 0
+        self._conn = None
+        self._conn_path = None
+        self._data_version = None
+
+    def get(self, namespace, key, loader):
+        """Returns the cached value for (namespace, key), calling loader() on a miss."""
+        with self._lock:
+            self._check_data_version()
+            entries = self._entries.get(namespace)
+            if entries is not None and key in entries:
+                return entries[key]
+            generation = self._generation
+
+        value = loader() # Runs unlocked so slow queries don't block other readers
+
+        with self._lock:
+            # Don't store a result that an invalidation may have overtaken while it loaded
+            if generation == self._generation:
+                self._entries.setdefault(namespace, {})[key] = value
+        return value
+
+    def invalidate(self, namespace=None):
+        """Drops one namespace, or everything if namespace is None."""
+        with self._lock:
+            self._generation += 1
+            if namespace is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(namespace, None)
+
+    def _check_data_version(self):
+        if self._conn is None or self._conn_path != DB_FILE:
+            if self._conn is not None:
+                self._conn.close()
+            self._conn = _connect_cache()
+            self._conn_path = DB_FILE
+            self._data_version = None
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._data_version = version
+            self._generation += 1
+            self._entries.clear()
+
+def _connect_cache():
+    """Opens the long-lived connection the read cache uses to poll data_version."""
+    ensure_data_dir()
+    conn = sqlite3.connect(DB_FILE, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    return conn
+
+# --- Change Notifications ---
+# Data-layer functions publish an event after their write has committed, with keyword
+# arguments naming the affected keys, so views can apply deltas instead of reloading.
+# Subscribers only hear events of their own process; publish() also bumps the event's
+# row in change_versions, so other processes can tell from change_versions() that
+# something they show has changed (e.g. the GUI after `focusblocker blocklist add`).
+
+SESSION_RECORDED = "session_recorded"     # session_id, session_date, duration_minutes
+STREAK_UPDATED = "streak_updated"         # current_streak, longest_streak
+SCHEDULE_ADDED = "schedule_added"         # schedule_id, scheduled_date
+SCHEDULE_UPDATED = "schedule_updated"     # schedule_id, scheduled_date, status
+SCHEDULE_DELETED = "schedule_deleted"     # schedule_id, scheduled_date
+BLOCKLIST_CHANGED = "blocklist_changed"   # added or removed (a site URL)
+
+CHANGE_VERSIONS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS change_versions (
+        event TEXT PRIMARY KEY,
+        version INTEGER NOT NULL
+    )
+'''
+
+_subscribers = {}
+_subscribers_lock = threading.Lock()
+
+def subscribe(event, callback):
+    """Calls callback(**changes) on the publishing thread whenever event is published."""
+    with _subscribers_lock:
+        _subscribers.setdefault(event, []).append(callback)
+
+def unsubscribe(event, callback):
+    with _subscribers_lock:
+        callbacks = _subscribers.get(event, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+def publish(event, **changes):
+    """Notifies the subscribers of event. A failing subscriber doesn't affect the others."""
+    writer.submit(_bump_change_version, event) # Not waited for; publishers may run on the writer thread
+    with _subscribers_lock:
+        callbacks = list(_subscribers.get(event, ()))
+    for callback in callbacks:
+        try:
+            callback(**changes)
+        except Exception as e:
+            print(f"Error in {event} subscriber: {e}")
+
+def _bump_change_version(cursor, event):
+    cursor.execute(CHANGE_VERSIONS_TABLE_SQL)
+    cursor.execute('''
+        INSERT INTO change_versions (event, version) VALUES (?, 1)
+        ON CONFLICT(event) DO UPDATE SET version = version + 1
+    ''', (event,))
+
+def change_versions():
+    """Returns {event: number of times it was published, by any process}."""
+    conn = connect()
+    try:
+        return dict(conn.execute("SELECT event, version FROM change_versions"))
+    except sqlite3.OperationalError:
+        return {} # Nothing published yet
+    finally:
+        conn.close()
+
+writer = DBWriter()
+atexit.register(writer.close)
+cache = ReadCache()
+
+def submit_write(work, *args):
+    """Queues work(cursor, *args) on the shared writer without waiting for it."""
+    return writer.submit(work, *args)
+
+def run_write(work, *args):
+    """Runs work(cursor, *args) on the shared writer and returns its result once committed."""
+    return writer.run(work, *args)
+
+def cached_read(namespace, key, loader):
+    """Returns loader()'s result through the shared read cache."""
+    return cache.get(namespace, key, loader)
+
+def invalidate_cache(namespace=None):
+    """Drops cached reads for namespace (or all of them) after a write."""
+    cache.invalidate(namespace)
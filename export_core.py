@@ -0,0 +1,249 @@
+import contextlib
+import csv
+import gzip
+import json
+import sqlite3
+import sys
+import time
+from itertools import chain
+from typing import NamedTuple
+
+import db_core
+import tracker_core as tc
+
+# --- Export and Import of the History ---
+# Tables are streamed row by row in CSV (with a header) or JSON Lines, optionally
+# gzip-compressed, so memory use doesn't grow with the history. Imports are written
+# in batches of IMPORT_BATCH_SIZE rows, one executemany per transaction on the shared
+# writer, and the streak is recalculated once at the end.
+
+FORMATS = ("csv", "jsonl")
+IMPORT_BATCH_SIZE = 5000
+GZIP_LEVEL = 6 # Level 9 is several times slower for a few percent smaller files
+
+# table -> (columns read on import, columns a file must have, columns identifying a row
+# that is already stored). Row ids aren't imported; rows get new ids here.
+TABLES = {
+    "sessions": (("start_ts", "end_ts", "tz_offset", "duration_minutes", "profile_id"),
+                 ("start_ts", "end_ts", "tz_offset", "duration_minutes"),
+                 ("start_ts", "end_ts")),
+    "daily_sessions": (("session_date", "session_count", "total_minutes"),
+                       ("session_date", "session_count", "total_minutes"),
+                       ("session_date",)),
+    "scheduled_focus_sessions": (("scheduled_ts", "tz_offset", "duration_minutes", "status", "notification_sent",
+                                  "notes", "created_ts", "profile_id"),
+                                 ("scheduled_ts", "tz_offset", "duration_minutes", "created_ts"),
+                                 ("scheduled_ts", "duration_minutes")),
+}
+TEXT_COLUMNS = {"session_date", "status", "notes"} # Kept as "" in CSV files; empty cells of other columns are NULL
+
+class TransferStats(NamedTuple):
+    """The outcome of an export or import."""
+    rows: int    # Rows read
+    written: int # Rows written (an import skips rows that are already stored)
+    seconds: float
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+class ImportAborted(Exception):
+    """An import stopped by a bad row or a failed write; stats counts what was written before it."""
+
+    def __init__(self, message, stats):
+        super().__init__(message)
+        self.stats = stats
+
+def detect_format(path, fmt=None, compress=None):
+    """
+    Returns (format, compressed) for path, from its extension ('.csv', '.jsonl', optionally
+    '.gz') unless given. The format of '-' (stdin/stdout) must be given.
+    """
+    if path == "-":
+        if fmt is None:
+            raise ValueError("Give the format when reading from stdin or writing to stdout.")
+        compress = bool(compress)
+    name = path.lower()
+    if compress is None:
+        compress = name.endswith(".gz")
+    name = name.removesuffix(".gz")
+    if fmt is None:
+        if name.endswith(".csv"):
+            fmt = "csv"
+        elif name.endswith((".jsonl", ".ndjson")):
+            fmt = "jsonl"
+        else:
+            raise ValueError(f"Can't tell the format of '{path}'; name it .csv or .jsonl or give the format.")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}' (expected one of {', '.join(FORMATS)}).")
+    return fmt, compress
+
+def _open(path, mode, compress):
+    """Opens path ('-' for stdin/stdout) as text for reading ('r') or writing ('w')."""
+    if path == "-":
+        stream = sys.stdin if mode == "r" else sys.stdout
+        if compress:
+            return gzip.open(stream.buffer, mode + "t", compresslevel=GZIP_LEVEL, encoding="utf-8", newline="")
+        return contextlib.nullcontext(stream)
+    if compress:
+        return gzip.open(path, mode + "t", compresslevel=GZIP_LEVEL, encoding="utf-8", newline="")
+    return open(path, mode, encoding="utf-8", newline="")
+
+def _check_table(table):
+    if table not in TABLES:
+        raise ValueError(f"Unknown table '{table}' (expected one of {', '.join(TABLES)}).")
+
+# --- Export ---
+
+def export_table(table, path, fmt=None, compress=None):
+    """Streams every row of table to path ('-' for stdout). Returns TransferStats."""
+    _check_table(table)
+    fmt, compress = detect_format(path, fmt, compress)
+    tc.ensure_db()
+    started = time.perf_counter()
+    count = 0
+    conn = db_core.connect()
+    try:
+        cursor = conn.execute(f"SELECT * FROM {table} ORDER BY rowid")
+        columns = [description[0] for description in cursor.description]
+        with _open(path, "w", compress) as file:
+            if fmt == "csv":
+                out = csv.writer(file)
+                out.writerow(columns)
+                for row in cursor: # The cursor fetches in chunks, so the table is never loaded whole
+                    out.writerow(row)
+                    count += 1
+            else:
+                for row in cursor:
+                    file.write(json.dumps(dict(zip(columns, row))) + "\n")
+                    count += 1
+    finally:
+        conn.close()
+    return TransferStats(count, count, time.perf_counter() - started)
+
+# --- Import ---
+
+def _read_records(file, fmt):
+    """Yields each row of an export file as a {column: value} dict."""
+    if fmt == "jsonl":
+        for number, line in enumerate(file, 1):
+            if line.strip():
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError(f"line {number} is not a JSON object")
+                yield record
+        return
+    for record in csv.DictReader(file):
+        yield {column: (None if value == "" and column not in TEXT_COLUMNS else value)
+               for column, value in record.items()}
+
+def _insert_sql(table, columns, key_columns):
+    column_list = ", ".join(columns)
+    placeholders = ", ".join("?" * len(columns))
+    if table == "daily_sessions":
+        # A day in the file and in the database is usually the same day exported earlier;
+        # keeping the larger totals makes importing a backup twice harmless
+        return f'''
+            INSERT INTO daily_sessions ({column_list}) VALUES ({placeholders})
+            ON CONFLICT(session_date) DO UPDATE SET
+                session_count = MAX(session_count, excluded.session_count),
+                total_minutes = MAX(total_minutes, excluded.total_minutes)
+            WHERE excluded.session_count > session_count OR excluded.total_minutes > total_minutes
+        '''
+    match = " AND ".join(f"{column} = ?" for column in key_columns)
+    return f'''
+        INSERT INTO {table} ({column_list}) SELECT {placeholders}
+        WHERE NOT EXISTS (SELECT 1 FROM {table} WHERE {match})
+    '''
+
+def _write_batch(cursor, table, sql, rows):
+    """Inserts one batch; new sessions are added to the rollups in the same transaction."""
+    if table == "sessions":
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM sessions")
+        last_id = cursor.fetchone()[0]
+    cursor.executemany(sql, rows)
+    written = cursor.rowcount
+    if table == "sessions" and written:
+        tc._add_sessions_to_rollups(cursor, last_id)
+    return written
+
+def _rebuild_coarse_rollups(cursor):
+    """Recomputes the weekly and monthly rollups from daily_sessions (after days were imported)."""
+    cursor.execute("DELETE FROM weekly_rollups")
+    cursor.execute('''
+        INSERT INTO weekly_rollups (week_start, session_count, total_minutes)
+        SELECT date(session_date, 'weekday 0', '-6 days'), SUM(session_count), SUM(total_minutes)
+        FROM daily_sessions GROUP BY 1
+    ''')
+    cursor.execute("DELETE FROM monthly_rollups")
+    cursor.execute('''
+        INSERT INTO monthly_rollups (month, session_count, total_minutes)
+        SELECT strftime('%Y-%m', session_date), SUM(session_count), SUM(total_minutes)
+        FROM daily_sessions GROUP BY 1
+    ''')
+
+def import_table(table, path, fmt=None, compress=None, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Streams rows from an export file (path, '-' for stdin) into table. Rows that are
+    already stored are skipped, so importing the same file twice adds nothing. Import
+    sessions before daily_sessions: imported sessions are added to the rollups, while
+    imported days only fill in what the sessions don't cover (e.g. archived history).
+    Returns TransferStats; raises ImportAborted if a row can't be read or stored.
+    """
+    _check_table(table)
+    fmt, compress = detect_format(path, fmt, compress)
+    tc.ensure_db()
+    import_columns, required_columns, key_columns = TABLES[table]
+    started = time.perf_counter()
+    count = written = 0
+
+    error = None
+    pending = None
+    try:
+        with _open(path, "r", compress) as file:
+            records = _read_records(file, fmt)
+            first = next(records, None)
+            if first is not None:
+                missing = [column for column in required_columns if column not in first]
+                if missing:
+                    raise ValueError(f"'{path}' has no {', '.join(missing)} column for {table}.")
+                columns = [column for column in import_columns if column in first]
+                sql = _insert_sql(table, columns, key_columns)
+                key_indexes = [columns.index(column) for column in key_columns] if table != "daily_sessions" else []
+
+                # The next batch is parsed while the writer inserts the previous one; waiting
+                # for that one before queueing another keeps at most two batches in memory
+                batch = []
+                for record in chain((first,), records):
+                    row = [record.get(column) for column in columns]
+                    batch.append(row + [row[i] for i in key_indexes])
+                    if len(batch) >= batch_size:
+                        if pending is not None:
+                            written += pending.result()
+                        pending = db_core.submit_write(_write_batch, table, sql, batch)
+                        count += len(batch)
+                        batch = []
+                if pending is not None:
+                    written += pending.result()
+                    pending = None
+                if batch:
+                    written += db_core.run_write(_write_batch, table, sql, batch)
+                    count += len(batch)
+    except (sqlite3.Error, csv.Error, ValueError, OSError, EOFError) as e:
+        # Batches committed before the error stay; they still get the refresh below
+        error = e
+        if pending is not None and pending.exception() is None:
+            written += pending.result()
+
+    if written:
+        if table == "daily_sessions":
+            db_core.run_write(_rebuild_coarse_rollups)
+        if table == "scheduled_focus_sessions":
+            db_core.invalidate_cache("schedules")
+        else:
+            db_core.invalidate_cache("totals")
+            tc.update_streak()
+    stats = TransferStats(count, written, time.perf_counter() - started)
+    if error is not None:
+        raise ImportAborted(f"{error} ({written} rows were written before the error)", stats) from error
+    return stats
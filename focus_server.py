@@ -0,0 +1,371 @@
+import ipaddress
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import blocker_core as bc
+import block_page
+import db_core
+import metrics_core
+import tracker_core as tc
+
+# --- Local HTTP Server for Blocked Sites ---
+# Started and stopped through blocker_core.start_focus_server()/stop_focus_server().
+
+FOCUS_SERVER_PORT = 80
+REQUEST_TIMEOUT = 5 # Seconds a connection may sit idle or trickle in a request before it is dropped
+SHUTDOWN_POLL_INTERVAL = 0.1 # How often serve_forever() checks for stop_focus_server()
+ATTEMPT_FLUSH_INTERVAL = 5 # Seconds between writes of the attempt counts to the database
+ACCESS_LOG_SIZE = 1000 # Most recent attempts kept in memory
+CHANGE_CHECK_INTERVAL = 1 # Seconds between checks for changes made by other processes
+# Host headers the JSON API answers to; anything else (e.g. a blocked domain or a
+# DNS-rebinding page pointed at 127.0.0.1) gets 403
+API_HOSTS = frozenset(("localhost", "127.0.0.1", "[::1]"))
+
+server_thread = None
+httpd = None
+
+# --- Distraction Attempts ---
+# Requests only bump an in-memory count; the flush thread adds the counts to the
+# distraction_attempts table in one transaction every ATTEMPT_FLUSH_INTERVAL.
+
+_attempts_lock = threading.Lock()
+_attempts = {} # domain -> [attempts since the last flush, epoch seconds of the latest one]
+access_log = deque(maxlen=ACCESS_LOG_SIZE) # (epoch seconds, domain) of the latest attempts
+_session_start_ts = None
+_session_end_ts = None
+_flush_stop = threading.Event()
+_flush_thread = None
+
+def _domain(host):
+    """Normalizes a Host header ("www.Example.com:80") to the blocklist form ("example.com")."""
+    host = host.strip().lower()
+    if host.startswith("["): # IPv6 literal, "[::1]:80"
+        return host.partition("]")[0] + "]"
+    return host.partition(":")[0].removeprefix("www.")
+
+def record_attempt(domain):
+    """Counts one request for domain (a Host header normalized by _domain())."""
+    now = int(time.time())
+    with _attempts_lock:
+        entry = _attempts.get(domain)
+        if entry is None:
+            _attempts[domain] = [1, now]
+        else:
+            entry[0] += 1
+            entry[1] = now
+        access_log.append((now, domain))
+
+def flush_attempts():
+    """Queues the counts collected since the last flush for writing."""
+    global _attempts
+    with _attempts_lock:
+        if not _attempts:
+            return
+        attempts, _attempts = _attempts, {}
+    written = bc.record_distraction_attempts(attempts, _session_start_ts)
+    written.add_done_callback(lambda _: _bump("summary"))
+
+def _flush_periodically():
+    while not _flush_stop.wait(ATTEMPT_FLUSH_INTERVAL):
+        flush_attempts()
+
+# --- JSON API ---
+# GET /api/status, /api/blocklist and /api/sessions/summary for browser extensions and
+# scripts, answered only to loopback clients. Each endpoint's body is serialized once
+# per generation of the data it shows; the generations are bumped by the change
+# notifications that affect that endpoint (or a new session or attempt flush), and
+# the strong ETag is derived from them. Changes published by other processes (e.g.
+# the CLI next to the GUI) are picked up from db_core.change_versions() at most every
+# CHANGE_CHECK_INTERVAL. A poll with a matching If-None-Match is answered 304 after
+# one string comparison.
+
+_ETAG_PREFIX = f"{os.getpid():x}.{time.time_ns():x}" # Keeps ETags from a previous run from matching
+_generations = {"status": 0, "blocklist": 0, "summary": 0}
+_api_cache = {} # path -> (generation key, ETag, body)
+_api_lock = threading.Lock()
+_change_versions = {} # event -> version last seen in db_core.change_versions()
+_next_change_check = 0.0
+
+# event -> the endpoints whose body it changes
+_EVENT_ENDPOINTS = {
+    db_core.BLOCKLIST_CHANGED: ("blocklist", "status"),
+    db_core.SESSION_RECORDED: ("summary",),
+    db_core.STREAK_UPDATED: ("summary",),
+}
+
+def _bump(*names):
+    with _api_lock:
+        for name in names:
+            _generations[name] += 1
+
+for _event, _names in _EVENT_ENDPOINTS.items():
+    db_core.subscribe(_event, lambda _names=_names, **_: _bump(*_names))
+
+def _check_other_processes():
+    """Bumps the endpoints affected by events published since the last check, in any process."""
+    global _next_change_check
+    now = time.monotonic()
+    if now < _next_change_check:
+        return
+    _next_change_check = now + CHANGE_CHECK_INTERVAL
+    try:
+        versions = db_core.change_versions()
+    except sqlite3.Error as e:
+        print(f"Error checking for changes: {e}")
+        return
+    for event, names in _EVENT_ENDPOINTS.items():
+        version = versions.get(event, 0)
+        if _change_versions.setdefault(event, version) != version:
+            _change_versions[event] = version
+            _bump(*names)
+
+def _status():
+    return {
+        "active": True, # The server only runs during Focus Mode
+        "session_start_ts": _session_start_ts,
+        "session_end_ts": _session_end_ts,
+        "profile_id": bc.active_profile_id,
+        "blocked_sites": len(bc.get_blocklist(bc.active_profile_id or bc.DEFAULT_PROFILE_ID)),
+    }
+
+def _blocklist():
+    return {"profile_id": bc.active_profile_id,
+            "sites": list(bc.get_sorted_blocklist(bc.active_profile_id or bc.DEFAULT_PROFILE_ID))}
+
+def _sessions_summary():
+    today = date.today()
+    current_streak, longest_streak = tc.get_streak_info()
+    return {
+        "current_streak": current_streak,
+        "longest_streak": longest_streak,
+        "total_minutes": tc.get_total_focus_minutes(),
+        "today_minutes": tc.get_daily_totals(today, today).get(today, 0.0),
+        "top_distractions": [{"domain": domain, "attempts": attempts}
+                             for domain, attempts in bc.get_top_distractions(session_start_ts=_session_start_ts)],
+    }
+
+def _active_profile():
+    return bc.active_profile_id
+
+def _today():
+    return date.today().toordinal()
+
+# path -> (generation name, builder, function returning anything else the body depends on)
+API_ENDPOINTS = {
+    "/api/status": ("status", _status, _active_profile),
+    "/api/blocklist": ("blocklist", _blocklist, _active_profile),
+    "/api/sessions/summary": ("summary", _sessions_summary, _today),
+}
+
+def api_response(path):
+    """Returns (ETag, JSON body bytes) for an API path, or None for unknown paths."""
+    endpoint = API_ENDPOINTS.get(path)
+    if endpoint is None:
+        return None
+    name, build, variant = endpoint
+    _check_other_processes()
+    key = (_generations[name], variant())
+    cached = _api_cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1], cached[2]
+
+    body = json.dumps(build()).encode("utf-8")
+    etag = f'"{_ETAG_PREFIX}.{name}.{key[0]}.{key[1]}"'
+    with _api_lock:
+        if _generations[name] == key[0]: # Not changed again while it was built
+            _api_cache[path] = (key, etag, body)
+    return etag, body
+
+def _etag_matches(if_none_match, etag):
+    if if_none_match is None:
+        return False
+    return any(tag.strip().removeprefix("W/") in (etag, "*") for tag in if_none_match.split(","))
+
+def _api_host_allowed(host):
+    return bool(host) and _domain(host) in API_HOSTS
+
+def _is_loopback(address):
+    """Whether a client address is on this machine (the server listens on every interface)."""
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    mapped = getattr(ip, "ipv4_mapped", None) # "::ffff:127.0.0.1"
+    return ip.is_loopback or (mapped is not None and mapped.is_loopback)
+
+class FocusHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections alive, so a browser reopening many blocked tabs
+    # reuses a few connections instead of opening one per request.
+    protocol_version = "HTTP/1.1"
+    timeout = REQUEST_TIMEOUT
+    # Headers and body go out in separate writes; with Nagle's algorithm the body then
+    # waits for the client's delayed ACK (~40 ms) on kept-alive connections.
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        metrics_core.increment("focus_server_requests_total", method="GET")
+        if self.path.startswith("/api/"):
+            self._send_api_response(send_body=True)
+        else:
+            self._send_page(send_body=True)
+
+    def do_HEAD(self):
+        metrics_core.increment("focus_server_requests_total", method="HEAD")
+        if self.path.startswith("/api/"):
+            self._send_api_response(send_body=False)
+        else:
+            self._send_page(send_body=False)
+
+    def _send_page(self, send_body):
+        if self.path.startswith(block_page.ASSET_PREFIX):
+            self._send_asset(send_body)
+            return
+        if self.path == "/favicon.ico": # Fetched by the browser, not an attempt
+            self._send_empty(404)
+            return
+        host = self.headers.get("Host")
+        domain = _domain(host) if host else ""
+        if domain:
+            record_attempt(domain)
+        body = block_page.render_block_page(domain, _session_end_ts)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        # The real site must load once the block is lifted, so the page is never stored
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def _send_asset(self, send_body):
+        asset = block_page.STATIC_ASSETS.get(self.path.partition("?")[0])
+        if asset is None:
+            self._send_empty(404)
+            return
+        content_type, body, etag = asset
+        if _etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", f"public, max-age={block_page.ASSET_MAX_AGE}, immutable")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", f"public, max-age={block_page.ASSET_MAX_AGE}, immutable")
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def _send_empty(self, status):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _send_api_response(self, send_body):
+        # The Host header is up to the client, so the peer address is checked as well
+        if not _is_loopback(self.client_address[0]) or not _api_host_allowed(self.headers.get("Host")):
+            self._send_json_error(403, "The API only answers requests for localhost.", send_body)
+            return
+        response = api_response(self.path.partition("?")[0])
+        if response is None:
+            self._send_json_error(404, "Unknown API endpoint.", send_body)
+            return
+        etag, body = response
+        if _etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache") # Store, but revalidate every time
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def _send_json_error(self, status, message, send_body=True):
+        body = json.dumps({"error": message}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass # Logging every request to stderr would dominate the cost of serving it
+
+class FocusServer(ThreadingHTTPServer):
+    daemon_threads = True
+    block_on_close = False # Don't let slow clients hold up stop_focus_server()
+    request_queue_size = 128 # Room for a browser reopening many blocked tabs at once
+
+    def handle_error(self, request, client_address):
+        # Clients that time out or disconnect mid-request are expected, not errors
+        if isinstance(sys.exc_info()[1], OSError):
+            return
+        super().handle_error(request, client_address)
+
+def run_focus_server():
+    try:
+        print(f"⚡ Focus server running on http://127.0.0.1:{httpd.server_address[1]}")
+        httpd.serve_forever(poll_interval=SHUTDOWN_POLL_INTERVAL)
+    except Exception as e:
+        print(f"An error occurred in focus server: {e}")
+
+def start_focus_server(port=None, session_start_ts=None, session_end_ts=None):
+    """
+    Binds the server (to port, FOCUS_SERVER_PORT by default; 0 picks a free port) and serves
+    it on a thread. Attempts are recorded against the session starting at session_start_ts;
+    both timestamps are reported by /api/status.
+    """
+    global server_thread, httpd, _session_start_ts, _session_end_ts, _flush_thread
+    if server_thread and server_thread.is_alive():
+        print("Focus server already running.")
+        return
+    port = FOCUS_SERVER_PORT if port is None else port
+    try:
+        # '' binds to all available interfaces
+        httpd = FocusServer(('', port), FocusHandler)
+    except PermissionError:
+        print(f"❌ Admin rights required to run server on port {port}.")
+        return
+    except Exception as e:
+        print(f"An error occurred in focus server: {e}")
+        return
+    _session_start_ts, _session_end_ts = session_start_ts, session_end_ts
+    _bump("status", "summary")
+    _flush_stop.clear()
+    _flush_thread = threading.Thread(target=_flush_periodically, name="attempt-flush", daemon=True)
+    _flush_thread.start()
+    server_thread = threading.Thread(target=run_focus_server, daemon=True)
+    server_thread.start()
+
+def server_port():
+    """Returns the port the server is listening on, or None if it isn't running."""
+    return httpd.server_address[1] if httpd else None
+
+def stop_focus_server():
+    global httpd, server_thread, _flush_thread
+    if httpd:
+        httpd.shutdown()
+        httpd.server_close() # Release the port right away
+        server_thread.join()
+        _flush_stop.set()
+        _flush_thread.join()
+        flush_attempts() # Queued ahead of finish_session(), which callers run after stopping the server
+        httpd, server_thread, _flush_thread = None, None, None
+        print("🛑 Focus server stopped.")
+    else:
+        print("Focus server not running.")
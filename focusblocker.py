@@ -0,0 +1,539 @@
+"""
+Headless command-line entry point for FocusBlocker.
+
+    python focusblocker.py start --minutes 25 [--daemon]
+    python focusblocker.py stop
+    python focusblocker.py status [--json]
+    python focusblocker.py allow docs.python.org --minutes 5   (--revoke to block it again)
+    python focusblocker.py show
+    python focusblocker.py recover [--daemon]
+    python focusblocker.py blocklist add example.com [more.com ...]
+    python focusblocker.py blocklist import sites.txt   (one site per line, '-' for stdin)
+    python focusblocker.py blocklist list
+    python focusblocker.py profiles list|add NAME|remove NAME
+    python focusblocker.py stats
+    python focusblocker.py export sessions sessions.csv.gz   (import TABLE FILE reads one back)
+    python focusblocker.py sync   (uploads new sessions to FOCUSBLOCKER_SYNC_URL)
+    python focusblocker.py compact [--retention-days 365]   (archives older raw sessions)
+
+Only blocker_core, tracker_core, timer_logic and instance_core are imported, never
+the GUI stack. start/stop/status/show are forwarded to the running instance (the GUI
+or a session started here) over its control channel. Without one, `start` runs the
+focus session (hosts file, focus server and timer) in this process, or in a detached
+background process with --daemon. A --metrics flag before the command (or
+FOCUSBLOCKER_METRICS=1) exports timings and counters, see metrics_core. With
+FOCUSBLOCKER_SYNC_URL set, finished sessions are uploaded in batches, see sync_core.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import blocker_core as bc
+import instance_core
+import metrics_core
+import sync_core
+import tracker_core as tc
+from timer_logic import FocusTimer
+
+DAEMON_LOG_FILE = os.path.join(tc.DATA_DIR, "focusblocker_daemon.log")
+DAEMON_START_TIMEOUT = 10 # Seconds `start --daemon` waits for the session to come up
+STOP_TIMEOUT = instance_core.REQUEST_TIMEOUT - 1 # Seconds a stop command waits for the cleanup
+TOP_DISTRACTIONS = 5 # Blocked sites listed by `stats`
+
+# --- Focus Sessions ---
+
+def run_session(duration_minutes=None, show_countdown=False, profile_id=bc.DEFAULT_PROFILE_ID):
+    """
+    Blocks the profile's sites, serves the block page and runs the timer until it completes
+    or a stop is requested, then unblocks and records the session. While it runs, this
+    process is the running instance and answers control commands. Without duration_minutes,
+    the session interrupted by a crash (if any) is resumed instead. Returns the exit code.
+    """
+    finished = threading.Event()
+    cleaned_up = threading.Event()
+    ends_at = time.time()
+
+    def on_tick(mins, secs):
+        if show_countdown:
+            print(f"\r⏳ Time Left: {mins:02}:{secs:02}", end="", flush=True)
+
+    def status():
+        return {"active": True, "pid": os.getpid(), "remaining_seconds": max(0, int(ends_at - time.time())),
+                "allowances": bc.get_allowances()}
+
+    def start(minutes=None, profile=None):
+        raise RuntimeError("A focus session is already active. Please stop it first.")
+
+    def stop():
+        finished.set()
+        cleaned_up.wait(STOP_TIMEOUT) # Answer once the sites are unblocked again
+        return {}
+
+    def show():
+        raise RuntimeError("The running focus session has no window (started from the command line).")
+
+    def allow(site, minutes=5, revoke=False):
+        if revoke:
+            return {"revoked": bc.revoke_allowance(site)}
+        return {"expires_ts": bc.allow_site(site, minutes)}
+
+    control = instance_core.ControlServer({"status": status, "start": start, "stop": stop, "show": show,
+                                           "allow": allow})
+    try:
+        if not control.start():
+            print("FocusBlocker is already running.")
+            return 1
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+
+    try:
+        # This process is the running instance now, so any journaled session is an orphan
+        recorded, resumed_session = tc.recover_orphaned_sessions(resume=duration_minutes is None)
+        if recorded:
+            print(f"Recorded {len(recorded)} interrupted session(s).")
+        if duration_minutes is None:
+            if resumed_session is None:
+                print("No interrupted focus session to resume.")
+                return _unblock_stale_sites()
+            duration_minutes = resumed_session.remaining_seconds(tc.to_epoch(datetime.now())[0]) / 60
+            profile_id = resumed_session.profile_id or bc.DEFAULT_PROFILE_ID
+
+        try:
+            bc.block_sites(profile_id)
+        except PermissionError:
+            print("❌ Admin rights required to modify the hosts file. Run as administrator/root.")
+            if resumed_session is not None:
+                tc.finish_session(resumed_session.id, datetime.now())
+            return 1
+
+        if resumed_session is not None:
+            journal_id, session_start_ts = resumed_session.id, resumed_session.start_ts
+        else:
+            started = datetime.now()
+            journal_id = tc.begin_session(started, duration_minutes, profile_id)
+            session_start_ts = tc.to_epoch(started)[0]
+        ends_at = time.time() + duration_minutes * 60
+
+        _install_stop_handlers(finished)
+        sync_core.setup() # Background uploads while a long session runs, if a collector is configured
+        bc.start_focus_server(session_start_ts=session_start_ts, session_end_ts=int(ends_at))
+        focus_timer = FocusTimer(duration_minutes, on_tick, finished.set,
+                                 lambda: tc.checkpoint_session(journal_id), tc.CHECKPOINT_INTERVAL_SECONDS)
+        focus_timer.start_timer()
+        print(f"Focus Mode ON for {duration_minutes:g} minutes.")
+
+        try:
+            # Waking up every second keeps Ctrl+C responsive on Windows
+            while not finished.wait(1):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            focus_timer.stop_timer()
+            if show_countdown:
+                print()
+            try:
+                bc.unblock_all()
+            except PermissionError:
+                print("⚠️ Admin rights required to unblock sites. Please manually check your hosts file.")
+            bc.stop_focus_server()
+
+            if tc.finish_session(journal_id, datetime.now()) is not None:
+                current_streak, longest_streak = tc.update_streak()
+                print(f"Session recorded. 🔥 Current Streak: {current_streak} days (Longest: {longest_streak} days)")
+            cleaned_up.set()
+    finally:
+        control.close()
+    return 0
+
+def _unblock_stale_sites():
+    """Removes redirects a crashed session left in the hosts file. Returns the exit code."""
+    try:
+        if bc.is_blocking():
+            bc.unblock_all()
+            print("Unblocked the sites left blocked by an interrupted session.")
+    except PermissionError:
+        print("⚠️ Admin rights required to unblock sites. Please manually check your hosts file.")
+        return 1
+    return 0
+
+def _install_stop_handlers(finished):
+    import signal
+    def handle(signum, frame):
+        finished.set()
+    for name in ("SIGTERM", "SIGHUP", "SIGBREAK"):
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), handle)
+
+def spawn_daemon(arguments):
+    """
+    Runs this script with arguments (a session command) in a detached background process.
+    Returns its pid once the session is running, or None if it exited instead.
+    """
+    import subprocess
+
+    os.makedirs(tc.DATA_DIR, exist_ok=True)
+    command = [sys.executable, "-u", os.path.abspath(__file__)]
+    if metrics_core.ENABLED:
+        command.append("--metrics")
+    command += arguments
+    with open(DAEMON_LOG_FILE, "a") as log:
+        if os.name == "nt":
+            flags = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+            process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+                                       creationflags=flags, close_fds=True)
+        else:
+            process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+                                       start_new_session=True, close_fds=True)
+
+    deadline = time.monotonic() + DAEMON_START_TIMEOUT
+    while time.monotonic() < deadline:
+        response = instance_core.send_command("status")
+        if response is not None and response.get("pid") == process.pid:
+            return process.pid
+        if process.poll() is not None:
+            break
+        time.sleep(0.05)
+    return None
+
+# --- Commands ---
+
+def _print_error(response):
+    print(f"❌ {response.get('error', 'The running instance reported an error.')}")
+    return 1
+
+def cmd_start(args):
+    if args.minutes <= 0:
+        print("Please enter a valid number of minutes (greater than 0).")
+        return 2
+
+    profile_id = _profile_id(args.profile or bc.DEFAULT_PROFILE_NAME)
+    if profile_id is None:
+        return 2
+
+    # Hand the session to an already running instance (the GUI or another session); without
+    # --profile it keeps the profile selected there
+    params = {"profile": args.profile} if args.profile is not None else {}
+    response = instance_core.send_command("start", minutes=args.minutes, **params)
+    if response is not None:
+        if not response["ok"]:
+            return _print_error(response)
+        print(f"Focus Mode ON for {args.minutes} minutes (in the running instance, pid {response['pid']}).")
+        return 0
+
+    if not args.daemon:
+        return run_session(args.minutes, show_countdown=sys.stdout.isatty(), profile_id=profile_id)
+
+    pid = spawn_daemon(["start", "--minutes", str(args.minutes)] + (["--profile", args.profile] if args.profile else []))
+    if pid is None:
+        print(f"❌ Focus session failed to start, see {DAEMON_LOG_FILE}")
+        return 1
+    print(f"Focus Mode ON for {args.minutes} minutes (background pid {pid}).")
+    return 0
+
+def cmd_stop(args):
+    response = instance_core.send_command("stop")
+    if response is None:
+        recorded, _ = tc.recover_orphaned_sessions(resume=False)
+        if recorded:
+            print(f"Recorded {len(recorded)} interrupted session(s).")
+        print("No focus session is active.")
+        return _unblock_stale_sites()
+    if not response["ok"]:
+        return _print_error(response)
+    print("Focus Mode stopped.")
+    return 0
+
+def cmd_recover(args):
+    if instance_core.send_command("status") is not None:
+        print("FocusBlocker is already running and has recovered interrupted sessions itself.")
+        return 0
+    if not args.daemon:
+        return run_session(show_countdown=sys.stdout.isatty())
+
+    pid = spawn_daemon(["recover"])
+    if pid is None:
+        print(f"No focus session was resumed, see {DAEMON_LOG_FILE}")
+        return 0
+    print(f"Resumed the interrupted focus session (background pid {pid}).")
+    return 0
+
+def cmd_status(args):
+    response = instance_core.send_command("status")
+    if response is None:
+        response = {"ok": True, "active": False, "pid": None, "remaining_seconds": 0}
+    if args.json:
+        print(json.dumps(response))
+        return 0 if response["ok"] else 1
+    if not response["ok"]:
+        return _print_error(response)
+
+    if not response["active"]:
+        print("Status: Inactive")
+    else:
+        mins, secs = divmod(response["remaining_seconds"], 60)
+        print(f"Status: Focus Mode ON (pid {response['pid']}), ⏳ Time Left: {mins:02}:{secs:02}")
+        for site, seconds_left in sorted(response.get("allowances", {}).items()):
+            mins, secs = divmod(seconds_left, 60)
+            print(f"  Allowed: {site} for another {mins:02}:{secs:02}")
+    return 0
+
+def cmd_allow(args):
+    response = instance_core.send_command("allow", site=args.site, minutes=args.minutes, revoke=args.revoke)
+    if response is None:
+        print("No focus session is active.")
+        return 1
+    if not response["ok"]:
+        return _print_error(response)
+    if args.revoke:
+        print(f"{args.site} is blocked again." if response["revoked"] else f"{args.site} wasn't allowed.")
+    else:
+        print(f"{args.site} is allowed until {datetime.fromtimestamp(response['expires_ts']):%H:%M:%S}.")
+    return 0
+
+def cmd_show(args):
+    response = instance_core.send_command("show")
+    if response is None:
+        print("FocusBlocker is not running.")
+        return 1
+    return 0 if response["ok"] else _print_error(response)
+
+def _profile_id(name):
+    """Returns the id of the profile called name, printing an error if there is none."""
+    profile_id = bc.get_profile_id(name)
+    if profile_id is None:
+        print(f"❌ No profile called '{name}'. Create it with: focusblocker profiles add '{name}'")
+    return profile_id
+
+def cmd_blocklist_add(args):
+    profile_id = _profile_id(args.profile)
+    if profile_id is None:
+        return 2
+    added = bc.add_sites_to_blocklist(args.sites, profile_id)
+    print(f"Added {len(added)} of {len(args.sites)} sites to the {args.profile} blocklist.")
+    return 0
+
+def cmd_blocklist_import(args):
+    profile_id = _profile_id(args.profile)
+    if profile_id is None:
+        return 2
+    file = sys.stdin if args.file == "-" else open(args.file, "r", encoding="utf-8")
+    with file:
+        # One site per line; blank lines and '#' comments are skipped
+        sites = [line.split("#", 1)[0].strip() for line in file]
+    sites = [site for site in sites if site]
+    added = bc.add_sites_to_blocklist(sites, profile_id)
+    print(f"Imported {len(added)} new sites ({len(sites) - len(added)} already blocked).")
+    return 0
+
+def cmd_blocklist_list(args):
+    profile_id = _profile_id(args.profile)
+    if profile_id is None:
+        return 2
+    for site in bc.get_sorted_blocklist(profile_id):
+        print(site)
+    return 0
+
+def cmd_profiles_list(args):
+    for profile_id, name in bc.get_profiles():
+        print(f"{name} ({len(bc.get_blocklist(profile_id))} sites)")
+    return 0
+
+def cmd_profiles_add(args):
+    if bc.create_profile(args.name) is None:
+        print(f"❌ A profile called '{args.name}' already exists.")
+        return 1
+    print(f"Created profile '{args.name}'. Add sites with: focusblocker blocklist add --profile '{args.name}' SITE")
+    return 0
+
+def cmd_profiles_remove(args):
+    profile_id = _profile_id(args.name)
+    if profile_id is None:
+        return 2
+    try:
+        bc.delete_profile(profile_id)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"Removed profile '{args.name}'.")
+    return 0
+
+def cmd_stats(args):
+    current_streak, longest_streak = tc.get_streak_info()
+    print(f"🔥 Current Streak: {current_streak} days (Longest: {longest_streak} days)")
+    print(f"⏱️ Total Focus Time: {tc.get_total_focus_minutes():.1f} minutes")
+
+    today = datetime.now().date()
+    first_day = today - timedelta(days=args.days - 1)
+    daily_totals = tc.get_daily_totals(first_day, today)
+    print(f"\nLast {args.days} days:")
+    for offset in range(args.days):
+        day = first_day + timedelta(days=offset)
+        print(f"  {day.isoformat()}  {daily_totals.get(day, 0.0):6.1f} mins")
+
+    top = bc.get_top_distractions(TOP_DISTRACTIONS, since_ts=tc.to_epoch(datetime.combine(first_day, datetime.min.time()))[0])
+    if top:
+        print(f"\nMost blocked sites (last {args.days} days):")
+        for domain, attempts in top:
+            print(f"  {attempts:6d}  {domain}")
+
+    try:
+        import analytics_core # Needs NumPy, an optional dependency; kept out of startup
+    except ImportError:
+        print("\n(Install numpy for weekday, hour and session-length statistics.)")
+        return 0
+    summary = analytics_core.summary()
+    print(f"\nDaily average: {summary['rolling_7_day_average']:.1f} mins (7 days), "
+          f"{summary['rolling_30_day_average']:.1f} mins (30 days)")
+    percentiles = summary["session_length_percentiles"]
+    if percentiles: # Empty without raw sessions (e.g. all archived), and so is the rest
+        weekdays = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+        print("Focus by weekday: " + ", ".join(f"{day} {minutes:.0f}"
+                                               for day, minutes in zip(weekdays, summary["weekday_minutes"])))
+        print(f"Busiest hour: {summary['busiest_hour']:02d}:00")
+        print("Session length: " + ", ".join(f"p{p} {minutes:.0f}" for p, minutes in percentiles.items()) + " mins")
+    return 0
+
+def _print_transfer(verb, table, stats):
+    print(f"{verb} {stats.written} of {stats.rows} {table} rows in {stats.seconds:.2f} s "
+          f"({stats.rows_per_second:,.0f} rows/s).", file=sys.stderr) # stdout may be the exported data
+
+def cmd_export(args):
+    import export_core # Only needed here; keeps csv and gzip out of startup
+    try:
+        stats = export_core.export_table(args.table, args.file, args.format, args.gzip or None)
+    except (ValueError, OSError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    _print_transfer("Exported", args.table, stats)
+    return 0
+
+def cmd_import(args):
+    import export_core
+    try:
+        stats = export_core.import_table(args.table, args.file, args.format, args.gzip or None)
+    except export_core.ImportAborted as e:
+        print(f"❌ {e}")
+        _print_transfer("Imported", args.table, e.stats)
+        return 1
+    except (ValueError, OSError) as e:
+        print(f"❌ {e}")
+        return 1
+    _print_transfer("Imported", args.table, stats)
+    return 0
+
+def cmd_sync(args):
+    try:
+        if args.requeue_rejected:
+            print(f"Requeued {sync_core.requeue_rejected()} rejected batches.")
+        uploaded, waiting = sync_core.sync_once(args.url)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"Uploaded {uploaded} sessions; {waiting} batches waiting in the outbox.")
+    return 1 if waiting else 0
+
+def cmd_compact(args):
+    if args.retention_days < 0:
+        print("❌ The retention can't be negative.")
+        return 1
+    archived = tc.compact_sessions(args.retention_days, tc.ARCHIVE_DIR)
+    print(f"Archived {archived} sessions older than {args.retention_days} days to {tc.ARCHIVE_DIR}.")
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="focusblocker", description="Run FocusBlocker focus sessions without the GUI.")
+    parser.add_argument("--metrics", action="store_true",
+                        help=f"Record timings and counters and export them to {metrics_core.METRICS_DIR} "
+                             f"(also enabled by {metrics_core.ENV_ENABLE}=1)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    start = commands.add_parser("start", help="Start a focus session")
+    start.add_argument("--minutes", type=int, required=True, help="Session length in minutes")
+    start.add_argument("--daemon", action="store_true", help="Run the session in a background process")
+    start.add_argument("--profile", help=f"Blocklist profile to block (default: the running instance's "
+                                         f"current profile, or {bc.DEFAULT_PROFILE_NAME})")
+    start.set_defaults(handler=cmd_start)
+
+    stop = commands.add_parser("stop", help="Stop the running focus session")
+    stop.set_defaults(handler=cmd_stop)
+
+    status = commands.add_parser("status", help="Show whether a focus session is running")
+    status.add_argument("--json", action="store_true", help="Print the status as JSON")
+    status.set_defaults(handler=cmd_status)
+
+    recover = commands.add_parser("recover", help="Resume or close a session interrupted by a crash (e.g. from a login hook)")
+    recover.add_argument("--daemon", action="store_true", help="Resume the session in a background process")
+    recover.set_defaults(handler=cmd_recover)
+
+    allow = commands.add_parser("allow", help="Unblock one site for a few minutes during a focus session")
+    allow.add_argument("site")
+    allow.add_argument("--minutes", type=float, default=5, help="How long the site stays reachable")
+    allow.add_argument("--revoke", action="store_true", help="Block the site again now")
+    allow.set_defaults(handler=cmd_allow)
+
+    show = commands.add_parser("show", help="Bring the running FocusBlocker window to the front")
+    show.set_defaults(handler=cmd_show)
+
+    blocklist = commands.add_parser("blocklist", help="Manage the blocklist")
+    blocklist.add_argument("--profile", default=bc.DEFAULT_PROFILE_NAME, help="Blocklist profile to manage")
+    blocklist_commands = blocklist.add_subparsers(dest="blocklist_command", required=True)
+    add = blocklist_commands.add_parser("add", help="Block one or more sites")
+    add.add_argument("sites", nargs="+")
+    add.set_defaults(handler=cmd_blocklist_add)
+    import_ = blocklist_commands.add_parser("import", help="Block the sites listed in a file (one per line)")
+    import_.add_argument("file", help="Path of the file, or '-' for stdin")
+    import_.set_defaults(handler=cmd_blocklist_import)
+    list_ = blocklist_commands.add_parser("list", help="Print the blocklist")
+    list_.set_defaults(handler=cmd_blocklist_list)
+
+    profiles = commands.add_parser("profiles", help="Manage blocklist profiles")
+    profile_commands = profiles.add_subparsers(dest="profiles_command", required=True)
+    profile_commands.add_parser("list", help="List the profiles").set_defaults(handler=cmd_profiles_list)
+    profile_add = profile_commands.add_parser("add", help="Create an empty profile")
+    profile_add.add_argument("name")
+    profile_add.set_defaults(handler=cmd_profiles_add)
+    profile_remove = profile_commands.add_parser("remove", help="Delete a profile and its blocklist")
+    profile_remove.add_argument("name")
+    profile_remove.set_defaults(handler=cmd_profiles_remove)
+
+    stats = commands.add_parser("stats", help="Show streaks and recent focus time")
+    stats.add_argument("--days", type=int, default=7, help="Number of recent days to list")
+    stats.set_defaults(handler=cmd_stats)
+
+    sync = commands.add_parser("sync", help="Upload new sessions to the collector now (e.g. from cron)")
+    sync.add_argument("--url", help=f"Collector URL (default: ${sync_core.ENV_URL})")
+    sync.add_argument("--requeue-rejected", action="store_true",
+                      help="Send the batches the collector rejected as malformed again (e.g. after fixing it)")
+    sync.set_defaults(handler=cmd_sync)
+
+    compact = commands.add_parser("compact", help="Archive old raw sessions and shrink the database (totals are kept)")
+    compact.add_argument("--retention-days", type=int, default=tc.SESSION_RETENTION_DAYS,
+                         help="Keep the raw sessions of this many recent days")
+    compact.set_defaults(handler=cmd_compact)
+
+    history_tables = ("sessions", "daily_sessions", "scheduled_focus_sessions")
+    for name, handler, help_text, file_help in (
+            ("export", cmd_export, "Write a history table to a CSV or JSON Lines file", "Path of the file, or '-' for stdout"),
+            ("import", cmd_import, "Add the rows of an exported file to a history table (import sessions first)",
+             "Path of the file, or '-' for stdin")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("table", choices=history_tables)
+        command.add_argument("file", help=f"{file_help}; the format follows the extension (.csv, .jsonl, plus .gz)")
+        command.add_argument("--format", choices=("csv", "jsonl"), help="Format of the file (required for '-')")
+        command.add_argument("--gzip", action="store_true", help="Compress or decompress with gzip regardless of the name")
+        command.set_defaults(handler=handler)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    metrics_core.setup(True if args.metrics else None)
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
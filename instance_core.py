@@ -0,0 +1,156 @@
+import hmac
+import json
+import os
+import secrets
+import socket
+import threading
+
+from db_core import DATA_DIR
+
+# --- Configuration ---
+# Whichever process binds the control port is the running instance (the GUI or a CLI
+# focus session); every later launch forwards its command over the port and exits.
+# Set FOCUSBLOCKER_CONTROL_PORT if another program already uses the default port.
+ENV_PORT = "FOCUSBLOCKER_CONTROL_PORT"
+CONTROL_HOST = "127.0.0.1"
+CONTROL_PORT = int(os.environ.get(ENV_PORT) or 47821)
+TOKEN_FILE = os.path.join(DATA_DIR, "control_token")
+REQUEST_TIMEOUT = 5 # Seconds a client or a connection may take to send or answer a request
+MAX_REQUEST_BYTES = 64 * 1024
+
+# Requests and responses are single JSON lines:
+#   -> {"token": "...", "command": "start", "params": {"minutes": 25}}
+#   <- {"ok": true, "protocol": PROTOCOL, ...} or {"ok": false, "protocol": PROTOCOL, "error": "..."}
+# The token is rotated by every new instance and only readable by the current user,
+# so other local processes can't drive the app through the port. Every response names
+# the protocol, so a client can tell a FocusBlocker instance from an unrelated program
+# that happens to listen on the port.
+PROTOCOL = "focusblocker-control/1"
+
+def _write_token(token):
+    os.makedirs(os.path.dirname(TOKEN_FILE), exist_ok=True)
+    temp_path = TOKEN_FILE + ".tmp"
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as file:
+        file.write(token)
+    os.replace(temp_path, TOKEN_FILE)
+
+def _read_token():
+    try:
+        with open(TOKEN_FILE, "r") as file:
+            return file.read().strip()
+    except OSError:
+        return ""
+
+class ControlServer:
+    """
+    Single-instance lock and control channel.
+
+    start() binds the control port, which fails if another instance already holds it.
+    Commands from other processes are dispatched to handlers[command](**params) on a
+    connection thread; a handler returns a dict that is merged into the {"ok": true}
+    response, or raises to answer with an error.
+    """
+    def __init__(self, handlers=None, port=None):
+        self.handlers = dict(handlers or {})
+        self.port = port if port is not None else CONTROL_PORT
+        self._sock = None
+        self._token = None
+
+    def start(self):
+        """
+        Binds the control port and starts serving. Returns False if another instance is
+        running; raises RuntimeError if the port is held by a program that isn't one.
+        """
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if os.name == "nt":
+            # Without this Windows lets a second socket bind the same port
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 1)
+        else:
+            # Still refuses to bind while another socket listens; only skips TIME_WAIT
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            sock.bind((CONTROL_HOST, self.port))
+            sock.listen(8)
+        except OSError:
+            sock.close()
+            if send_command("status", port=self.port) is None:
+                raise RuntimeError(f"Port {self.port} is used by another program, so FocusBlocker can't check that "
+                                   f"it runs only once. Close that program or set {ENV_PORT} to a free port.")
+            return False
+
+        self._sock = sock
+        self._token = secrets.token_hex(16)
+        _write_token(self._token)
+        threading.Thread(target=self._serve, name="control-server", daemon=True).start()
+        return True
+
+    def close(self):
+        """Releases the port, letting the next launch become the running instance."""
+        sock, self._sock = self._sock, None
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR) # Wakes up the blocked accept()
+            except OSError:
+                pass
+            sock.close()
+            if _read_token() == self._token:
+                os.remove(TOKEN_FILE)
+
+    def _serve(self):
+        sock = self._sock
+        while True:
+            try:
+                conn, _ = sock.accept()
+            except OSError:
+                return # Closed
+            threading.Thread(target=self._handle_connection, args=(conn,), daemon=True).start()
+
+    def _handle_connection(self, conn):
+        with conn:
+            conn.settimeout(REQUEST_TIMEOUT)
+            try:
+                with conn.makefile("rb") as stream:
+                    line = stream.readline(MAX_REQUEST_BYTES)
+                try:
+                    response = self._dispatch(json.loads(line))
+                except ValueError:
+                    response = {"ok": False, "error": "Malformed request."}
+                response["protocol"] = PROTOCOL
+                conn.sendall(json.dumps(response).encode("utf-8") + b"\n")
+            except OSError as e:
+                print(f"Error handling control request: {e}")
+
+    def _dispatch(self, request):
+        if not isinstance(request, dict) or not hmac.compare_digest(str(request.get("token", "")), self._token):
+            return {"ok": False, "error": "Invalid control token."}
+        command = request.get("command")
+        handler = self.handlers.get(command)
+        if handler is None:
+            return {"ok": False, "error": f"Unknown command: {command}"}
+        try:
+            return {"ok": True, **(handler(**request.get("params", {})) or {})}
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+def send_command(command, port=None, **params):
+    """
+    Sends command to the running instance and returns its response dict, or None if no
+    instance is running (nothing listens on the port, or what does isn't FocusBlocker).
+    """
+    port = port if port is not None else CONTROL_PORT
+    try:
+        conn = socket.create_connection((CONTROL_HOST, port), timeout=REQUEST_TIMEOUT)
+    except OSError:
+        return None
+    request = {"token": _read_token(), "command": command, "params": params}
+    try:
+        with conn:
+            conn.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            with conn.makefile("rb") as stream:
+                response = json.loads(stream.readline(MAX_REQUEST_BYTES))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(response, dict) or response.get("protocol") != PROTOCOL:
+        return None
+    return response
@@ -1,21 +1,31 @@
 import os
 import sys
-import ctypes
+import bisect
+import threading
+from concurrent.futures import Future
 import customtkinter as ctk
 from tkinter import messagebox
-from datetime import datetime, timedelta
-from tkcalendar import Calendar, DateEntry
+from datetime import datetime
+# tkcalendar (and the babel locale data it loads) is imported when the calendar is first opened
 
 import blocker_core as bc
+import db_core
+import instance_core
+import metrics_core
+import sync_core
 from timer_logic import FocusTimer
 import tracker_core as tc
+import widgets
 
 ctk.set_appearance_mode("System")
 ctk.set_default_color_theme("blue")
 
+UI_CALL_TIMEOUT = 3 # Seconds a forwarded command waits for the Tk thread to run it
+
 def is_admin():
     if os.name == 'nt':
         try:
+            import ctypes
             return ctypes.windll.shell32.IsUserAnAdmin()
         except:
             return False
@@ -90,12 +100,23 @@ class BlockerGUI(ctk.CTk):
         self.timer_entry.insert(0, "25")
         self.timer_entry.pack(pady=(0, 10))
 
+        ctk.CTkLabel(timer_input_frame, text="Blocklist Profile:", font=self.label_font).pack(pady=(0, 5))
+        self.profile_var = ctk.StringVar(value=bc.DEFAULT_PROFILE_NAME)
+        # Filled in by _deferred_init once the database is ready
+        self.profile_menu = ctk.CTkOptionMenu(timer_input_frame, variable=self.profile_var,
+                                              values=[bc.DEFAULT_PROFILE_NAME], font=self.small_font)
+        self.profile_menu.pack(pady=(0, 10))
+
         self.countdown_label = ctk.CTkLabel(self.inner_content_frame, text="Ready to focus!", font=self.countdown_font, text_color="#4CAF50")
         self.countdown_label.pack(pady=15)
 
         self.focus_timer = None
         self.timer_running = False
         self.session_start_time = None
+        self.journal_id = None # active_sessions row of the running session
+        # Set once crash recovery has run; until then no session may start, or recovery
+        # would take its journal row for an orphan
+        self._recovery_done = threading.Event()
 
         # --- Control Buttons Frame ---
         button_frame = ctk.CTkFrame(self.inner_content_frame, fg_color="transparent")
@@ -108,7 +129,8 @@ class BlockerGUI(ctk.CTk):
         self.exit_color = "#7F8C8D" # Gray
         self.fullscreen_toggle_color = "#F39C12" # Orange for fullscreen toggle
 
-        ctk.CTkButton(button_frame, text="🚀 Start Focus Mode", command=self.start_focus_with_timer, font=self.button_font, fg_color=self.start_color, hover_color="#27AE60", corner_radius=8).pack(pady=7, fill=ctk.X, ipady=5)
+        self.start_button = ctk.CTkButton(button_frame, text="🚀 Start Focus Mode", command=self.start_focus_with_timer, font=self.button_font, fg_color=self.start_color, hover_color="#27AE60", corner_radius=8, state="disabled") # Enabled by _apply_recovery
+        self.start_button.pack(pady=7, fill=ctk.X, ipady=5)
         ctk.CTkButton(button_frame, text="🛑 Stop Focus Mode", command=self.stop_focus, font=self.button_font, fg_color=self.stop_color, hover_color="#C0392B", corner_radius=8).pack(pady=7, fill=ctk.X, ipady=5)
         ctk.CTkButton(button_frame, text="🚫 Edit Blocklist", command=self.edit_blocklist, font=self.button_font, fg_color=self.edit_color, hover_color="#2980B9", corner_radius=8).pack(pady=7, fill=ctk.X, ipady=5)
         ctk.CTkButton(button_frame, text="📅 View Activity Calendar", command=self.view_activity_calendar, font=self.button_font, fg_color=self.calendar_color, hover_color="#8E44AD", corner_radius=8).pack(pady=7, fill=ctk.X, ipady=5)
@@ -127,7 +149,20 @@ class BlockerGUI(ctk.CTk):
         self.total_time_label = ctk.CTkLabel(stats_frame, text="", font=self.small_font)
         self.total_time_label.pack(pady=(5, 10))
 
-        self._update_activity_display()
+        self._total_focus_minutes = 0.0
+        self._calendar_events = {} # {tag: {date: event id}} of the events currently shown on self.cal
+        self.streak_label.configure(text="Loading your focus history...")
+
+        # Database setup and the first stats query run after the window has been drawn
+        self.after_idle(lambda: self.after(0, self._start_deferred_init))
+
+        # Apply data-layer changes as deltas instead of re-reading streaks and history
+        db_core.subscribe(db_core.SESSION_RECORDED, self._on_session_recorded)
+        db_core.subscribe(db_core.STREAK_UPDATED, self._on_streak_updated)
+        db_core.subscribe(db_core.SCHEDULE_ADDED, self._on_schedule_changed)
+        db_core.subscribe(db_core.SCHEDULE_UPDATED, self._on_schedule_changed)
+        db_core.subscribe(db_core.SCHEDULE_DELETED, self._on_schedule_changed)
+
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
 
     def toggle_fullscreen(self, event=None):
@@ -154,16 +189,121 @@ class BlockerGUI(ctk.CTk):
 
     def _update_activity_display(self):
         current_streak, longest_streak = tc.get_streak_info()
-        sessions, total_duration = tc.get_session_history()
+        self._total_focus_minutes = tc.get_total_focus_minutes()
+        self._show_streak(current_streak, longest_streak)
+        self.total_time_label.configure(text=f"⏱️ Total Focus Time: {self._total_focus_minutes:.1f} minutes")
+
+    def _start_deferred_init(self):
+        threading.Thread(target=self._deferred_init, daemon=True).start()
+
+    def _deferred_init(self):
+        """Runs on a worker thread once the first frame is up: prepares the DB and loads the stats."""
+        resumed_session = None
+        try:
+            tc.init_db()
+            bc.init_db()
+            profile_names = [name for _, name in bc.get_profiles()]
+            self.after(0, lambda: self.profile_menu.configure(values=profile_names))
+            _, resumed_session = tc.recover_orphaned_sessions()
+        except Exception as e:
+            print(f"Error initializing the database: {e}")
+        self.after(0, lambda: self._apply_recovery(resumed_session)) # Also when init failed, so Start is enabled
+        try:
+            tc.get_streak_info()
+            tc.get_total_focus_minutes() # Warms the read cache for _update_activity_display
+        except Exception as e:
+            print(f"Error initializing the database: {e}")
+        self.after(0, self._update_activity_display)
+
+    def _apply_recovery(self, resumed_session):
+        """
+        Resumes a session interrupted by a crash, or unblocks the sites a crashed session
+        left blocked. Sessions can be started from then on.
+        """
+        try:
+            if resumed_session is not None:
+                remaining_seconds = resumed_session.remaining_seconds(tc.to_epoch(datetime.now())[0])
+                self._start_timed_session(remaining_seconds / 60, resumed_session)
+            elif not self.timer_running and bc.is_blocking(): # Never strip a running session's sites
+                bc.unblock_all()
+        except OSError as e:
+            print(f"Error reconciling the hosts file: {e}")
+        finally:
+            self.start_button.configure(state="normal")
+            self._recovery_done.set()
+
+    def _show_streak(self, current_streak, longest_streak):
         self.streak_label.configure(text=f"🔥 Current Streak: {current_streak} days (Longest: {longest_streak} days)")
-        self.total_time_label.configure(text=f"⏱️ Total Focus Time: {total_duration:.1f} minutes")
 
-    def start_focus(self):
+    # --- Change notifications (may arrive from any thread, so they are applied via after()) ---
+
+    def _calendar_is_open(self):
+        return hasattr(self, 'cal') and self.cal.winfo_exists()
+
+    def _on_session_recorded(self, session_id, session_date, duration_minutes):
+        def apply():
+            self._total_focus_minutes += duration_minutes
+            self.total_time_label.configure(text=f"⏱️ Total Focus Time: {self._total_focus_minutes:.1f} minutes")
+            if self._calendar_is_open():
+                self.daily_durations[session_date] = self.daily_durations.get(session_date, 0) + duration_minutes
+                self._set_calendar_event('focus_day', 'Past Focus', session_date, True)
+        self.after(0, apply)
+
+    def _on_streak_updated(self, current_streak, longest_streak):
+        self.after(0, lambda: self._show_streak(current_streak, longest_streak))
+
+    def _on_schedule_changed(self, schedule_id, scheduled_date, status=None):
+        self.after(0, lambda: self._sync_scheduled_date(scheduled_date))
+
+    def _sync_scheduled_date(self, day):
+        """Adds or removes the calendar mark for a single date, based on its pending schedules."""
+        if day is None or not self._calendar_is_open():
+            return
+        has_pending = bool(tc.get_pending_schedules_for_date(day))
+        self._set_calendar_event('scheduled_event', 'S', day, has_pending)
+
+    # --- Calendar event index ---
+
+    def _set_calendar_event(self, tag, text, day, present):
+        """Shows or hides the single `tag` event on day, touching nothing else."""
+        shown = self._calendar_events.setdefault(tag, {})
+        if present and day not in shown:
+            shown[day] = self.cal.calevent_create(day, text, tag)
+        elif not present and day in shown:
+            self.cal.calevent_remove(shown.pop(day))
+
+    def _sync_calendar_events(self, tag, text, dates):
+        """
+        Makes the calendar show one `tag` event on each of dates, creating and removing
+        only the events that differ from the ones currently shown.
+        """
+        shown = self._calendar_events.setdefault(tag, {})
+        wanted = set(dates)
+        for stale_date in shown.keys() - wanted:
+            self.cal.calevent_remove(shown.pop(stale_date))
+        for new_date in wanted - shown.keys():
+            shown[new_date] = self.cal.calevent_create(new_date, text, tag)
+
+    def _selected_profile_id(self):
+        return bc.get_profile_id(self.profile_var.get()) or bc.DEFAULT_PROFILE_ID
+
+    def start_focus(self, planned_minutes=None, resumed_session=None):
         try:
-            bc.block_sites()
-            bc.start_focus_server()
+            if resumed_session is not None:
+                bc.block_sites(resumed_session.profile_id or bc.DEFAULT_PROFILE_ID)
+                self.session_start_time = resumed_session.start
+                self.journal_id = resumed_session.id
+                session_start_ts = resumed_session.start_ts
+                planned_minutes = resumed_session.planned_minutes
+            else:
+                profile_id = self._selected_profile_id()
+                bc.block_sites(profile_id) # Swaps in the profile's pre-rendered hosts section
+                self.session_start_time = datetime.now()
+                self.journal_id = tc.begin_session(self.session_start_time, planned_minutes, profile_id)
+                session_start_ts = tc.to_epoch(self.session_start_time)[0]
+            session_end_ts = session_start_ts + round(planned_minutes * 60) if planned_minutes is not None else None
+            bc.start_focus_server(session_start_ts=session_start_ts, session_end_ts=session_end_ts)
             self.status_label.configure(text="Status: Focus Mode ON", text_color="green")
-            self.session_start_time = datetime.now()
         except PermissionError:
             messagebox.showerror("Permission Error", "Admin rights required to modify the hosts file. Please restart as Administrator.")
             self.stop_focus()
@@ -182,25 +322,43 @@ class BlockerGUI(ctk.CTk):
             self.status_label.configure(text="Status: Inactive", text_color="red")
             self.countdown_label.configure(text="Ready to focus!", text_color="#4CAF50") # Use a defined color
 
-            if self.session_start_time:
-                session_end_time = datetime.now()
-                if (session_end_time - self.session_start_time).total_seconds() >= 1:
-                    tc.record_session(self.session_start_time, session_end_time)
+            if self.journal_id is not None:
+                journal_id, self.journal_id = self.journal_id, None
+                # The labels are updated by the session_recorded/streak_updated notifications
+                if tc.finish_session(journal_id, datetime.now()) is not None:
                     tc.update_streak()
-                self.session_start_time = None
-            self._update_activity_display()
+            self.session_start_time = None
         except PermissionError:
             messagebox.showwarning("Permission Warning", "Admin rights required to unblock sites. Please manually check your hosts file.")
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred while stopping Focus Mode: {e}")
 
     def edit_blocklist(self):
+        profile_id = self._selected_profile_id()
         editor = ctk.CTkToplevel(self)
         editor.title("Edit Blocked Websites")
-        editor.geometry("450x500")
+        editor.geometry("450x540")
         editor.transient(self)
         editor.grab_set()
 
+        profile_frame = ctk.CTkFrame(editor, fg_color="transparent")
+        profile_frame.pack(pady=(10, 0), padx=10, fill=ctk.X)
+        ctk.CTkLabel(profile_frame, text=f"Profile: {self.profile_var.get()}", font=self.label_font).pack(side=ctk.LEFT)
+
+        def new_profile():
+            name = ctk.CTkInputDialog(text="Name of the new profile:", title="New Profile").get_input()
+            if not name or not name.strip():
+                return
+            if bc.create_profile(name.strip()) is None:
+                messagebox.showwarning("Duplicate", f"A profile called '{name.strip()}' already exists.", parent=editor)
+                return
+            self.profile_menu.configure(values=[profile_name for _, profile_name in bc.get_profiles()])
+            self.profile_var.set(name.strip())
+            editor.destroy()
+            self.edit_blocklist() # Reopen on the new, empty profile
+
+        ctk.CTkButton(profile_frame, text="New Profile", command=new_profile, font=self.small_font, width=100, corner_radius=6).pack(side=ctk.RIGHT)
+
         ctk.CTkLabel(editor, text="Blocked Sites:", font=self.label_font).pack(pady=10)
 
         input_frame = ctk.CTkFrame(editor, fg_color="transparent")
@@ -209,31 +367,44 @@ class BlockerGUI(ctk.CTk):
         new_site_entry = ctk.CTkEntry(input_frame, placeholder_text="Enter site to block (e.g., youtube.com)", width=250, font=self.small_font, corner_radius=6)
         new_site_entry.pack(side=ctk.LEFT, expand=True, fill=ctk.X, padx=(0,10))
 
-        self.blocklist_scrollable_frame = ctk.CTkScrollableFrame(editor, height=250, corner_radius=10) # Instance variable if accessed elsewhere
-        self.blocklist_scrollable_frame.pack(padx=10, pady=5, fill=ctk.BOTH, expand=True)
-
-        def populate_blocklist_display():
-            for widget in self.blocklist_scrollable_frame.winfo_children():
-                widget.destroy()
-            current_blocklist = sorted(list(bc.get_blocklist()))
-            for site in current_blocklist:
-                item_frame = ctk.CTkFrame(self.blocklist_scrollable_frame, fg_color=("gray85", "gray20"))
-                item_frame.pack(fill=ctk.X, pady=2, padx=2)
-                
-                site_label = ctk.CTkLabel(item_frame, text=site, font=self.small_font)
-                site_label.pack(side=ctk.LEFT, padx=5, pady=5, expand=True, fill=ctk.X) # Make label expand
-                
-                remove_button = ctk.CTkButton(item_frame, text="X", font=self.small_font, # Shorter text
-                                              width=30, height=20, corner_radius=5, # Smaller button
-                                              fg_color=self.stop_color, hover_color="#C0392B",
-                                              command=lambda s=site: remove_site(s))
-                remove_button.pack(side=ctk.RIGHT, padx=5, pady=5)
+        search_var = ctk.StringVar()
+        search_entry = ctk.CTkEntry(editor, textvariable=search_var, placeholder_text="Search blocked sites...", font=self.small_font, corner_radius=6)
+        search_entry.pack(pady=(5, 0), padx=10, fill=ctk.X)
+
+        # Local sorted copy of the blocklist; it is also the prefix index used for searching
+        sorted_sites = list(bc.get_sorted_blocklist(profile_id))
+
+        def make_site_row(parent):
+            item_frame = ctk.CTkFrame(parent, fg_color=("gray85", "gray20"))
+            item_frame.site_label = ctk.CTkLabel(item_frame, text="", font=self.small_font, anchor='w')
+            item_frame.site_label.pack(side=ctk.LEFT, padx=5, pady=5, expand=True, fill=ctk.X) # Make label expand
+            item_frame.remove_button = ctk.CTkButton(item_frame, text="X", font=self.small_font, # Shorter text
+                                                     width=30, height=20, corner_radius=5, # Smaller button
+                                                     fg_color=self.stop_color, hover_color="#C0392B")
+            item_frame.remove_button.pack(side=ctk.RIGHT, padx=5, pady=5)
+            return item_frame
+
+        def bind_site_row(item_frame, site):
+            item_frame.site_label.configure(text=site)
+            item_frame.remove_button.configure(command=lambda s=site: remove_site(s))
+
+        # Only the visible rows exist as widgets, so large imported lists stay responsive
+        self.blocklist_view = widgets.VirtualList(editor, make_site_row, bind_site_row, visible_rows=8, corner_radius=10)
+        self.blocklist_view.pack(padx=10, pady=5, fill=ctk.BOTH, expand=True)
+
+        def populate_blocklist_display(*_):
+            prefix = search_var.get().strip().lower()
+            empty_text = "No matching sites." if prefix else "No sites blocked yet."
+            self.blocklist_view.set_items(bc.find_sites(sorted_sites, prefix), empty_text)
+
+        search_var.trace_add("write", populate_blocklist_display)
 
         def add_site_to_blocklist():
             site = new_site_entry.get().strip().lower()
             if site:
-                if bc.add_to_blocklist(site):
+                if bc.add_to_blocklist(site, profile_id):
                     messagebox.showinfo("Success", f"'{site}' added to blocklist.", parent=editor)
+                    bisect.insort(sorted_sites, site)
                     populate_blocklist_display()
                     new_site_entry.delete(0, ctk.END)
                 else:
@@ -246,8 +417,11 @@ class BlockerGUI(ctk.CTk):
 
         def remove_site(site_to_remove):
             if messagebox.askyesno("Confirm Removal", f"Are you sure you want to remove '{site_to_remove}' from the blocklist?", parent=editor):
-                bc.remove_from_blocklist(site_to_remove)
+                bc.remove_from_blocklist(site_to_remove, profile_id)
                 messagebox.showinfo("Success", f"'{site_to_remove}' removed from blocklist.", parent=editor)
+                index = bisect.bisect_left(sorted_sites, site_to_remove)
+                if index < len(sorted_sites) and sorted_sites[index] == site_to_remove:
+                    del sorted_sites[index]
                 populate_blocklist_display()
 
         populate_blocklist_display()
@@ -267,129 +441,114 @@ class BlockerGUI(ctk.CTk):
         except ValueError:
             messagebox.showerror("Invalid Input", "Please enter a valid number of minutes (greater than 0).")
             return
+        self._start_timed_session(duration_in_minutes)
 
-        self.start_focus()
+    def _start_timed_session(self, duration_in_minutes, resumed_session=None):
+        self.start_focus(duration_in_minutes, resumed_session)
         # Only proceed if start_focus didn't encounter a permission error that stopped it
         if "Focus Mode ON" in self.status_label.cget("text"):
             # Pass duration_in_minutes directly to FocusTimer,
             # assuming FocusTimer is designed to accept its duration in minutes.
-            self.focus_timer = FocusTimer(duration_in_minutes, self._update_countdown_display, self._on_timer_complete)
+            self.focus_timer = FocusTimer(duration_in_minutes, self._update_countdown_display, self._on_timer_complete,
+                                          self._checkpoint_session, tc.CHECKPOINT_INTERVAL_SECONDS)
             self.focus_timer.start_timer()
             self.timer_running = True
             # Ensure text_color is set appropriately; using a theme color or a specific hex.
             # Using a color that generally contrasts well. You can adjust as needed.
             active_timer_color = ("#007ACC", "#60BFFF") # Dark mode, Light mode blue
             self.countdown_label.configure(text_color=active_timer_color)
-    def _update_countdown_display(self, mins, secs):
-        self.after(0, lambda: self.countdown_label.configure(text=f"⏳ Time Left: {mins:02}:{secs:02}"))
-
-    def _on_timer_complete(self):
-        self.after(0, lambda: self.countdown_label.configure(text="✅ Time's up!", text_color="#4CAF50")) # Use a defined color
-        self.after(1000, self.stop_focus)
 
-    def view_activity_calendar(self):
-        calendar_viewer = ctk.CTkToplevel(self)
-        calendar_viewer.title("Focus Activity Calendar")
-        calendar_viewer.geometry("600x650") 
-        calendar_viewer.transient(self)
-        calendar_viewer.grab_set()
-
-        ctk.CTkLabel(calendar_viewer, text="Your Focus History", font=self.header_font).pack(pady=10)
-
-        cal_container_frame = ctk.CTkFrame(calendar_viewer, corner_radius=10)
-        cal_container_frame.pack(pady=10, padx=10, fill=ctk.BOTH, expand=True)
-        
-        sessions, _ = tc.get_session_history()
-        daily_durations = {}
-        dates_to_highlight = []
-
-        for s in sessions:
-            session_start_dt = datetime.fromisoformat(s['start'])
-            session_date = session_start_dt.date()
-            daily_durations[session_date] = daily_durations.get(session_date, 0) + s['duration_minutes']
-            if session_date not in dates_to_highlight:
-                dates_to_highlight.append(session_date)
-        
-        ctk_bg_color = self._apply_appearance_mode(ctk.ThemeManager.theme["CTkFrame"]["fg_color"])
-        ctk_text_color = self._apply_appearance_mode(ctk.ThemeManager.theme["CTkLabel"]["text_color"])
-        ctk_btn_color = self._apply_appearance_mode(ctk.ThemeManager.theme["CTkButton"]["fg_color"])
+    def _checkpoint_session(self):
+        journal_id = self.journal_id
+        if journal_id is not None:
+            tc.checkpoint_session(journal_id) # Only queues the write; runs on the timer thread
 
-        self.cal = Calendar(cal_container_frame, selectmode='day',
-                            font="Arial 10",
-                            background=ctk_bg_color, 
-                            foreground=ctk_text_color,
-                            headersbackground=ctk_btn_color, 
-                            headersforeground=self._apply_appearance_mode(ctk.ThemeManager.theme["CTkButton"]["text_color"]),
-                            normalbackground=ctk_bg_color, 
-                            normalforeground=ctk_text_color,
-                            selectbackground=self._apply_appearance_mode(ctk.ThemeManager.theme["CTkEntry"]["fg_color"]),
-                            selectforeground=ctk_text_color,
-                            weekendbackground=self._apply_appearance_mode(ctk.ThemeManager.theme["CTkFrame"]["top_fg_color"]),
-                            weekendforeground=ctk_text_color,
-                            othermonthbackground=self._apply_appearance_mode(ctk.ThemeManager.theme["CTkFrame"]["top_fg_color"]),
-                            othermonthforeground="gray",
-                            bordercolor=self._apply_appearance_mode(ctk.ThemeManager.theme["CTkFrame"]["border_color"]),
-                            borderwidth=1, locale='en_US', cursor="hand1", date_pattern='yyyy-mm-dd')
-        self.cal.pack(pady=10, padx=10, fill=ctk.BOTH, expand=True)
-        
-        for focus_date in dates_to_highlight:
-             self.cal.calevent_create(focus_date, 'Focused Day', 'focus_day')
-        
-        highlight_color = "#3498DB"
-        self.cal.tag_config('focus_day', background=highlight_color, foreground='white')
+    # --- Control Channel ---
+    # Commands forwarded by a second launch or the CLI (see instance_core) arrive on a
+    # connection thread and are run on the Tk thread.
 
-        self.daily_summary_label = ctk.CTkLabel(calendar_viewer, text="Click on a date to see daily summary.", font=self.small_font)
-        self.daily_summary_label.pack(pady=10)
+    def control_handlers(self):
+        return {"show": self._control_show, "start": self._control_start,
+                "stop": self._control_stop, "status": self._control_status, "allow": self._control_allow}
 
-        def on_date_select(event=None):
+    def _call_in_ui_thread(self, func):
+        future = Future()
+        def run():
             try:
-                selected_date_str = self.cal.get_date()
-                selected_date = datetime.strptime(selected_date_str, '%Y-%m-%d').date()
-            except ValueError:
-                 self.daily_summary_label.configure(text="Please select a valid date.")
-                 return
-
-            total_for_day = daily_durations.get(selected_date, 0)
-            if total_for_day > 0:
-                self.daily_summary_label.configure(text=f"Focus Time on {selected_date.strftime('%Y-%m-%d')}: {total_for_day:.1f} minutes")
-            else:
-                self.daily_summary_label.configure(text=f"No focus sessions on {selected_date.strftime('%Y-%m-%d')}.")
-        
-        self.cal.bind("<<CalendarSelected>>", on_date_select)
-        on_date_select() 
+                future.set_result(func())
+            except Exception as e:
+                future.set_exception(e)
+        self.after(0, run)
+        return future.result(timeout=UI_CALL_TIMEOUT)
+
+    def _control_show(self):
+        def show():
+            self.deiconify()
+            self.lift()
+            self.focus_force()
+        self._call_in_ui_thread(show)
+        return {}
+
+    def _control_start(self, minutes, profile=None):
+        if not self._recovery_done.wait(UI_CALL_TIMEOUT):
+            raise RuntimeError("FocusBlocker is still starting up. Please try again in a moment.")
+        def start():
+            if self.timer_running:
+                raise RuntimeError("A focus session is already active. Please stop it first.")
+            if profile is not None:
+                if bc.get_profile_id(profile) is None:
+                    raise RuntimeError(f"No profile called '{profile}'.")
+                self.profile_var.set(profile)
+            self.timer_entry.delete(0, ctk.END)
+            self.timer_entry.insert(0, str(minutes))
+            self._start_timed_session(int(minutes))
+            if not self.timer_running:
+                raise RuntimeError("Focus Mode could not be started, see the FocusBlocker window.")
+        self._call_in_ui_thread(start)
+        return self._control_status()
+
+    def _control_stop(self):
+        self._call_in_ui_thread(self.stop_focus)
+        return {}
+
+    def _control_status(self):
+        focus_timer = self.focus_timer
+        active = self.timer_running and focus_timer is not None
+        return {"active": active, "pid": os.getpid(),
+                "remaining_seconds": focus_timer.remaining_time if active else 0,
+                "allowances": bc.get_allowances()}
+
+    def _control_allow(self, site, minutes=5, revoke=False):
+        # blocker_core serializes hosts file writes itself, so this runs on the connection thread
+        if revoke:
+            return {"revoked": bc.revoke_allowance(site)}
+        return {"expires_ts": bc.allow_site(site, minutes)}
 
-        current_streak, longest_streak = tc.get_streak_info()
-        _, total_duration_all = tc.get_session_history()
-        
-        ctk.CTkLabel(calendar_viewer, text=f"Current Streak: {current_streak} days | Longest Streak: {longest_streak} days",
-                     font=self.small_font, text_color=("gray10", "gray90")).pack(pady=(0, 5))
-        ctk.CTkLabel(calendar_viewer, text=f"Overall Focus Time: {total_duration_all:.1f} minutes",
-                     font=self.small_font, text_color=("gray10", "gray90")).pack(pady=(0, 10))
+    def _update_countdown_display(self, mins, secs):
+        self.after(0, lambda: self.countdown_label.configure(text=f"⏳ Time Left: {mins:02}:{secs:02}"))
 
-        ctk.CTkButton(calendar_viewer, text="Close", command=calendar_viewer.destroy, font=self.button_font, corner_radius=8).pack(pady=5)
+    def _on_timer_complete(self):
+        self.after(0, lambda: self.countdown_label.configure(text="✅ Time's up!", text_color="#4CAF50")) # Use a defined color
+        self.after(1000, self.stop_focus)
 
     def refresh_calendar_schedule_highlights(self):
         if not hasattr(self, 'cal') or not self.cal.winfo_exists():
             return
         
-        # Clear previous scheduled events from calendar view
-        try:
-            self.cal.calevent_remove(tag='scheduled_event')
-        except Exception: # Might fail if tag doesn't exist yet
-            pass
-
         pending_schedules = tc.get_upcoming_pending_schedules()
         scheduled_dates_to_mark = set()
         for sched in pending_schedules:
-            scheduled_dates_to_mark.add(sched['scheduled_datetime'].date())
+            scheduled_dates_to_mark.add(sched.scheduled_datetime.date())
         
-        for sched_date in scheduled_dates_to_mark:
-            # Ensure event_text is simple, actual details shown below calendar
-            self.cal.calevent_create(sched_date, 'S', 'scheduled_event') 
+        # Only create/remove the events that changed since the last refresh.
+        # Ensure event_text is simple, actual details shown below calendar
+        self._sync_calendar_events('scheduled_event', 'S', scheduled_dates_to_mark)
         self.cal.tag_config('scheduled_event', background='orange', foreground='black')
 
 
     def view_activity_calendar(self):
+        from tkcalendar import Calendar # Deferred: only needed once the calendar is opened
+
         # ... (setup for calendar_viewer_window Toplevel, title, geometry) ...
         self.calendar_viewer_window = ctk.CTkToplevel(self) # Store reference
         self.calendar_viewer_window.title("Focus Activity & Scheduling")
@@ -405,19 +564,9 @@ class BlockerGUI(ctk.CTk):
         cal_container_frame.pack(pady=10, padx=10, fill=ctk.BOTH, expand=True)
 
         # --- Initialize and populate daily_durations for past sessions FIRST ---
-        past_sessions_data, _ = tc.get_session_history()
-        past_focus_dates = []
-        daily_durations = {} # DEFINED AND INITIALIZED HERE
-        for s_past in past_sessions_data:
-            try:
-                session_start_dt = datetime.fromisoformat(s_past['start'])
-                session_date = session_start_dt.date()
-                daily_durations[session_date] = daily_durations.get(session_date, 0) + s_past['duration_minutes'] # POPULATED HERE
-                if session_date not in past_focus_dates:
-                    past_focus_dates.append(session_date)
-            except ValueError:
-                print(f"Warning: Could not parse date from past session: {s_past.get('start')}")
-                continue
+        daily_durations = tc.get_daily_totals() # DEFINED AND INITIALIZED HERE
+        self.daily_durations = daily_durations # Kept so recorded sessions can be added as they happen
+        past_focus_dates = list(daily_durations)
         # --- End of daily_durations initialization ---
 
         # --- Calendar Widget setup ---
@@ -439,10 +588,10 @@ class BlockerGUI(ctk.CTk):
                             date_pattern='yyyy-mm-dd', # Ensure this pattern is used
                             locale='en_US',
                             cursor="hand1")
+        self._calendar_events = {} # A new calendar widget starts without events
         
         # Highlight past focus days using the populated daily_durations/past_focus_dates
-        for focus_date_past in past_focus_dates:
-            self.cal.calevent_create(focus_date_past, 'Past Focus', 'focus_day')
+        self._sync_calendar_events('focus_day', 'Past Focus', past_focus_dates)
         self.cal.tag_config('focus_day', background="#3498DB", foreground='white') # Blue for past focus
 
         self.refresh_calendar_schedule_highlights() # For future scheduled events
@@ -465,6 +614,9 @@ class BlockerGUI(ctk.CTk):
         # --- Frame to list scheduled items for the selected date ---
         self.scheduled_items_listbox_frame = ctk.CTkScrollableFrame(self.calendar_viewer_window, height=150, label_text="Scheduled for Selected Date")
         self.scheduled_items_listbox_frame.pack(pady=5, padx=10, fill=ctk.X)
+        # Row widgets are reused across date clicks instead of being rebuilt each time
+        self.scheduled_items_pool = widgets.RowPool(self.scheduled_items_listbox_frame,
+                                                    self._make_scheduled_item_row, self._bind_scheduled_item_row)
         self._update_scheduled_items_display(None) # Initial placeholder
 
 
@@ -476,7 +628,7 @@ class BlockerGUI(ctk.CTk):
 
         # --- Overall Streak and Focus Time (as before) ---
         current_streak_overall, longest_streak_overall = tc.get_streak_info()
-        _, total_duration_all_sessions = tc.get_session_history()
+        total_duration_all_sessions = tc.get_total_focus_minutes()
         
         ctk.CTkLabel(self.calendar_viewer_window, text=f"Current Streak: {current_streak_overall} days | Longest: {longest_streak_overall} days",
                      font=self.small_font).pack(pady=(5, 0))
@@ -518,39 +670,36 @@ class BlockerGUI(ctk.CTk):
             self.add_schedule_button.configure(state=ctk.NORMAL, text=f"Schedule for {selected_date_obj.strftime('%b %d')}")
             self._update_scheduled_items_display(selected_date_obj)
 
-    def _update_scheduled_items_display(self, date_obj):
-        for widget in self.scheduled_items_listbox_frame.winfo_children():
-            widget.destroy()
+    def _make_scheduled_item_row(self, parent):
+        item_frame = ctk.CTkFrame(parent)
+        item_frame.item_label = ctk.CTkLabel(item_frame, text="")
+        item_frame.item_label.pack(side=ctk.LEFT, padx=5, expand=True, anchor='w')
+        item_frame.edit_btn = ctk.CTkButton(item_frame, text="Edit", width=50)
+        item_frame.edit_btn.pack(side=ctk.RIGHT, padx=2)
+        item_frame.del_btn = ctk.CTkButton(item_frame, text="Del", width=40, fg_color="tomato")
+        item_frame.del_btn.pack(side=ctk.RIGHT, padx=2)
+        return item_frame
+
+    def _bind_scheduled_item_row(self, item_frame, sched):
+        item_text = f"{sched.scheduled_datetime.strftime('%H:%M')} for {sched.duration_minutes}m"
+        if sched.notes: item_text += f" ({sched.notes[:20]}...)"
+        item_frame.item_label.configure(text=item_text)
+        item_frame.edit_btn.configure(command=lambda s=sched: self.open_schedule_dialog(existing_schedule=s))
+        item_frame.del_btn.configure(command=lambda s_id=sched.id: self._delete_schedule_action(s_id))
 
+    def _update_scheduled_items_display(self, date_obj):
         if date_obj is None:
-            ctk.CTkLabel(self.scheduled_items_listbox_frame, text="Past date selected or no date.").pack(pady=5)
+            self.scheduled_items_pool.show((), "Past date selected or no date.")
             return
 
-        schedules = tc.get_scheduled_sessions(start_date=date_obj, end_date=date_obj, status_filter='pending')
-        if not schedules:
-            ctk.CTkLabel(self.scheduled_items_listbox_frame, text="No pending schedules for this date.").pack(pady=5)
-        else:
-            for sched in schedules:
-                item_text = f"{sched['scheduled_datetime'].strftime('%H:%M')} for {sched['duration_minutes']}m"
-                if sched['notes']: item_text += f" ({sched['notes'][:20]}...)"
-                
-                item_frame = ctk.CTkFrame(self.scheduled_items_listbox_frame)
-                item_frame.pack(fill=ctk.X, pady=2)
-                ctk.CTkLabel(item_frame, text=item_text).pack(side=ctk.LEFT, padx=5, expand=True, anchor='w')
-                
-                edit_btn = ctk.CTkButton(item_frame, text="Edit", width=50,
-                                        command=lambda s=sched: self.open_schedule_dialog(existing_schedule=s))
-                edit_btn.pack(side=ctk.RIGHT, padx=2)
-                
-                del_btn = ctk.CTkButton(item_frame, text="Del", width=40, fg_color="tomato",
-                                        command=lambda s_id=sched['id']: self._delete_schedule_action(s_id))
-                del_btn.pack(side=ctk.RIGHT, padx=2)
+        schedules = tc.get_pending_schedules_for_date(date_obj)
+        self.scheduled_items_pool.show(schedules, "No pending schedules for this date.")
 
     def _delete_schedule_action(self, schedule_id):
         if messagebox.askyesno("Confirm Delete", "Delete this scheduled session?"):
             if tc.delete_scheduled_session(schedule_id):
                 messagebox.showinfo("Success", "Schedule deleted.")
-                self.refresh_calendar_schedule_highlights()
+                # The calendar mark is updated by the schedule_deleted notification
                 # Refresh the list for the currently selected date
                 if hasattr(self, 'cal') and self.cal.winfo_exists() and self.cal.selection_get():
                     self._update_scheduled_items_display(self.cal.selection_get())
@@ -575,12 +724,12 @@ class BlockerGUI(ctk.CTk):
         if existing_schedule:
             dialog.title("Edit Schedule")
             # Pre-fill fields from existing_schedule
-            schedule_dt = existing_schedule['scheduled_datetime']
+            schedule_dt = existing_schedule.scheduled_datetime
             initial_date = schedule_dt.date()
             initial_hour = f"{schedule_dt.hour:02d}"
             initial_minute = f"{schedule_dt.minute:02d}"
-            initial_duration = str(existing_schedule['duration_minutes'])
-            initial_notes = existing_schedule['notes'] if existing_schedule['notes'] else ""
+            initial_duration = str(existing_schedule.duration_minutes)
+            initial_notes = existing_schedule.notes if existing_schedule.notes else ""
         else:
             dialog.title("New Schedule")
             try:
@@ -661,7 +810,7 @@ class BlockerGUI(ctk.CTk):
                 messagebox.showinfo("Info", "Update logic needs full tc.update_scheduled_session.", parent=dialog)
                 return # Placeholder
             else:
-                new_id = tc.add_scheduled_session(scheduled_dt, duration, notes)
+                new_id = tc.add_scheduled_session(scheduled_dt, duration, notes, self._selected_profile_id())
                 if new_id:
                     messagebox.showinfo("Success", "Session scheduled!", parent=dialog)
                 else:
@@ -669,7 +818,7 @@ class BlockerGUI(ctk.CTk):
                     return # Don't close if error
 
             dialog.destroy()
-            self.refresh_calendar_schedule_highlights()
+            # The calendar mark is updated by the schedule_added notification
             self._update_scheduled_items_display(initial_date)
 
 
@@ -680,6 +829,13 @@ class BlockerGUI(ctk.CTk):
 
 
 if __name__ == "__main__":
+    # A second launch brings the running instance to the front instead of starting another GUI
+    response = instance_core.send_command("show")
+    if response is not None:
+        if not response["ok"]:
+            print(f"FocusBlocker is already running: {response['error']}")
+        sys.exit(0)
+
     if not is_admin():
         try:
             root_check = ctk.CTk()
@@ -690,8 +846,26 @@ if __name__ == "__main__":
             print("❌ Please run this script as administrator.")
         sys.exit(1)
 
-    tc.init_db()
-    bc.init_db()
+    control = instance_core.ControlServer()
+    try:
+        if not control.start(): # Another instance started in the meantime
+            instance_core.send_command("show")
+            sys.exit(0)
+    except RuntimeError as e:
+        try:
+            root_check = ctk.CTk()
+            root_check.withdraw()
+            messagebox.showerror("Port Conflict", str(e))
+            root_check.destroy()
+        except Exception:
+            print(f"❌ {e}")
+        sys.exit(1)
+
+    metrics_core.setup(True if "--metrics" in sys.argv[1:] else None)
+    sync_core.setup() # Uploads finished sessions in the background if FOCUSBLOCKER_SYNC_URL is set
 
+    # tc.init_db() and bc.init_db() run from BlockerGUI after the first paint
     app = BlockerGUI()
-    app.mainloop()
\ No newline at end of file
+    control.handlers.update(app.control_handlers())
+    app.mainloop()
+    control.close()
\ No newline at end of file
@@ -0,0 +1,210 @@
+import atexit
+import functools
+import types
+import json
+import os
+import threading
+import time
+
+from db_core import DATA_DIR
+
+# --- Configuration ---
+# Metrics are off unless FOCUSBLOCKER_METRICS is set (e.g. to 1) or an entry point is
+# started with --metrics. While off, every recording call returns right away and no
+# function is wrapped, so the instrumented code runs as if this module didn't exist.
+ENV_ENABLE = "FOCUSBLOCKER_METRICS"
+ENV_DIR = "FOCUSBLOCKER_METRICS_DIR"
+ENV_LOG = "FOCUSBLOCKER_METRICS_LOG" # Path of an optional rotating log of snapshots
+METRICS_DIR = os.environ.get(ENV_DIR) or os.path.join(DATA_DIR, "metrics")
+EXPORT_INTERVAL = 15 # Seconds between snapshots
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUP_COUNT = 3
+PROMETHEUS_PREFIX = "focusblocker_"
+
+ENABLED = False
+
+_lock = threading.Lock()
+_counters = {}  # (name, labels) -> value
+_summaries = {} # (name, labels) -> [count, total seconds, max seconds]
+_exporter = None
+_log = None
+
+# --- Recording ---
+
+def increment(name, amount=1, **labels):
+    """Adds amount to a counter."""
+    if not ENABLED:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+def observe(name, seconds, **labels):
+    """Records one duration in a summary (count, sum and max)."""
+    if not ENABLED:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        summary = _summaries.get(key)
+        if summary is None:
+            _summaries[key] = [1, seconds, seconds]
+        else:
+            summary[0] += 1
+            summary[1] += seconds
+            if seconds > summary[2]:
+                summary[2] = seconds
+
+class _Timer:
+    __slots__ = ("name", "labels", "started")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.name, time.perf_counter() - self.started, **self.labels)
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+_NULL_TIMER = _NullTimer()
+
+def timed(name, **labels):
+    """Context manager that records how long its block takes in the summary name."""
+    return _Timer(name, labels) if ENABLED else _NULL_TIMER
+
+def _wrap(func, label):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            increment("call_errors_total", function=label)
+            raise
+        finally:
+            observe("call_seconds", time.perf_counter() - started, function=label)
+    wrapper.__wrapped_by_metrics__ = True
+    return wrapper
+
+def instrument_module(module, prefix):
+    """Replaces the module's public functions with timed wrappers (calls between them are timed too)."""
+    for name, func in list(vars(module).items()):
+        if (name.startswith("_") or not isinstance(func, types.FunctionType) or func.__module__ != module.__name__
+                or getattr(func, "__wrapped_by_metrics__", False)):
+            continue
+        setattr(module, name, _wrap(func, f"{prefix}.{name}"))
+
+# --- Export ---
+
+def snapshot():
+    """Returns the current metrics as a JSON-serializable dict."""
+    with _lock:
+        counters = [{"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in _counters.items()]
+        summaries = [{"name": name, "labels": dict(labels), "count": count, "sum": total, "max": maximum}
+                     for (name, labels), (count, total, maximum) in _summaries.items()]
+    return {"timestamp": time.time(), "counters": counters, "summaries": summaries}
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _prometheus_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in sorted(labels.items())) + "}"
+
+def to_prometheus(data):
+    """Formats a snapshot in the Prometheus text exposition format (for the node_exporter textfile collector)."""
+    lines = []
+    typed = set()
+    for counter in sorted(data["counters"], key=lambda c: c["name"]):
+        name = PROMETHEUS_PREFIX + counter["name"]
+        if name not in typed:
+            lines.append(f"# TYPE {name} counter")
+            typed.add(name)
+        lines.append(f"{name}{_prometheus_labels(counter['labels'])} {counter['value']}")
+    for summary in sorted(data["summaries"], key=lambda s: s["name"]):
+        name = PROMETHEUS_PREFIX + summary["name"]
+        if name not in typed:
+            lines.append(f"# TYPE {name} summary")
+            lines.append(f"# TYPE {name}_max gauge")
+            typed.add(name)
+        labels = _prometheus_labels(summary["labels"])
+        lines.append(f"{name}_count{labels} {summary['count']}")
+        lines.append(f"{name}_sum{labels} {summary['sum']:.6f}")
+        lines.append(f"{name}_max{labels} {summary['max']:.6f}")
+    return "\n".join(lines) + "\n"
+
+def _write_atomic(path, text):
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        file.write(text)
+    os.replace(temp_path, path) # Scrapers never see a half-written file
+
+def write_snapshot():
+    """Writes focusblocker.prom and metrics.json to METRICS_DIR (and a line to the log, if enabled)."""
+    data = snapshot()
+    try:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        _write_atomic(os.path.join(METRICS_DIR, "focusblocker.prom"), to_prometheus(data))
+        _write_atomic(os.path.join(METRICS_DIR, "metrics.json"), json.dumps(data, indent=2))
+    except OSError as e:
+        print(f"Error writing metrics: {e}")
+    if _log is not None:
+        _log.info(json.dumps(data))
+
+def _export_periodically():
+    while True:
+        time.sleep(EXPORT_INTERVAL)
+        write_snapshot()
+
+# --- Setup ---
+
+def setup(enabled=None):
+    """
+    Turns metrics on if enabled is True, or if enabled is None and FOCUSBLOCKER_METRICS
+    is set. Call once from an entry point, before the work to be measured.
+    """
+    if enabled is None:
+        enabled = os.environ.get(ENV_ENABLE, "").lower() not in ("", "0", "false", "no")
+    if enabled:
+        enable()
+    return ENABLED
+
+def enable():
+    """Instruments tracker_core and blocker_core and starts the periodic exporter."""
+    global ENABLED, _exporter, _log
+    if ENABLED:
+        return
+    ENABLED = True
+
+    import blocker_core
+    import tracker_core
+    instrument_module(tracker_core, "tc")
+    instrument_module(blocker_core, "bc")
+
+    log_path = os.environ.get(ENV_LOG)
+    if log_path:
+        import logging
+        from logging.handlers import RotatingFileHandler
+        _log = logging.getLogger("focusblocker.metrics")
+        _log.propagate = False
+        _log.setLevel(logging.INFO)
+        handler = RotatingFileHandler(log_path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT)
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        _log.addHandler(handler)
+
+    _exporter = threading.Thread(target=_export_periodically, name="metrics-exporter", daemon=True)
+    _exporter.start()
+    atexit.register(write_snapshot)
@@ -0,0 +1,281 @@
+import gzip
+import json
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+
+import db_core
+import tracker_core as tc
+
+# --- Configuration ---
+# Uploading is off unless FOCUSBLOCKER_SYNC_URL names a collector (see collector.py),
+# e.g. http://collector.example:8765/ingest. Finished sessions are uploaded in gzip
+# batches by a background pass every SYNC_INTERVAL seconds (or `focusblocker sync`),
+# never one request per session.
+ENV_URL = "FOCUSBLOCKER_SYNC_URL"
+ENV_TOKEN = "FOCUSBLOCKER_SYNC_TOKEN" # Optional bearer token the collector checks
+SYNC_INTERVAL = 300
+SYNC_BATCH_SIZE = 1000     # Sessions per uploaded batch
+MAX_OUTBOX_BATCHES = 50    # Staged batches kept while the collector is unreachable
+REQUEST_TIMEOUT = 10
+RETRY_BASE_SECONDS = 30    # First retry delay, doubled per failed attempt
+RETRY_MAX_SECONDS = 3600
+PAYLOAD_VERSION = 1
+
+# Sessions with an id above high_water_id haven't been staged yet. Staging a batch
+# into the outbox and raising the mark happen in one transaction, and a batch leaves
+# the outbox only once the collector has acknowledged it, so every session is sent at
+# least once (the collector ignores duplicates). When the outbox is full nothing more
+# is staged: the sessions table itself holds the backlog until the collector is back.
+SYNC_STATE_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS sync_state (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        machine_id TEXT NOT NULL,            -- Random id identifying this installation to the collector
+        high_water_id INTEGER NOT NULL DEFAULT 0
+    )
+'''
+
+SYNC_OUTBOX_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS sync_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        first_session_id INTEGER NOT NULL,
+        last_session_id INTEGER NOT NULL,
+        session_count INTEGER NOT NULL,
+        payload BLOB NOT NULL,               -- gzip-compressed JSON, sent as is
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_ts INTEGER NOT NULL DEFAULT 0, -- UTC epoch seconds
+        last_error TEXT
+    )
+'''
+
+# Batches the collector refused as malformed (see REJECTED_BATCH_ERRORS) are moved here so
+# they neither block the outbox nor get resent; they stay for inspection until
+# requeue_rejected() (`focusblocker sync --requeue-rejected`) puts them back.
+SYNC_REJECTED_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS sync_rejected (
+        id INTEGER PRIMARY KEY,              -- The id the batch had in sync_outbox
+        first_session_id INTEGER NOT NULL,
+        last_session_id INTEGER NOT NULL,
+        session_count INTEGER NOT NULL,
+        payload BLOB NOT NULL,
+        status INTEGER NOT NULL,             -- HTTP status of the rejection
+        error TEXT,
+        rejected_ts INTEGER NOT NULL         -- UTC epoch seconds
+    )
+'''
+# Only these answers say the batch itself is bad. Anything else (401/403 from a wrong token,
+# 404 from a wrong URL, 5xx) is a failure of the setup or the collector, retried with backoff.
+REJECTED_BATCH_ERRORS = (400, 413, 422) # Bad Request, Payload Too Large, Unprocessable Content
+
+_initialized_db = None
+_sync_thread = None
+_sync_stop = threading.Event()
+_sync_lock = threading.Lock() # One pass at a time (the background thread and `sync` may overlap)
+
+def init_db():
+    """Creates the sync tables (and this installation's machine id) if they don't exist."""
+    global _initialized_db
+    tc.ensure_db()
+    conn = db_core.connect()
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    cursor.execute(SYNC_STATE_TABLE_SQL)
+    cursor.execute(SYNC_OUTBOX_TABLE_SQL)
+    cursor.execute(SYNC_REJECTED_TABLE_SQL)
+    cursor.execute("INSERT OR IGNORE INTO sync_state (id, machine_id) VALUES (1, ?)", (uuid.uuid4().hex,))
+    conn.commit()
+    conn.close()
+    _initialized_db = db_core.DB_FILE
+
+def ensure_db():
+    """Runs init_db() once per process (and again if the database path changes)."""
+    if _initialized_db != db_core.DB_FILE:
+        init_db()
+
+# --- Outbox ---
+
+def _stage_batches(cursor):
+    """Moves sessions above the high-water mark into outbox batches until it's full. Returns the batches staged."""
+    cursor.execute("SELECT machine_id, high_water_id FROM sync_state WHERE id = 1")
+    machine_id, high_water_id = cursor.fetchone()
+    cursor.execute("SELECT COUNT(*) FROM sync_outbox")
+    room = MAX_OUTBOX_BATCHES - cursor.fetchone()[0]
+    staged = 0
+    while staged < room:
+        cursor.execute('''
+            SELECT id, start_ts, end_ts, tz_offset, duration_minutes, profile_id FROM sessions
+            WHERE id > ? ORDER BY id LIMIT ?
+        ''', (high_water_id, SYNC_BATCH_SIZE))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        payload = gzip.compress(json.dumps({
+            "version": PAYLOAD_VERSION,
+            "machine_id": machine_id,
+            "hostname": socket.gethostname(),
+            "columns": ["id", "start_ts", "end_ts", "tz_offset", "duration_minutes", "profile_id"],
+            "sessions": rows,
+        }, separators=(",", ":")).encode("utf-8"))
+        cursor.execute('''
+            INSERT INTO sync_outbox (first_session_id, last_session_id, session_count, payload)
+            VALUES (?, ?, ?, ?)
+        ''', (rows[0][0], rows[-1][0], len(rows), payload))
+        high_water_id = rows[-1][0]
+        staged += 1
+    if staged:
+        cursor.execute("UPDATE sync_state SET high_water_id = ? WHERE id = 1", (high_water_id,))
+    return staged
+
+def _due_batches(now_ts):
+    """Returns the outbox batches in id order up to the first one still waiting for a retry."""
+    conn = db_core.connect()
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, session_count, payload, attempts, next_attempt_ts FROM sync_outbox ORDER BY id")
+    batches = []
+    for batch_id, session_count, payload, attempts, next_attempt_ts in cursor:
+        if next_attempt_ts > now_ts:
+            break
+        batches.append((batch_id, session_count, payload, attempts))
+    conn.close()
+    return batches
+
+def _retry_delay(attempts):
+    """Exponential backoff with jitter, so machines that lost the collector together don't return together."""
+    delay = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+# --- Upload ---
+
+def _post(url, payload, token=None):
+    """Sends one gzip payload; raises OSError (URLError and HTTPError included) or HTTPException on failure."""
+    import urllib.request
+    request = urllib.request.Request(url, data=payload, method="POST", headers={
+        "Content-Type": "application/json",
+        "Content-Encoding": "gzip",
+    })
+    if token:
+        request.add_header("Authorization", f"Bearer {token}")
+    with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+        response.read()
+
+def sync_once(url=None, token=None):
+    """
+    Stages new sessions and uploads the due outbox batches in order. The first failed
+    upload ends the pass; that batch is retried with backoff on a later pass, and the
+    batches after it wait for it. A batch the collector rejects as malformed is moved
+    to sync_rejected instead. Returns (sessions uploaded, batches still in the outbox).
+    """
+    url = url or os.environ.get(ENV_URL)
+    if not url:
+        raise ValueError(f"No collector configured (set {ENV_URL}).")
+    token = token or os.environ.get(ENV_TOKEN)
+    ensure_db()
+    import http.client # Only needed once syncing, keeps the HTTP stack out of startup
+    import urllib.error
+    uploaded = 0
+    with _sync_lock:
+        while True:
+            # Sending frees room in the outbox, so stage again until nothing is due
+            db_core.run_write(_stage_batches)
+            batches = _due_batches(int(time.time()))
+            if not batches:
+                break
+            for batch_id, session_count, payload, attempts in batches:
+                try:
+                    _post(url, payload, token)
+                except urllib.error.HTTPError as e:
+                    if e.code in REJECTED_BATCH_ERRORS:
+                        db_core.run_write(_reject_batch, batch_id, e.code, _error_detail(e))
+                        print(f"Collector at {url} rejected {session_count} sessions ({e}); "
+                              f"batch {batch_id} moved to sync_rejected")
+                        continue
+                    db_core.run_write(_record_failure, batch_id, attempts + 1, _error_detail(e))
+                    print(f"Error uploading sessions to {url}: {e}")
+                    return uploaded, pending_batches()
+                except (OSError, http.client.HTTPException) as e:
+                    db_core.run_write(_record_failure, batch_id, attempts + 1, str(e))
+                    print(f"Error uploading sessions to {url}: {e}")
+                    return uploaded, pending_batches()
+                db_core.run_write(lambda cursor: cursor.execute("DELETE FROM sync_outbox WHERE id = ?", (batch_id,)))
+                uploaded += session_count
+    return uploaded, pending_batches()
+
+def _record_failure(cursor, batch_id, attempts, error):
+    cursor.execute('''
+        UPDATE sync_outbox SET attempts = ?, next_attempt_ts = ?, last_error = ? WHERE id = ?
+    ''', (attempts, int(time.time() + _retry_delay(attempts)), error, batch_id))
+
+def _reject_batch(cursor, batch_id, status, error):
+    cursor.execute('''
+        INSERT OR REPLACE INTO sync_rejected
+            (id, first_session_id, last_session_id, session_count, payload, status, error, rejected_ts)
+        SELECT id, first_session_id, last_session_id, session_count, payload, ?, ?, ? FROM sync_outbox WHERE id = ?
+    ''', (status, error, int(time.time()), batch_id))
+    cursor.execute("DELETE FROM sync_outbox WHERE id = ?", (batch_id,))
+
+def _requeue_rejected(cursor):
+    # The batches keep their ids, which are below any staged since, so they go out first
+    cursor.execute('''
+        INSERT INTO sync_outbox (id, first_session_id, last_session_id, session_count, payload)
+        SELECT id, first_session_id, last_session_id, session_count, payload FROM sync_rejected ORDER BY id
+    ''')
+    requeued = cursor.rowcount
+    cursor.execute("DELETE FROM sync_rejected")
+    return requeued
+
+def requeue_rejected():
+    """Moves every rejected batch back into the outbox for the next pass. Returns the number moved."""
+    ensure_db()
+    with _sync_lock:
+        return db_core.run_write(_requeue_rejected)
+
+def _error_detail(error):
+    """The status line plus the start of the collector's explanation, if it sent one."""
+    try:
+        body = error.read(500).decode("utf-8", "replace").strip()
+    except OSError:
+        body = ""
+    return f"{error}: {body}" if body else str(error)
+
+def pending_batches():
+    """Returns the number of batches waiting in the outbox."""
+    ensure_db()
+    conn = db_core.connect()
+    count = conn.execute("SELECT COUNT(*) FROM sync_outbox").fetchone()[0]
+    conn.close()
+    return count
+
+# --- Background Sync ---
+
+def _sync_periodically(url, token):
+    while not _sync_stop.wait(SYNC_INTERVAL):
+        try:
+            sync_once(url, token)
+        except Exception as e:
+            print(f"Error syncing sessions: {e}")
+
+def setup(url=None):
+    """
+    Starts the background sync if url is given or FOCUSBLOCKER_SYNC_URL is set.
+    Call once from a long-running entry point. Returns whether sync is on.
+    """
+    global _sync_thread
+    url = url or os.environ.get(ENV_URL)
+    if not url:
+        return False
+    if _sync_thread is None:
+        _sync_stop.clear()
+        _sync_thread = threading.Thread(target=_sync_periodically, args=(url, os.environ.get(ENV_TOKEN)),
+                                        name="session-sync", daemon=True)
+        _sync_thread.start()
+    return True
+
+def stop():
+    global _sync_thread
+    if _sync_thread is not None:
+        _sync_stop.set()
+        _sync_thread.join()
+        _sync_thread = None
@@ -1,11 +1,18 @@
-import time
 import threading
 
+from clock import get_clock
+
 class FocusTimer:
-    def __init__(self, duration_minutes, on_tick_callback, on_complete_callback):
+    def __init__(self, duration_minutes, on_tick_callback, on_complete_callback,
+                 checkpoint_callback=None, checkpoint_interval=60, clock=None):
         self.duration_minutes = duration_minutes
         self.on_tick_callback = on_tick_callback
         self.on_complete_callback = on_complete_callback
+        # Called every checkpoint_interval seconds from the timer thread, so it must be cheap
+        self.checkpoint_callback = checkpoint_callback
+        self.checkpoint_interval = checkpoint_interval
+        # Sleeps between ticks; a clock.SimulatedClock runs the countdown without waiting
+        self.clock = clock if clock is not None else get_clock()
         self.remaining_time = 0
         self.timer_thread = None
         self.running = False
@@ -15,7 +22,7 @@ class FocusTimer:
             return
 
         self.running = True
-        self.remaining_time = self.duration_minutes * 60
+        self.remaining_time = int(round(self.duration_minutes * 60))
         self.timer_thread = threading.Thread(target=self._run_countdown, daemon=True)
         self.timer_thread.start()
 
@@ -23,11 +30,15 @@ class FocusTimer:
         self.running = False
 
     def _run_countdown(self):
+        elapsed = 0
         while self.running and self.remaining_time > 0:
             mins, secs = divmod(self.remaining_time, 60)
             self.on_tick_callback(mins, secs)
-            time.sleep(1)
+            self.clock.sleep(1)
             self.remaining_time -= 1
+            elapsed += 1
+            if self.checkpoint_callback and elapsed % self.checkpoint_interval == 0:
+                self.checkpoint_callback()
 
         if self.running:  # Timer completed naturally
             self.running = False
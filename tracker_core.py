@@ -1,34 +1,396 @@
 import sqlite3
 import os
-from datetime import datetime, timedelta
-from platformdirs import user_data_dir # Import the necessary function
-
-# Define your application name and author (important for platformdirs)
-APP_NAME = "FocusModeApp" # Replace with your actual app name
-APP_AUTHOR = "JoshiAarya" # Replace with your name or company
-
-# Dynamically determine the database file path
-DATA_DIR = user_data_dir(appname=APP_NAME, appauthor=APP_AUTHOR)
-# Ensure the directory exists
-os.makedirs(DATA_DIR, exist_ok=True)
-DB_FILE = os.path.join(DATA_DIR, "focus_data.db")
+import gzip
+import json
+from array import array
+from bisect import bisect_left
+from datetime import datetime, date, time, timedelta
+from typing import NamedTuple
+
+import clock
+import db_core
+from db_core import DATA_DIR, DB_FILE # Shared with blocker_core
+
+# Bumped whenever init_db() needs to migrate existing data (stored in PRAGMA user_version)
+SCHEMA_VERSION = 3
+
+# Raw sessions older than this are moved to the archive by compact_sessions()
+SESSION_RETENTION_DAYS = 365
+ARCHIVE_DIR = os.path.join(DATA_DIR, "archive")
+
+# Timestamps are stored as integer UTC epoch seconds plus the UTC offset (in seconds)
+# that was in effect locally, so wall-clock times survive DST and time-zone changes.
+SESSIONS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        start_ts INTEGER NOT NULL,          -- UTC epoch seconds
+        end_ts INTEGER NOT NULL,            -- UTC epoch seconds
+        tz_offset INTEGER NOT NULL,         -- Local UTC offset in seconds at start_ts
+        duration_minutes REAL NOT NULL,
+        profile_id INTEGER                  -- Blocklist profile (see blocker_core), NULL before profiles
+    )
+'''
+
+# Rollups are keyed by the local start date of each session: daily ('YYYY-MM-DD'),
+# weekly (the Monday starting the week, 'YYYY-MM-DD') and monthly ('YYYY-MM').
+WEEKLY_ROLLUPS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS weekly_rollups (
+        week_start TEXT PRIMARY KEY,
+        session_count INTEGER NOT NULL DEFAULT 0,
+        total_minutes REAL NOT NULL DEFAULT 0
+    )
+'''
+
+MONTHLY_ROLLUPS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS monthly_rollups (
+        month TEXT PRIMARY KEY,
+        session_count INTEGER NOT NULL DEFAULT 0,
+        total_minutes REAL NOT NULL DEFAULT 0
+    )
+'''
+
+# SQLite expressions deriving the rollup keys from a sessions row
+_LOCAL_DAY_SQL = "date(start_ts + tz_offset, 'unixepoch')"
+_LOCAL_WEEK_SQL = "date(start_ts + tz_offset, 'unixepoch', 'weekday 0', '-6 days')"
+_LOCAL_MONTH_SQL = "strftime('%Y-%m', start_ts + tz_offset, 'unixepoch')"
+
+SCHEDULED_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS scheduled_focus_sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        scheduled_ts INTEGER NOT NULL,       -- UTC epoch seconds
+        tz_offset INTEGER NOT NULL,          -- Local UTC offset in seconds when scheduled
+        duration_minutes INTEGER NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending', -- e.g., 'pending', 'active', 'completed', 'missed', 'cancelled'
+        notification_sent INTEGER DEFAULT 0, -- 0 for false, 1 for true
+        notes TEXT,                          -- Optional user notes
+        created_ts INTEGER NOT NULL,         -- UTC epoch seconds when the schedule was created
+        profile_id INTEGER                   -- Blocklist profile to focus with, NULL for the default
+    )
+'''
+
+# Journal of the sessions in progress, so a crash or kill loses at most one checkpoint
+# interval of focus time (see begin_session() and recover_orphaned_sessions()).
+ACTIVE_SESSIONS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS active_sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        start_ts INTEGER NOT NULL,           -- UTC epoch seconds
+        tz_offset INTEGER NOT NULL,          -- Local UTC offset in seconds at start_ts
+        planned_minutes REAL,                -- Timer length, NULL for sessions without a timer
+        checkpoint_ts INTEGER NOT NULL,      -- UTC epoch seconds the session was last known to be running
+        profile_id INTEGER                   -- Blocklist profile, NULL for the default
+    )
+'''
+
+CHECKPOINT_INTERVAL_SECONDS = 60 # How often a running session updates its checkpoint_ts
+RESUME_GRACE_SECONDS = 10 * 60 # Orphans checkpointed longer ago than this are closed, not resumed
+MIN_SESSION_SECONDS = 1 # Shorter sessions aren't recorded
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_ORDINAL = _EPOCH.toordinal()
+
+# --- Timestamp Helpers ---
+
+def to_epoch(dt):
+    """
+    Converts a datetime to (UTC epoch seconds, UTC offset seconds).
+    Naive datetimes are interpreted as local time.
+    """
+    aware = dt.astimezone() if dt.tzinfo is None else dt
+    return int(aware.timestamp()), int(aware.utcoffset().total_seconds())
+
+def from_epoch(ts, tz_offset):
+    """Returns the naive wall-clock datetime of an epoch timestamp in the given UTC offset."""
+    return _EPOCH + timedelta(seconds=ts + tz_offset)
+
+def local_date(ts, tz_offset):
+    """Returns the wall-clock date of an epoch timestamp in the given UTC offset."""
+    return date.fromordinal(_EPOCH_ORDINAL + (ts + tz_offset) // 86400)
+
+def _day_start_epoch(day):
+    """Returns the epoch timestamp of local midnight at the start of the given date."""
+    return to_epoch(datetime.combine(day, time.min))[0]
+
+# --- Row Adapters ---
+
+class SessionRecord(NamedTuple):
+    """A row of the sessions table."""
+    id: int
+    start_ts: int
+    end_ts: int
+    tz_offset: int
+    duration_minutes: float
+
+    @property
+    def start(self):
+        return from_epoch(self.start_ts, self.tz_offset)
+
+    @property
+    def end(self):
+        return from_epoch(self.end_ts, self.tz_offset)
+
+    @property
+    def local_date(self):
+        return local_date(self.start_ts, self.tz_offset)
+
+class ScheduledSession(NamedTuple):
+    """A row of the scheduled_focus_sessions table."""
+    id: int
+    scheduled_ts: int
+    tz_offset: int
+    duration_minutes: int
+    status: str
+    notification_sent: bool
+    notes: str
+    profile_id: int = None
+
+    @property
+    def scheduled_datetime(self):
+        """The scheduled wall-clock time, as it was entered by the user."""
+        return from_epoch(self.scheduled_ts, self.tz_offset)
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(row[0], row[1], row[2], row[3], row[4], bool(row[5]), row[6], row[7])
+
+class ActiveSession(NamedTuple):
+    """A row of the active_sessions journal."""
+    id: int
+    start_ts: int
+    tz_offset: int
+    planned_minutes: float
+    checkpoint_ts: int
+    profile_id: int = None
+
+    @property
+    def start(self):
+        return from_epoch(self.start_ts, self.tz_offset)
+
+    def remaining_seconds(self, now_ts):
+        """Seconds left on the session's timer at now_ts (0 for sessions without a timer)."""
+        if self.planned_minutes is None:
+            return 0
+        return max(0, self.start_ts + round(self.planned_minutes * 60) - now_ts)
+
+SCHEDULE_COLUMNS = "id, scheduled_ts, tz_offset, duration_minutes, status, notification_sent, notes, profile_id"
+
+# --- In-Memory Session Store ---
+
+class SessionStore:
+    """
+    Compact, column-oriented container for session history.
 
-# --- Rest of your time_controller.py code (remains largely the same) ---
+    Each column is a typed array, so a session costs 36 bytes instead of a dict or
+    tuple of boxed Python objects. Rows are kept sorted by start_ts, which lets
+    date-range slicing use bisect instead of scanning.
+    """
+    __slots__ = ("ids", "start_ts", "end_ts", "tz_offset", "duration_minutes")
+
+    def __init__(self):
+        self.ids = array('q')
+        self.start_ts = array('q')
+        self.end_ts = array('q')
+        self.tz_offset = array('i')
+        self.duration_minutes = array('d')
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Builds a store from (id, start_ts, end_ts, tz_offset, duration_minutes) rows sorted by start_ts."""
+        store = cls()
+        for row in rows:
+            store.ids.append(row[0])
+            store.start_ts.append(row[1])
+            store.end_ts.append(row[2])
+            store.tz_offset.append(row[3])
+            store.duration_minutes.append(row[4])
+        return store
+
+    def append(self, session_id, start_ts, end_ts, tz_offset, duration_minutes):
+        """Adds a session, keeping the store ordered by start time."""
+        if self.start_ts and start_ts < self.start_ts[-1]:
+            i = bisect_left(self.start_ts, start_ts)
+        else:
+            i = len(self.start_ts)
+        self.ids.insert(i, session_id)
+        self.start_ts.insert(i, start_ts)
+        self.end_ts.insert(i, end_ts)
+        self.tz_offset.insert(i, tz_offset)
+        self.duration_minutes.insert(i, duration_minutes)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        return SessionRecord(self.ids[i], self.start_ts[i], self.end_ts[i], self.tz_offset[i], self.duration_minutes[i])
+
+    def __iter__(self):
+        """Yields SessionRecord rows, oldest first."""
+        return map(SessionRecord, self.ids, self.start_ts, self.end_ts, self.tz_offset, self.duration_minutes)
+
+    def index_range(self, start_ts=None, end_ts=None):
+        """Returns the (lo, hi) row indices of sessions starting in [start_ts, end_ts)."""
+        lo = 0 if start_ts is None else bisect_left(self.start_ts, start_ts)
+        hi = len(self.start_ts) if end_ts is None else bisect_left(self.start_ts, end_ts)
+        return lo, max(lo, hi)
+
+    def slice(self, start_ts=None, end_ts=None):
+        """Returns a new store holding the sessions that start in [start_ts, end_ts)."""
+        lo, hi = self.index_range(start_ts, end_ts)
+        part = SessionStore()
+        part.ids = self.ids[lo:hi]
+        part.start_ts = self.start_ts[lo:hi]
+        part.end_ts = self.end_ts[lo:hi]
+        part.tz_offset = self.tz_offset[lo:hi]
+        part.duration_minutes = self.duration_minutes[lo:hi]
+        return part
+
+    def slice_dates(self, start_date=None, end_date=None):
+        """Returns the sessions that start between start_date and end_date (inclusive, local time)."""
+        start_ts = _day_start_epoch(start_date) if start_date else None
+        end_ts = _day_start_epoch(end_date + timedelta(days=1)) if end_date else None
+        return self.slice(start_ts, end_ts)
+
+    def total_minutes(self):
+        return sum(self.duration_minutes)
+
+    def daily_totals(self):
+        """Returns {date: total minutes} keyed by the local start date of each session."""
+        totals_by_day = {}
+        for ts, offset, minutes in zip(self.start_ts, self.tz_offset, self.duration_minutes):
+            day = (ts + offset) // 86400
+            totals_by_day[day] = totals_by_day.get(day, 0.0) + minutes
+        return {date.fromordinal(_EPOCH_ORDINAL + day): minutes for day, minutes in totals_by_day.items()}
+
+# --- Rollups ---
+
+def _week_start(day):
+    return day - timedelta(days=day.weekday())
+
+def _add_session_to_rollups(cursor, day, duration_minutes):
+    """Adds one session to the daily, weekly and monthly rollups."""
+    for table, key_column, key in (("daily_sessions", "session_date", day.isoformat()),
+                                   ("weekly_rollups", "week_start", _week_start(day).isoformat()),
+                                   ("monthly_rollups", "month", day.strftime("%Y-%m"))):
+        cursor.execute(f'''
+            INSERT INTO {table} ({key_column}, session_count, total_minutes) VALUES (?, 1, ?)
+            ON CONFLICT({key_column}) DO UPDATE SET
+                session_count = session_count + 1,
+                total_minutes = total_minutes + excluded.total_minutes
+        ''', (key, duration_minutes))
+
+def _add_sessions_to_rollups(cursor, after_id=0):
+    """Adds every session with id > after_id to the rollups in one aggregate pass per level."""
+    for table, key_column, key_sql in (("daily_sessions", "session_date", _LOCAL_DAY_SQL),
+                                       ("weekly_rollups", "week_start", _LOCAL_WEEK_SQL),
+                                       ("monthly_rollups", "month", _LOCAL_MONTH_SQL)):
+        cursor.execute(f'''
+            INSERT INTO {table} ({key_column}, session_count, total_minutes)
+            SELECT {key_sql}, COUNT(*), SUM(duration_minutes) FROM sessions WHERE id > ? GROUP BY 1
+            ON CONFLICT({key_column}) DO UPDATE SET
+                session_count = session_count + excluded.session_count,
+                total_minutes = total_minutes + excluded.total_minutes
+        ''', (after_id,))
+
+def _rollup_keys_for_range(start_date, end_date):
+    """
+    Covers [start_date, end_date] with the coarsest rollup keys available:
+    whole months first, then whole weeks, then single days.
+    Returns (months, weeks, days) as lists of key strings.
+    """
+    months, weeks, days = [], [], []
+    day = start_date
+    while day <= end_date:
+        if day.day == 1:
+            next_month = (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+            if next_month - timedelta(days=1) <= end_date:
+                months.append(day.strftime("%Y-%m"))
+                day = next_month
+                continue
+        if day.weekday() == 0 and day + timedelta(days=6) <= end_date:
+            weeks.append(day.isoformat())
+            day += timedelta(days=7)
+            continue
+        days.append(day.isoformat())
+        day += timedelta(days=1)
+    return months, weeks, days
+
+# --- Migrations ---
+
+def _table_columns(cursor, table):
+    cursor.execute(f"PRAGMA table_info({table})")
+    return {row[1] for row in cursor.fetchall()}
+
+def _iso_to_epoch(value):
+    return to_epoch(datetime.fromisoformat(value))
+
+def _migrate_iso_timestamps(cursor):
+    """Rewrites tables created before schema version 1, which stored naive ISO text."""
+    if "start_time" in _table_columns(cursor, "sessions"):
+        cursor.execute("ALTER TABLE sessions RENAME TO sessions_iso")
+        cursor.execute(SESSIONS_TABLE_SQL)
+        cursor.execute("SELECT id, start_time, end_time, duration_minutes FROM sessions_iso")
+        rows = []
+        for session_id, start_str, end_str, duration_minutes in cursor.fetchall():
+            start_ts, tz_offset = _iso_to_epoch(start_str)
+            end_ts, _ = _iso_to_epoch(end_str)
+            rows.append((session_id, start_ts, end_ts, tz_offset, duration_minutes))
+        cursor.executemany('''
+            INSERT INTO sessions (id, start_ts, end_ts, tz_offset, duration_minutes)
+            VALUES (?, ?, ?, ?, ?)
+        ''', rows)
+        cursor.execute("DROP TABLE sessions_iso")
+
+    if "scheduled_datetime" in _table_columns(cursor, "scheduled_focus_sessions"):
+        cursor.execute("ALTER TABLE scheduled_focus_sessions RENAME TO scheduled_focus_sessions_iso")
+        cursor.execute(SCHEDULED_TABLE_SQL)
+        cursor.execute('''
+            SELECT id, scheduled_datetime, duration_minutes, status, notification_sent, notes, created_at
+            FROM scheduled_focus_sessions_iso
+        ''')
+        rows = []
+        for row in cursor.fetchall():
+            scheduled_ts, tz_offset = _iso_to_epoch(row[1])
+            created_ts, _ = _iso_to_epoch(row[6])
+            rows.append((row[0], scheduled_ts, tz_offset, row[2], row[3], row[4], row[5], created_ts))
+        cursor.executemany('''
+            INSERT INTO scheduled_focus_sessions
+            (id, scheduled_ts, tz_offset, duration_minutes, status, notification_sent, notes, created_ts)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        cursor.execute("DROP TABLE scheduled_focus_sessions_iso")
+
+def _migrate_add_rollups(cursor):
+    """Schema version 2: daily_sessions gains per-day totals and is backfilled with the new rollups."""
+    columns = _table_columns(cursor, "daily_sessions")
+    if "session_count" not in columns:
+        cursor.execute("ALTER TABLE daily_sessions ADD COLUMN session_count INTEGER NOT NULL DEFAULT 0")
+    if "total_minutes" not in columns:
+        cursor.execute("ALTER TABLE daily_sessions ADD COLUMN total_minutes REAL NOT NULL DEFAULT 0")
+    # Days are rebuilt from the raw sessions, which are all still present before version 2
+    cursor.execute("DELETE FROM daily_sessions")
+    cursor.execute("DELETE FROM weekly_rollups")
+    cursor.execute("DELETE FROM monthly_rollups")
+    _add_sessions_to_rollups(cursor)
+
+def _migrate_add_profiles(cursor):
+    """Schema version 3: sessions, schedules and the journal record their blocklist profile."""
+    for table in ("sessions", "scheduled_focus_sessions", "active_sessions"):
+        if "profile_id" not in _table_columns(cursor, table):
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN profile_id INTEGER")
+
+# --- Database Functions ---
+
+_initialized_db = None # DB_FILE that init_db() last ran against in this process
 
 def init_db():
-    """Initializes the SQLite database and creates tables if they don't exist."""
-    conn = sqlite3.connect(DB_FILE)
+    """Initializes the SQLite database, creates tables if they don't exist and migrates old data."""
+    global _initialized_db
+    conn = db_core.connect()
+    db_core.enable_wal(conn)
     cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE") # Keep table creation and migrations atomic
 
     # Create sessions table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS sessions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            start_time TEXT NOT NULL,
-            end_time TEXT NOT NULL,
-            duration_minutes REAL NOT NULL
-        )
-    ''')
+    cursor.execute(SESSIONS_TABLE_SQL)
 
     # Create streaks table (stores global streak info)
     cursor.execute('''
@@ -43,70 +405,87 @@ def init_db():
     # Create daily_sessions table (to track which dates had focus sessions for streak calculation)
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS daily_sessions (
-            session_date TEXT UNIQUE NOT NULL -- Store dates like 'YYYY-MM-DD'
+            session_date TEXT UNIQUE NOT NULL, -- Store dates like 'YYYY-MM-DD'
+            session_count INTEGER NOT NULL DEFAULT 0,
+            total_minutes REAL NOT NULL DEFAULT 0
         )
     ''')
+    cursor.execute(WEEKLY_ROLLUPS_TABLE_SQL)
+    cursor.execute(MONTHLY_ROLLUPS_TABLE_SQL)
 
     # Initialize streak data if it doesn't exist
     cursor.execute("INSERT OR IGNORE INTO streaks (id, current_streak, longest_streak) VALUES (1, 0, 0)")
 
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS scheduled_focus_sessions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            scheduled_datetime TEXT NOT NULL,    -- ISO format: YYYY-MM-DDTHH:MM:SS
-            duration_minutes INTEGER NOT NULL,
-            status TEXT NOT NULL DEFAULT 'pending', -- e.g., 'pending', 'active', 'completed', 'missed', 'cancelled'
-            notification_sent INTEGER DEFAULT 0, -- 0 for false, 1 for true
-            notes TEXT,                          -- Optional user notes
-            created_at TEXT NOT NULL             -- Timestamp when the schedule was created
-        )
-    ''')
+    cursor.execute(SCHEDULED_TABLE_SQL)
+    cursor.execute(ACTIVE_SESSIONS_TABLE_SQL)
+
+    cursor.execute("PRAGMA user_version")
+    version = cursor.fetchone()[0]
+    if version < 1:
+        _migrate_iso_timestamps(cursor)
+    if version < 2:
+        _migrate_add_rollups(cursor)
+    if version < 3:
+        _migrate_add_profiles(cursor)
 
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_start_ts ON sessions (start_ts)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_scheduled_ts ON scheduled_focus_sessions (scheduled_ts)")
+    cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
 
     conn.commit()
     conn.close()
+    _initialized_db = db_core.DB_FILE
 
-def add_scheduled_session(scheduled_datetime, duration_minutes, notes=""):
-    """Adds a new scheduled focus session to the database."""
-    init_db()
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    created_at_ts = datetime.now().isoformat()
-    try:
+def ensure_db():
+    """Runs init_db() once per process (and again if the database path changes)."""
+    if _initialized_db != db_core.DB_FILE:
+        init_db()
+
+def add_scheduled_session(scheduled_datetime, duration_minutes, notes="", profile_id=None):
+    """Adds a new scheduled focus session (with the blocklist profile to use) to the database."""
+    ensure_db()
+    scheduled_ts, tz_offset = to_epoch(scheduled_datetime)
+    created_ts, _ = to_epoch(clock.now())
+
+    def write(cursor):
         cursor.execute('''
             INSERT INTO scheduled_focus_sessions 
-            (scheduled_datetime, duration_minutes, notes, created_at, status, notification_sent)
-            VALUES (?, ?, ?, ?, 'pending', 0)
-        ''', (scheduled_datetime.isoformat(), duration_minutes, notes, created_at_ts))
-        conn.commit()
+            (scheduled_ts, tz_offset, duration_minutes, notes, created_ts, status, notification_sent, profile_id)
+            VALUES (?, ?, ?, ?, ?, 'pending', 0, ?)
+        ''', (scheduled_ts, tz_offset, duration_minutes, notes, created_ts, profile_id))
         return cursor.lastrowid
+
+    try:
+        schedule_id = db_core.run_write(write)
     except sqlite3.Error as e:
         print(f"Database error adding scheduled session: {e}")
         return None
-    finally:
-        conn.close()
+    db_core.invalidate_cache("schedules")
+    db_core.publish(db_core.SCHEDULE_ADDED, schedule_id=schedule_id,
+                    scheduled_date=local_date(scheduled_ts, tz_offset))
+    return schedule_id
 
 def get_scheduled_sessions(start_date=None, end_date=None, status_filter=None):
     """
     Retrieves scheduled sessions, optionally filtered by date range and status.
-    Dates should be datetime.date objects.
+    Dates should be datetime.date objects. Returns a list of ScheduledSession rows.
     """
-    init_db()
-    conn = sqlite3.connect(DB_FILE)
+    ensure_db()
+    conn = db_core.connect()
     cursor = conn.cursor()
     
-    query = "SELECT id, scheduled_datetime, duration_minutes, status, notification_sent, notes FROM scheduled_focus_sessions"
+    query = f"SELECT {SCHEDULE_COLUMNS} FROM scheduled_focus_sessions"
     conditions = []
     params = []
 
     if start_date:
-        conditions.append("scheduled_datetime >= ?")
+        conditions.append("scheduled_ts >= ?")
         # Ensure we query from the beginning of the start_date
-        params.append(datetime.combine(start_date, datetime.min.time()).isoformat())
+        params.append(_day_start_epoch(start_date))
     if end_date:
-        conditions.append("scheduled_datetime <= ?")
+        conditions.append("scheduled_ts < ?")
         # Ensure we query up to the end of the end_date
-        params.append(datetime.combine(end_date, datetime.max.time()).isoformat())
+        params.append(_day_start_epoch(end_date + timedelta(days=1)))
     if status_filter:
         conditions.append("status = ?")
         params.append(status_filter)
@@ -114,191 +493,394 @@ def get_scheduled_sessions(start_date=None, end_date=None, status_filter=None):
     if conditions:
         query += " WHERE " + " AND ".join(conditions)
     
-    query += " ORDER BY scheduled_datetime ASC"
+    query += " ORDER BY scheduled_ts ASC"
         
     cursor.execute(query, tuple(params))
-    
-    schedules = []
-    for row in cursor.fetchall():
-        schedules.append({
-            "id": row[0],
-            "scheduled_datetime": datetime.fromisoformat(row[1]),
-            "duration_minutes": row[2],
-            "status": row[3],
-            "notification_sent": bool(row[4]),
-            "notes": row[5]
-        })
+    schedules = [ScheduledSession.from_row(row) for row in cursor.fetchall()]
     conn.close()
     return schedules
 
+def get_pending_schedules_for_date(day):
+    """
+    Returns the pending scheduled sessions on one date (as a tuple), served from the read
+    cache so paging through calendar dates doesn't re-query unchanged days.
+    """
+    ensure_db()
+    return db_core.cached_read("schedules", day, lambda: tuple(
+        get_scheduled_sessions(start_date=day, end_date=day, status_filter='pending')))
+
 def get_upcoming_pending_schedules():
     """Retrieves all 'pending' scheduled sessions from now onwards."""
-    init_db()
-    conn = sqlite3.connect(DB_FILE)
+    ensure_db()
+    conn = db_core.connect()
     cursor = conn.cursor()
-    now_iso = datetime.now().isoformat()
-    cursor.execute('''
-        SELECT id, scheduled_datetime, duration_minutes, status, notification_sent, notes 
+    now_ts, _ = to_epoch(clock.now())
+    cursor.execute(f'''
+        SELECT {SCHEDULE_COLUMNS}
         FROM scheduled_focus_sessions
-        WHERE status = 'pending' AND scheduled_datetime >= ?
-        ORDER BY scheduled_datetime ASC
-    ''', (now_iso,))
-    schedules = []
-    for row in cursor.fetchall():
-        schedules.append({
-            "id": row[0],
-            "scheduled_datetime": datetime.fromisoformat(row[1]),
-            "duration_minutes": row[2],
-            "status": row[3],
-            "notification_sent": bool(row[4]),
-            "notes": row[5]
-        })
+        WHERE status = 'pending' AND scheduled_ts >= ?
+        ORDER BY scheduled_ts ASC
+    ''', (now_ts,))
+    schedules = [ScheduledSession.from_row(row) for row in cursor.fetchall()]
     conn.close()
     return schedules
 
 
+def _schedule_date(cursor, session_id):
+    """Returns the local date of a scheduled session, or None if it doesn't exist."""
+    cursor.execute("SELECT scheduled_ts, tz_offset FROM scheduled_focus_sessions WHERE id = ?", (session_id,))
+    row = cursor.fetchone()
+    return local_date(*row) if row else None
+
 def update_scheduled_session_status(session_id, new_status):
-    init_db()
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    try:
+    ensure_db()
+
+    def write(cursor):
         cursor.execute("UPDATE scheduled_focus_sessions SET status = ? WHERE id = ?", (new_status, session_id))
-        conn.commit()
-        return True
+        return _schedule_date(cursor, session_id)
+
+    try:
+        scheduled_date = db_core.run_write(write)
     except sqlite3.Error as e:
         print(f"Database error updating scheduled session status: {e}")
         return False
-    finally:
-        conn.close()
+    db_core.invalidate_cache("schedules")
+    db_core.publish(db_core.SCHEDULE_UPDATED, schedule_id=session_id,
+                    scheduled_date=scheduled_date, status=new_status)
+    return True
 
 def update_scheduled_session_notification_sent(session_id, sent_status_bool):
-    init_db()
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
+    ensure_db()
     sent_status_int = 1 if sent_status_bool else 0
     try:
-        cursor.execute("UPDATE scheduled_focus_sessions SET notification_sent = ? WHERE id = ?", (sent_status_int, session_id))
-        conn.commit()
+        db_core.run_write(lambda cursor: cursor.execute(
+            "UPDATE scheduled_focus_sessions SET notification_sent = ? WHERE id = ?", (sent_status_int, session_id)))
         return True
     except sqlite3.Error as e:
         print(f"Database error updating notification status: {e}")
         return False
-    finally:
-        conn.close()
 
 
 def delete_scheduled_session(session_id):
-    init_db()
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    try:
+    ensure_db()
+
+    def write(cursor):
+        scheduled_date = _schedule_date(cursor, session_id)
         cursor.execute("DELETE FROM scheduled_focus_sessions WHERE id = ?", (session_id,))
-        conn.commit()
-        return True
+        return scheduled_date
+
+    try:
+        scheduled_date = db_core.run_write(write)
     except sqlite3.Error as e:
         print(f"Database error deleting scheduled session: {e}")
         return False
-    finally:
-        conn.close()
+    db_core.invalidate_cache("schedules")
+    db_core.publish(db_core.SCHEDULE_DELETED, schedule_id=session_id, scheduled_date=scheduled_date)
+    return True
 
 
 def record_session(start_time, end_time):
-    """Records a completed focus session in the database."""
-    init_db() # Ensure DB is initialized before any operation
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
+    """Records a completed focus session in the database and returns its id."""
+    ensure_db() # Ensure DB is initialized before any operation
 
     duration_seconds = int((end_time - start_time).total_seconds())
     duration_minutes = round(duration_seconds / 60, 2)
+    start_ts, tz_offset = to_epoch(start_time)
+    end_ts, _ = to_epoch(end_time)
 
-    # Insert into sessions table
-    cursor.execute('''
-        INSERT INTO sessions (start_time, end_time, duration_minutes)
-        VALUES (?, ?, ?)
-    ''', (start_time.isoformat(), end_time.isoformat(), duration_minutes))
+    def write(cursor):
+        return _insert_session(cursor, start_ts, end_ts, tz_offset, duration_minutes)
 
-    # Insert or ignore into daily_sessions table for streak tracking
-    session_date_str = start_time.date().isoformat()
+    session_id, session_date = db_core.run_write(write)
+    _session_recorded(session_id, session_date, duration_minutes)
+    return session_id
+
+def _insert_session(cursor, start_ts, end_ts, tz_offset, duration_minutes, profile_id=None):
+    """Inserts a finished session and adds it to the rollups. Returns (session id, local date)."""
     cursor.execute('''
-        INSERT OR IGNORE INTO daily_sessions (session_date)
-        VALUES (?)
-    ''', (session_date_str,))
+        INSERT INTO sessions (start_ts, end_ts, tz_offset, duration_minutes, profile_id)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (start_ts, end_ts, tz_offset, duration_minutes, profile_id))
+    session_id = cursor.lastrowid
+
+    # Update the daily (also used for streak tracking), weekly and monthly rollups
+    session_date = local_date(start_ts, tz_offset)
+    _add_session_to_rollups(cursor, session_date, duration_minutes)
+    return session_id, session_date
+
+def _session_recorded(session_id, session_date, duration_minutes):
+    db_core.invalidate_cache("totals")
+    db_core.publish(db_core.SESSION_RECORDED, session_id=session_id,
+                    session_date=session_date, duration_minutes=duration_minutes)
+
+# --- Session Journal ---
+# A running session lives in active_sessions until it is finished. The timer only
+# queues a checkpoint once per CHECKPOINT_INTERVAL_SECONDS, so ticks do no I/O.
+
+def begin_session(start_time, planned_minutes=None, profile_id=None):
+    """Journals a session that has just started (blocking profile_id) and returns its journal id."""
+    ensure_db()
+    start_ts, tz_offset = to_epoch(start_time)
+    return db_core.run_write(lambda cursor: cursor.execute('''
+        INSERT INTO active_sessions (start_ts, tz_offset, planned_minutes, checkpoint_ts, profile_id)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (start_ts, tz_offset, planned_minutes, start_ts, profile_id)).lastrowid)
+
+def checkpoint_session(journal_id):
+    """Queues an update of the session's checkpoint to now, without waiting for it."""
+    now_ts, _ = to_epoch(clock.now())
+    return db_core.submit_write(lambda cursor: cursor.execute(
+        "UPDATE active_sessions SET checkpoint_ts = ? WHERE id = ?", (now_ts, journal_id)))
+
+def finish_session(journal_id, end_time):
+    """
+    Moves a journaled session into the sessions table, ending at end_time.
+    Returns the new session id, or None if the session was too short to record.
+    """
+    ensure_db()
+    end_ts, _ = to_epoch(end_time)
+
+    def write(cursor):
+        cursor.execute("SELECT start_ts, tz_offset, profile_id FROM active_sessions WHERE id = ?", (journal_id,))
+        row = cursor.fetchone()
+        cursor.execute("DELETE FROM active_sessions WHERE id = ?", (journal_id,))
+        if row is None or end_ts - row[0] < MIN_SESSION_SECONDS:
+            return None
+        start_ts, tz_offset, profile_id = row
+        duration_minutes = round((end_ts - start_ts) / 60, 2)
+        return _insert_session(cursor, start_ts, end_ts, tz_offset, duration_minutes, profile_id) + (duration_minutes,)
+
+    recorded = db_core.run_write(write)
+    if recorded is None:
+        return None
+    _session_recorded(*recorded)
+    return recorded[0]
 
-    conn.commit()
-    conn.close()
+def recover_orphaned_sessions(resume=True):
+    """
+    Deals with journaled sessions left behind by a process that crashed or was killed.
+    Only the running instance (see instance_core) should call this, before starting a session.
+
+    If resume is set, the most recent orphan is kept for resuming when its timer hasn't
+    run out and it was checkpointed within RESUME_GRACE_SECONDS. Every other orphan is
+    recorded as ending at its last checkpoint. Returns (recorded session ids, the
+    ActiveSession to resume or None).
+    """
+    ensure_db()
+    now_ts, _ = to_epoch(clock.now())
+
+    def write(cursor):
+        cursor.execute('''
+            SELECT id, start_ts, tz_offset, planned_minutes, checkpoint_ts, profile_id
+            FROM active_sessions ORDER BY start_ts DESC
+        ''')
+        orphans = [ActiveSession(*row) for row in cursor.fetchall()]
+
+        resumed = None
+        if (resume and orphans and orphans[0].remaining_seconds(now_ts) > 0
+                and now_ts - orphans[0].checkpoint_ts <= RESUME_GRACE_SECONDS):
+            resumed = orphans.pop(0)
+            cursor.execute("UPDATE active_sessions SET checkpoint_ts = ? WHERE id = ?", (now_ts, resumed.id))
+
+        recorded = []
+        for orphan in orphans:
+            cursor.execute("DELETE FROM active_sessions WHERE id = ?", (orphan.id,))
+            end_ts = orphan.checkpoint_ts
+            if orphan.planned_minutes is not None:
+                end_ts = min(end_ts, orphan.start_ts + round(orphan.planned_minutes * 60))
+            if end_ts - orphan.start_ts >= MIN_SESSION_SECONDS:
+                duration_minutes = round((end_ts - orphan.start_ts) / 60, 2)
+                recorded.append(_insert_session(cursor, orphan.start_ts, end_ts, orphan.tz_offset,
+                                                duration_minutes, orphan.profile_id) + (duration_minutes,))
+        return recorded, resumed
+
+    recorded, resumed = db_core.run_write(write)
+    for session in recorded:
+        _session_recorded(*session)
+    if recorded:
+        update_streak()
+    return [session[0] for session in recorded], resumed
 
 def update_streak():
     """Calculates and updates the current and longest streaks in the database."""
-    init_db()
-    conn = sqlite3.connect(DB_FILE)
+    ensure_db()
+    today = clock.now().date()
+    today_str = today.isoformat()
+
+    def write(cursor):
+        # Get all unique session dates from the daily_sessions table
+        cursor.execute("SELECT session_date FROM daily_sessions ORDER BY session_date")
+        session_dates_str = [row[0] for row in cursor.fetchall()]
+        session_dates_dt = {datetime.fromisoformat(d).date() for d in session_dates_str}
+
+        current_streak = 0
+        # Check if a session occurred today
+        if today in session_dates_dt:
+            current_streak = 1 # Start streak with today
+            check_date = today - timedelta(days=1)
+            while check_date in session_dates_dt:
+                current_streak += 1
+                check_date -= timedelta(days=1)
+        # else: current_streak remains 0 if no session today
+
+        # Get the existing longest streak
+        cursor.execute("SELECT longest_streak FROM streaks WHERE id = 1")
+        longest_streak_row = cursor.fetchone()
+        longest_streak = longest_streak_row[0] if longest_streak_row else 0
+
+        # Update longest streak if current is greater
+        longest_streak = max(longest_streak, current_streak)
+
+        # Update the streaks table
+        cursor.execute('''
+            UPDATE streaks
+            SET current_streak = ?, longest_streak = ?, last_checked_date = ?
+            WHERE id = 1
+        ''', (current_streak, longest_streak, today_str))
+        return current_streak, longest_streak
+
+    current_streak, longest_streak = db_core.run_write(write)
+    db_core.invalidate_cache("streaks")
+    db_core.publish(db_core.STREAK_UPDATED, current_streak=current_streak, longest_streak=longest_streak)
+    return current_streak, longest_streak
+
+def load_session_store(start_date=None, end_date=None):
+    """
+    Loads sessions into a SessionStore, optionally limited to sessions starting
+    between start_date and end_date (inclusive, datetime.date objects).
+    """
+    ensure_db()
+    conn = db_core.connect()
     cursor = conn.cursor()
 
-    today = datetime.now().date()
-    today_str = today.isoformat()
+    query = "SELECT id, start_ts, end_ts, tz_offset, duration_minutes FROM sessions"
+    conditions = []
+    params = []
+    if start_date:
+        conditions.append("start_ts >= ?")
+        params.append(_day_start_epoch(start_date))
+    if end_date:
+        conditions.append("start_ts < ?")
+        params.append(_day_start_epoch(end_date + timedelta(days=1)))
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY start_ts ASC"
 
-    # Get all unique session dates from the daily_sessions table
-    cursor.execute("SELECT session_date FROM daily_sessions ORDER BY session_date")
-    session_dates_str = [row[0] for row in cursor.fetchall()]
-    session_dates_dt = {datetime.fromisoformat(d).date() for d in session_dates_str}
-
-    current_streak = 0
-    # Check if a session occurred today
-    if today in session_dates_dt:
-        current_streak = 1 # Start streak with today
-        check_date = today - timedelta(days=1)
-        while check_date in session_dates_dt:
-            current_streak += 1
-            check_date -= timedelta(days=1)
-    # else: current_streak remains 0 if no session today
-
-    # Get the existing longest streak
-    cursor.execute("SELECT longest_streak FROM streaks WHERE id = 1")
-    longest_streak_row = cursor.fetchone()
-    longest_streak = longest_streak_row[0] if longest_streak_row else 0
-
-    # Update longest streak if current is greater
-    longest_streak = max(longest_streak, current_streak)
-
-    # Update the streaks table
-    cursor.execute('''
-        UPDATE streaks
-        SET current_streak = ?, longest_streak = ?, last_checked_date = ?
-        WHERE id = 1
-    ''', (current_streak, longest_streak, today_str))
+    cursor.execute(query, tuple(params))
+    store = SessionStore.from_rows(cursor) # Stream rows straight into the column arrays
+    conn.close()
+    return store
 
-    conn.commit()
+def get_session_history():
+    """Returns all past sessions as a SessionStore (oldest first) and the total duration in minutes."""
+    store = load_session_store()
+    return store, store.total_minutes()
+
+def _load_total_focus_minutes():
+    conn = db_core.connect()
+    cursor = conn.cursor()
+    cursor.execute("SELECT COALESCE(SUM(total_minutes), 0) FROM monthly_rollups")
+    total = cursor.fetchone()[0]
     conn.close()
+    return total
 
-    return current_streak, longest_streak
+def get_total_focus_minutes():
+    """Returns the total duration of all recorded sessions, including archived ones."""
+    ensure_db()
+    return db_core.cached_read("totals", None, _load_total_focus_minutes)
 
-def get_session_history():
-    """Returns a list of past session durations and total duration from the database."""
-    init_db()
-    conn = sqlite3.connect(DB_FILE)
+def get_focus_totals(start_date, end_date):
+    """
+    Returns (session_count, total_minutes) for sessions starting between start_date and
+    end_date (inclusive), read from the coarsest rollups that cover the range.
+    """
+    ensure_db()
+    conn = db_core.connect()
     cursor = conn.cursor()
 
-    cursor.execute("SELECT start_time, end_time, duration_minutes FROM sessions ORDER BY start_time DESC")
-    rows = cursor.fetchall()
+    session_count, total_minutes = 0, 0.0
+    months, weeks, days = _rollup_keys_for_range(start_date, end_date)
+    for table, key_column, keys in (("monthly_rollups", "month", months),
+                                    ("weekly_rollups", "week_start", weeks),
+                                    ("daily_sessions", "session_date", days)):
+        if not keys:
+            continue
+        placeholders = ", ".join("?" * len(keys))
+        cursor.execute(f'''
+            SELECT COALESCE(SUM(session_count), 0), COALESCE(SUM(total_minutes), 0)
+            FROM {table} WHERE {key_column} IN ({placeholders})
+        ''', keys)
+        count, minutes = cursor.fetchone()
+        session_count += count
+        total_minutes += minutes
+
+    conn.close()
+    return session_count, total_minutes
+
+def get_daily_totals(start_date=None, end_date=None):
+    """Returns {date: total minutes} from the daily rollups, including archived sessions."""
+    ensure_db()
+    conn = db_core.connect()
+    cursor = conn.cursor()
+
+    query = "SELECT session_date, total_minutes FROM daily_sessions"
+    conditions = []
+    params = []
+    if start_date:
+        conditions.append("session_date >= ?")
+        params.append(start_date.isoformat())
+    if end_date:
+        conditions.append("session_date <= ?")
+        params.append(end_date.isoformat())
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+
+    cursor.execute(query, tuple(params))
+    totals = {date.fromisoformat(day): minutes for day, minutes in cursor.fetchall()}
+    conn.close()
+    return totals
 
-    sessions_list = []
-    total_duration_minutes = 0.0
+# --- Compaction ---
 
-    for row in rows:
-        start_time_str, end_time_str, duration_minutes = row
-        sessions_list.append({
-            "start": start_time_str,
-            "end": end_time_str,
-            "duration_minutes": duration_minutes
-        })
-        total_duration_minutes += duration_minutes
+def compact_sessions(retention_days=SESSION_RETENTION_DAYS, archive_dir=ARCHIVE_DIR):
+    """
+    Moves raw sessions that started more than retention_days ago into a gzip-compressed
+    JSON Lines archive and reclaims their space with an incremental VACUUM.
+    Rollups are kept, so totals, streaks and the calendar are unaffected.
+    Returns the number of archived sessions.
+    """
+    ensure_db()
+    cutoff_ts = _day_start_epoch(clock.now().date() - timedelta(days=retention_days))
+    conn = db_core.connect()
+    cursor = conn.cursor()
 
+    cursor.execute('''
+        SELECT id, start_ts, end_ts, tz_offset, duration_minutes FROM sessions
+        WHERE start_ts < ? ORDER BY id
+    ''', (cutoff_ts,))
+    rows = cursor.fetchall()
+    if rows:
+        # Write (and flush) the archive before deleting anything, so a crash can't lose sessions
+        os.makedirs(archive_dir, exist_ok=True)
+        archive_path = os.path.join(archive_dir, f"sessions-{clock.now():%Y%m%d}.jsonl.gz")
+        with gzip.open(archive_path, "at", encoding="utf-8") as archive:
+            for row in rows:
+                archive.write(json.dumps(SessionRecord(*row)._asdict()) + "\n")
+        db_core.run_write(lambda write_cursor: write_cursor.execute(
+            "DELETE FROM sessions WHERE id <= ? AND start_ts < ?", (rows[-1][0], cutoff_ts)))
+
+    cursor.execute("PRAGMA auto_vacuum")
+    if cursor.fetchone()[0] != 2:
+        # Incremental vacuum only works once auto_vacuum is INCREMENTAL, which takes one full VACUUM
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        cursor.execute("VACUUM")
+    cursor.execute("PRAGMA incremental_vacuum")
+    cursor.fetchall()
     conn.close()
-    return sessions_list, total_duration_minutes
+    return len(rows)
 
-def get_streak_info():
-    """Returns the current and longest streaks from the database."""
-    init_db()
-    conn = sqlite3.connect(DB_FILE)
+def _load_streak_info():
+    conn = db_core.connect()
     cursor = conn.cursor()
 
     cursor.execute("SELECT current_streak, longest_streak FROM streaks WHERE id = 1")
@@ -309,12 +891,16 @@ def get_streak_info():
         return streak_info[0], streak_info[1]
     return 0, 0 # Default if no streak info is found
 
+def get_streak_info():
+    """Returns the current and longest streaks, served from the read cache when unchanged."""
+    ensure_db()
+    return db_core.cached_read("streaks", None, _load_streak_info)
+
 # Example usage (for testing)
 if __name__ == "__main__":
     # Clean up previous data for consistent testing
     # Note: This will delete data from the platform-specific data directory
-    if os.path.exists(DB_FILE):
-        os.remove(DB_FILE)
+    db_core.remove_database()
     if not os.path.exists(os.path.dirname(DB_FILE)):
         os.makedirs(os.path.dirname(DB_FILE))
 
@@ -327,10 +913,14 @@ if __name__ == "__main__":
     sessions, total_duration = get_session_history()
     print(f"Initial Sessions: {len(sessions)}, Total Duration: {total_duration:.1f} mins")
 
+    # A simulated clock lets the demo move through days without waiting for them
+    simulated = clock.SimulatedClock()
+    clock.set_clock(simulated)
+
     print("\n--- Simulating sessions for a streak: Day 1, Day 2, Day 3 (today) ---")
-    two_days_ago = datetime.now() - timedelta(days=2)
-    yesterday = datetime.now() - timedelta(days=1)
-    today = datetime.now()
+    two_days_ago = clock.now() - timedelta(days=2)
+    yesterday = clock.now() - timedelta(days=1)
+    today = clock.now()
 
     record_session(two_days_ago - timedelta(minutes=25), two_days_ago)
     print(f"Recorded session on {two_days_ago.date()}")
@@ -345,7 +935,8 @@ if __name__ == "__main__":
     print(f"Current Streak after 3 consecutive sessions: Current={current_s}, Longest={longest_s}")
 
     print("\n--- Simulating a broken streak (no session for a day, then a new session) ---")
-    day_after_tomorrow = datetime.now() + timedelta(days=2)
+    simulated.advance(days=2)
+    day_after_tomorrow = clock.now()
     record_session(day_after_tomorrow - timedelta(minutes=25), day_after_tomorrow)
     print(f"Recorded session on {day_after_tomorrow.date()} (after a gap)")
 
@@ -353,11 +944,10 @@ if __name__ == "__main__":
     print(f"Current Streak after intentional gap: Current={current_s}, Longest={longest_s}")
 
     print("\n--- Testing Edge Case: No session today ---")
-    if os.path.exists(DB_FILE):
-        os.remove(DB_FILE)
+    db_core.remove_database()
     init_db()
     
-    yesterday_test = datetime.now() - timedelta(days=1)
+    yesterday_test = clock.now() - timedelta(days=1)
     record_session(yesterday_test - timedelta(minutes=25), yesterday_test)
     print(f"Recorded session on {yesterday_test.date()} (but not today)")
     
@@ -371,5 +961,5 @@ if __name__ == "__main__":
     print("\n--- Final Session History ---")
     sessions, total_duration = get_session_history()
     for s in sessions:
-        print(f" Start: {s['start']}, End: {s['end']}, Duration: {s['duration_minutes']} mins")
+        print(f" Start: {s.start}, End: {s.end}, Duration: {s.duration_minutes} mins")
     print(f"Total focus time: {total_duration:.1f} minutes")
\ No newline at end of file
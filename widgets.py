@@ -0,0 +1,126 @@
+import customtkinter as ctk
+
+class VirtualList(ctk.CTkFrame):
+    """
+    Scrollable list that only renders the visible window of items.
+
+    A fixed pool of row widgets is created up front; scrolling or changing the items
+    just rebinds the pooled rows to different items, so the cost of a refresh doesn't
+    depend on how many items the list holds.
+
+    make_row(parent) creates one pooled row widget and bind_row(row, item) updates it
+    to show item.
+    """
+    def __init__(self, master, make_row, bind_row, visible_rows=10, **kwargs):
+        super().__init__(master, **kwargs)
+        self._bind_row = bind_row
+        self._items = ()
+        self._first = 0
+
+        self._rows_frame = ctk.CTkFrame(self, fg_color="transparent")
+        self._rows_frame.pack(side=ctk.LEFT, fill=ctk.BOTH, expand=True, padx=(2, 0), pady=2)
+        self._rows_frame.grid_columnconfigure(0, weight=1)
+
+        self._scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self._scrollbar.pack(side=ctk.RIGHT, fill=ctk.Y)
+
+        self._rows = [make_row(self._rows_frame) for _ in range(visible_rows)]
+
+        self._empty_label = ctk.CTkLabel(self._rows_frame, text="")
+
+        # Only capture the mouse wheel while the pointer is over the list
+        self.bind("<Enter>", self._bind_mousewheel)
+        self.bind("<Leave>", self._unbind_mousewheel)
+
+    def set_items(self, items, empty_text=""):
+        """Shows items (any indexable sequence), keeping the scroll position where possible."""
+        self._items = items
+        self._empty_label.configure(text=empty_text)
+        self._scroll_to(self._first)
+
+    def _scroll_to(self, first):
+        max_first = max(0, len(self._items) - len(self._rows))
+        self._first = min(max(0, first), max_first)
+        self._render()
+
+    def _render(self):
+        for i, row in enumerate(self._rows):
+            index = self._first + i
+            if index < len(self._items):
+                self._bind_row(row, self._items[index])
+                if not row.winfo_manager(): # Rows keep their grid cell; only removed ones are placed again
+                    row.grid(row=i, column=0, sticky="ew", pady=2, padx=2)
+            else:
+                row.grid_remove()
+
+        if self._items:
+            self._empty_label.grid_remove()
+        elif not self._empty_label.winfo_manager():
+            self._empty_label.grid(row=0, column=0, pady=5)
+
+        total = max(len(self._items), 1)
+        self._scrollbar.set(self._first / total, min(1.0, (self._first + len(self._rows)) / total))
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self._scroll_to(int(float(value) * len(self._items)))
+        elif action == "scroll":
+            step = len(self._rows) if unit == "pages" else 1
+            self._scroll_to(self._first + int(value) * step)
+
+    def _on_mousewheel(self, event):
+        if getattr(event, "num", None) == 4:
+            delta = -1
+        elif getattr(event, "num", None) == 5:
+            delta = 1
+        else:
+            delta = -1 if event.delta > 0 else 1
+        self._scroll_to(self._first + delta * 3)
+
+    def _bind_mousewheel(self, event=None):
+        self.bind_all("<MouseWheel>", self._on_mousewheel)
+        self.bind_all("<Button-4>", self._on_mousewheel)
+        self.bind_all("<Button-5>", self._on_mousewheel)
+
+    def _unbind_mousewheel(self, event=None):
+        # Moving onto one of the rows also fires <Leave> on the list itself
+        hovered = self.winfo_containing(*self.winfo_pointerxy())
+        if hovered is not None and str(hovered).startswith(str(self)):
+            return
+        self.unbind_all("<MouseWheel>")
+        self.unbind_all("<Button-4>")
+        self.unbind_all("<Button-5>")
+
+class RowPool:
+    """
+    Reuses row widgets inside a container (e.g. a CTkScrollableFrame).
+
+    show(items) rebinds the existing rows to the new items and only creates widgets
+    when more rows are needed than ever before; rows left over are hidden, not destroyed.
+    make_row(parent) and bind_row(row, item) work as in VirtualList.
+    """
+    def __init__(self, parent, make_row, bind_row):
+        self._parent = parent
+        self._make_row = make_row
+        self._bind_row = bind_row
+        self._rows = []
+        self._message_label = ctk.CTkLabel(parent, text="")
+
+    def show(self, items, empty_text=""):
+        while len(self._rows) < len(items):
+            self._rows.append(self._make_row(self._parent))
+
+        for row, item in zip(self._rows, items):
+            self._bind_row(row, item)
+            # winfo_ismapped() is False for every row while the parent isn't shown (a hidden
+            # tab, a minimized window), so whether a row is packed is asked of its manager
+            if not row.winfo_manager():
+                row.pack(fill=ctk.X, pady=2)
+        for row in self._rows[len(items):]:
+            row.pack_forget()
+
+        if items:
+            self._message_label.pack_forget()
+        else:
+            self._message_label.configure(text=empty_text)
+            self._message_label.pack(pady=5)